@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark delle statistiche sulle risposte (gitquest/analytics.py).
+
+Misura:
+• quanto costa a una partita registrare una risposta (SessionLog.record, che
+  accoda soltanto)
+• quanto ci mette il thread a scrivere il log e la compattazione a portarlo in
+  SQLite, e quanti byte occupa ogni evento nel log
+• quanto durano le query aggregate (tasso di errore e percentili per domanda)
+
+Gli eventi sono sintetici: N sessioni che rispondono alle domande dei livelli
+con tempi e risposte casuali (seme fisso).
+
+Uso: python3 benchmarks/bench_analytics.py [--eventi N] [--domande N]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from gitquest.analytics import AnswerLog, answer_counts, format_report, question_stats
+
+
+def synthetic(count, questions, seed=1):
+    """(domanda, risposta, tempo, punti, esito) plausibili per count risposte"""
+    rng = random.Random(seed)
+    names = [f"level_{q // 4 + 1}_quiz.{q % 4 + 1}" for q in range(questions)]
+    events = []
+    for _ in range(count):
+        question = rng.choice(names)
+        ok = rng.random() < 0.7
+        events.append((question, rng.choice("abcd") if ok else rng.choice(("e", "boh", "")),
+                       rng.lognormvariate(1.5, 0.8), rng.choice((10, 15, 20)) if ok else 0, ok))
+    return events
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Registrazione e query delle risposte")
+    parser.add_argument("--eventi", type=int, default=1_000_000)
+    parser.add_argument("--domande", type=int, default=40)
+    args = parser.parse_args()
+
+    events = synthetic(args.eventi, args.domande)
+    base = tempfile.mkdtemp(prefix="bench-analytics-")
+    try:
+        # Il thread non scrive durante la misura: conta solo il costo per la partita
+        log = AnswerLog(base, flush_interval=3600, compact_bytes=1 << 40)
+        sessions = [log.session() for _ in range(max(1, args.eventi // 25))]
+        start = time.perf_counter()
+        for i, event in enumerate(events):
+            sessions[i % len(sessions)].record(*event)
+        record = time.perf_counter() - start
+
+        start = time.perf_counter()
+        log.flush()
+        flush = time.perf_counter() - start
+        size = os.path.getsize(log.log_path)
+
+        start = time.perf_counter()
+        moved = log.compact()
+        compact = time.perf_counter() - start
+        log.close()
+
+        start = time.perf_counter()
+        stats = question_stats(log.db_path)
+        query = time.perf_counter() - start
+        start = time.perf_counter()
+        answer_counts(log.db_path, stats[0]['question'])
+        counts = time.perf_counter() - start
+
+        print(format_report(stats[:5]), end="")
+        print(f"... ({len(stats)} domande)\n")
+        print(f"record() per risposta:   {record / args.eventi * 1e6:8.2f} µs")
+        print(f"scrittura del log:       {flush * 1000:8.0f} ms ({args.eventi / flush / 1000:.0f}k eventi/s)")
+        print(f"byte per evento nel log: {size / args.eventi:8.2f} ({size / 2**20:.1f} MB)")
+        print(f"compattazione in SQLite: {compact * 1000:8.0f} ms ({moved / compact / 1000:.0f}k eventi/s)")
+        print(f"database:                {os.path.getsize(log.db_path) / 2**20:8.1f} MB")
+        print(f"question_stats:          {query * 1000:8.1f} ms")
+        print(f"answer_counts:           {counts * 1000:8.1f} ms")
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark delle risposte precalcolate e della modalità deterministica.
+
+Sul modello cherry_pick di gitquest/data/quest.json misura come si trova
+l'hash del commit "Aggiunta feature 1":
+• come faceva il vecchio cherry_pick_fallback: `git log --oneline experimental -3`
+  e la seconda riga dell'output
+• cercandolo nella storia con gitquest/inspector.py (scenario senza modello)
+• dalla tabella calcolata alla costruzione del modello (SnapshotStore.answers)
+Poi fa lo stesso commit del giocatore in N sessioni, con e senza
+--deterministico, e conta quanti hash diversi ne escono e quante volte
+`git log -3` arriva dalla memoria condivisa di gitquest/memo.py.
+
+Uso: python3 benchmarks/bench_answers.py [--sessioni N] [--ripetizioni N]
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from gitquest.executor import GitWorker
+from gitquest.inspector import Inspector
+from gitquest.levels import load_content
+from gitquest.snapshots import TEMPLATE_ENV, SnapshotStore
+
+SUBJECT = "Aggiunta feature 1"
+
+
+def measure(label, runs, call):
+    start = time.perf_counter()
+    for _ in range(runs):
+        result = call()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40}{elapsed / runs * 1000:>10.3f}")
+    return result
+
+
+def guess(path):
+    output = subprocess.run(["git", "log", "--oneline", "experimental", "-3"], cwd=path,
+                            capture_output=True, text=True).stdout
+    return output.strip().split("\n")[1].split()[0]
+
+
+def sessions(store, base, count, env):
+    """Hash del commit del giocatore e risposte memorizzate di git log in count sessioni"""
+    heads = set()
+    memo = 0
+    for i in range(count):
+        path = os.path.join(base, f"giocatore-{i}")
+        store.instantiate('cherry_pick', path)
+        worker = GitWorker(path, env=env)
+        worker.write_file("mio.txt", "La mia modifica\n")
+        worker.run("git add mio.txt")
+        success, _, error = worker.run('git commit -q -m "Il mio commit"')
+        if not success:
+            raise SystemExit(f"commit del giocatore non riuscito: {error.strip()}")
+        worker.run("git log -3")
+        heads.add(worker.inspector().resolve("HEAD"))
+        memo += worker.stats['memo']
+        worker.close()
+        # Le date di git hanno la precisione del secondo: senza date fisse la sessione
+        # successiva deve cadere in un altro secondo per poter avere un hash diverso
+        if 'GIT_COMMITTER_DATE' not in env:
+            time.sleep(1.01)
+    return len(heads), memo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Risposte precalcolate e hash riproducibili")
+    parser.add_argument("--sessioni", type=int, default=5)
+    parser.add_argument("--ripetizioni", type=int, default=200)
+    args = parser.parse_args()
+
+    base = tempfile.mkdtemp(prefix="bench-answers-")
+    try:
+        store = SnapshotStore(os.path.join(base, "modelli"), load_content().snapshots)
+        path = os.path.join(base, "partita")
+        store.instantiate('cherry_pick', path)
+        print(f"{'hash di ' + SUBJECT:<40}{'ms':>10}")
+        expected = store.answers('cherry_pick')['feature_1']
+        results = [measure("git log e seconda riga", max(1, args.ripetizioni // 10), lambda: guess(path)),
+                   measure("storia letta da .git", args.ripetizioni,
+                           lambda: Inspector(path).find_commit("experimental", SUBJECT)),
+                   measure("tabella del modello", args.ripetizioni,
+                           lambda: store.answers('cherry_pick')['feature_1'])]
+        if not all(expected.startswith(result) for result in results):
+            print("  ⚠️ hash diversi")
+
+        print(f"\n{args.sessioni} sessioni con lo stesso commit del giocatore")
+        print(f"{'':<40}{'hash diversi':>14}{'git log da memoria':>20}")
+        # Stessa identità in entrambi i casi (altrimenti git può rifiutare il commit): cambiano solo le date
+        clock = dict(os.environ, **{name: value for name, value in TEMPLATE_ENV.items() if not name.endswith("_DATE")})
+        for label, env in (("date dell'orologio", clock), ("--deterministico", dict(os.environ, **TEMPLATE_ENV))):
+            distinct, memo = sessions(store, os.path.join(base, label.strip("-")), args.sessioni, env)
+            print(f"{label:<40}{distinct:>14}{memo:>20}")
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
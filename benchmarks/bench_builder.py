@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark dei commit scritti in una volta (gitquest/builder.py).
+
+Parte N volte dal modello base di gitquest/snapshots.py e applica il passo
+'commits' della ricetta scelta (di solito cherry_pick: un branch, tre commit
+e il ritorno a main) in due modi:
+• i comandi di builder.commands eseguiti uno per uno da GitWorker, come
+  faceva la preparazione degli scenari
+• GitWorker.commit_batch, che scrive oggetti, index, ref e reflog da Python
+Con le date fisse di TEMPLATE_ENV i due repository devono avere gli stessi
+ref, lo stesso reflog e lo stesso `git status`. I processi contati sono
+quelli di stats['exec']; commit_batch lancia in più solo `git var` per
+leggere l'identità, una volta per sessione.
+
+Uso: python3 benchmarks/bench_builder.py [--sessioni N] [--modello nome]
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from gitquest.builder import commands
+from gitquest.executor import GitWorker
+from gitquest.levels import load_content
+from gitquest.snapshots import TEMPLATE_ENV, SnapshotStore
+
+SUMMARY = "git for-each-ref --format='%(refname) %(objectname)'; git status --porcelain; cut -f2 .git/logs/HEAD"
+
+
+def step_by_step(worker, spec):
+    for step in commands(spec):
+        if step[0] == 'write':
+            worker.write_file(step[1], step[2])
+        else:
+            worker.run(step[1])
+    return True
+
+
+def prepare(store, base, label, count, spec, apply):
+    """Tempo medio per sessione, processi git lanciati e riepiloghi dei repository"""
+    env = dict(os.environ, **TEMPLATE_ENV)
+    paths = []
+    for i in range(count):
+        path = os.path.join(base, label, f"giocatore-{i}")
+        store.instantiate('base', path)
+        paths.append(path)
+    spawned = 0
+    start = time.perf_counter()
+    for path in paths:
+        worker = GitWorker(path, env=env, outputs=None)
+        if not apply(worker, spec):
+            step_by_step(worker, spec)
+        spawned += worker.stats['exec']
+        worker.close()
+    elapsed = (time.perf_counter() - start) / count
+    summaries = {subprocess.run(SUMMARY, shell=True, cwd=path, capture_output=True, text=True).stdout
+                 for path in paths}
+    return elapsed, spawned, summaries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Commit degli scenari in una volta")
+    parser.add_argument("--sessioni", type=int, default=20)
+    parser.add_argument("--modello", default="cherry_pick")
+    args = parser.parse_args()
+
+    recipe = load_content().snapshots[args.modello]
+    spec = next(step[1] for step in recipe['steps'] if step[0] == 'commits')
+    base = tempfile.mkdtemp(prefix="bench-builder-")
+    try:
+        store = SnapshotStore(os.path.join(base, "modelli"), {'base': load_content().snapshots['base']})
+        print(f"{args.sessioni} sessioni, {len(spec['commits'])} commit della ricetta {args.modello}\n")
+        print(f"{'':<24}{'ms':>10}{'processi':>10}")
+        results = []
+        for label, apply in (("comando per comando", step_by_step),
+                             ("commit_batch", lambda worker, spec: worker.commit_batch(spec))):
+            elapsed, spawned, summaries = prepare(store, base, label.replace(" ", "-"), args.sessioni, spec, apply)
+            print(f"{label:<24}{elapsed * 1000:>10.2f}{spawned:>10}")
+            results.append(summaries)
+        if len(results[0]) != 1 or results[0] != results[1]:
+            print("  ⚠️ repository diversi da quelli di git")
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark della cattura dell'output (gitquest/capture.py) su una storia lunga.
+
+Crea con git fast-import un repository di N commit e confronta, per `git log`
+e `git reflog`:
+• subprocess.run(capture_output=True, text=True), come faceva run_command
+• run_captured con i limiti di default (output troncato, git fermato)
+• run_captured in streaming: quanto tempo passa prima del primo pezzo di output
+Per ciascuno: tempo, picco di memoria allocata da Python (tracemalloc) e
+caratteri restituiti.
+
+Uso: python3 benchmarks/bench_capture.py [--commit N]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from gitquest.capture import run_captured
+
+
+def build_history(path, commits):
+    """Repository con commits commit lineari su main (un file che cambia ogni volta)"""
+    subprocess.run(["git", "init", "-q", "-b", "main", path], check=True)
+    lines = []
+    for i in range(commits):
+        message = f"Commit numero {i}"
+        content = f"versione {i}\n"
+        lines.append(f"commit refs/heads/main\nmark :{i + 1}\n"
+                     f"committer Bench <bench@example.com> {1700000000 + i} +0000\n"
+                     f"data {len(message)}\n{message}\n"
+                     + (f"from :{i}\n" if i else "")
+                     + f"M 100644 inline file.txt\ndata {len(content)}\n{content}\n")
+    subprocess.run(["git", "fast-import", "--quiet"], input="".join(lines).encode(), cwd=path, check=True)
+    # Un reflog lungo quanto la storia, come dopo tanti commit fatti a mano
+    head = subprocess.run(["git", "rev-list", "main"], capture_output=True, text=True, cwd=path).stdout.split()
+    head.reverse()
+    with open(os.path.join(path, ".git", "logs", "HEAD"), "w") as f:
+        previous = "0" * 40
+        for i, oid in enumerate(head):
+            f.write(f"{previous} {oid} Bench <bench@example.com> {1700000000 + i} +0000\tcommit: Commit numero {i}\n")
+            previous = oid
+    subprocess.run(["git", "checkout", "-q", "main"], cwd=path, check=True)
+
+
+def measure(label, call):
+    tracemalloc.start()
+    start = time.perf_counter()
+    first, size = call()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    first = f"{first * 1000:>10.1f}" if first is not None else f"{'-':>10}"
+    print(f"{label:<30}{elapsed * 1000:>10.1f}{first}{peak / 2**20:>10.2f}{size:>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cattura dell'output di git su una storia lunga")
+    parser.add_argument("--commit", type=int, default=50_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as path:
+        start = time.perf_counter()
+        build_history(path, args.commit)
+        print(f"repository di {args.commit} commit creato in {time.perf_counter() - start:.1f} s\n")
+        print(f"{'':<30}{'ms':>10}{'1° pezzo':>10}{'picco MB':>10}{'caratteri':>12}")
+        for command in (["git", "log"], ["git", "reflog"]):
+            name = " ".join(command)
+
+            def legacy():
+                result = subprocess.run(command, capture_output=True, text=True, cwd=path)
+                return None, len(result.stdout)
+
+            def bounded():
+                _, output, _ = run_captured(command, path)
+                return None, len(output)
+
+            def streaming():
+                start = time.perf_counter()
+                first = []
+                size = [0]
+
+                def sink(text):
+                    if not first:
+                        first.append(time.perf_counter() - start)
+                    size[0] += len(text)
+
+                run_captured(command, path, sink=sink)
+                return first[0], size[0]
+
+            measure(f"{name}: capture_output", legacy)
+            measure(f"{name}: limitato", bounded)
+            measure(f"{name}: streaming", streaming)
+
+
+if __name__ == "__main__":
+    main()
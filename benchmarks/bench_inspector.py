@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark delle verifiche sul repository (gitquest/inspector.py).
+
+Prepara un repository con qualche commit, un branch e un file nello staging
+area, poi confronta per le domande dei passi {"check": ...}:
+• i processi git che servirebbero per rispondere (rev-parse, diff --cached, log)
+• Inspector al primo accesso (file di .git da leggere e analizzare)
+• Inspector con la cache calda (.git non è cambiato: solo os.stat)
+
+Uso: python3 benchmarks/bench_inspector.py [--ripetizioni N] [--commit N]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from gitquest.inspector import Inspector
+from gitquest.snapshots import TEMPLATE_ENV
+
+ENV = dict(os.environ, **TEMPLATE_ENV)
+
+
+def git(path, *args):
+    return subprocess.run(["git", *args], cwd=path, env=ENV, check=True, capture_output=True, text=True).stdout
+
+
+def build(path, commits):
+    git(path, "init", "-q", "-b", "main")
+    for i in range(commits):
+        with open(os.path.join(path, f"file_{i % 10}.txt"), "w") as f:
+            f.write(f"versione {i}\n")
+        git(path, "add", ".")
+        git(path, "commit", "-q", "-m", f"Commit {i}")
+    git(path, "checkout", "-q", "-b", "feature")
+    with open(os.path.join(path, "nuovo.txt"), "w") as f:
+        f.write("in staging\n")
+    git(path, "add", "nuovo.txt")
+
+
+def by_subprocess(path):
+    branch = git(path, "rev-parse", "--abbrev-ref", "HEAD").strip()
+    staged = "nuovo.txt" in git(path, "diff", "--cached", "--name-only").split()
+    found = "Commit 0" in git(path, "log", "--format=%s", "main").splitlines()
+    return branch, staged, found
+
+
+def by_inspector(inspector):
+    return (inspector.current_branch(), inspector.staged("nuovo.txt"),
+            inspector.history_contains("main", "Commit 0"))
+
+
+def measure(label, runs, call):
+    start = time.perf_counter()
+    for _ in range(runs):
+        result = call()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28}{elapsed / runs * 1e6:>12.1f}   {result}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifiche sul repository con e senza processi git")
+    parser.add_argument("--ripetizioni", type=int, default=200)
+    parser.add_argument("--commit", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as path:
+        build(path, args.commit)
+        print(f"{'':<28}{'µs/verifica':>12}   risposta")
+        measure("processi git", max(1, args.ripetizioni // 10), lambda: by_subprocess(path))
+        measure("Inspector, cache fredda", args.ripetizioni, lambda: by_inspector(Inspector(path)))
+        inspector = Inspector(path)
+        measure("Inspector, cache calda", args.ripetizioni, lambda: by_inspector(inspector))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Benchmark del confronto delle risposte (gitquest/matcher.py): il costo per
+risposta non deve crescere con il numero di varianti accettate.
+
+Uso: python3 benchmarks/bench_matcher.py [ripetizioni]
+"""
+
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from gitquest.matcher import CommandMatcher
+
+ANSWERS = ['git checkout -b feature', 'git  switch -c feature', "git commit -am 'fix'", 'git merge --no-ff feature-42']
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f"{'varianti':>10}{'compilazione (ms)':>20}{'confronto (µs)':>16}{'confronto lineare (µs)':>24}")
+    for size in (1, 10, 100, 1000):
+        patterns = ["git checkout -b feature", "git commit ** -m *"]
+        patterns += [f"git merge ** feature-{i} **" for i in range(size)]
+
+        start = time.perf_counter()
+        matcher = CommandMatcher(patterns)
+        compiled = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for answer in ANSWERS:
+                matcher.matches(answer)
+        per_answer = (time.perf_counter() - start) / (rounds * len(ANSWERS)) * 1e6
+
+        # Il vecchio modo: una sottostringa per ogni variante
+        substrings = [p.replace(" **", "").replace(" *", "") for p in patterns]
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for answer in ANSWERS:
+                any(s in answer for s in substrings)
+        linear = (time.perf_counter() - start) / (rounds * len(ANSWERS)) * 1e6
+        print(f"{len(patterns):>10}{compiled:>20.2f}{per_answer:>16.2f}{linear:>24.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark dell'output memorizzato dei comandi di sola lettura (gitquest/memo.py).
+
+Crea N sessioni dallo stesso modello di gitquest/snapshots.py, come tante
+partite arrivate allo stesso scenario, ed esegue in ognuna i comandi che gli
+scenari mostrano subito dopo la preparazione. Confronta, per comando:
+• GitWorker senza memoria (outputs=None): un processo git per sessione
+• GitWorker con la memoria condivisa: git gira nella prima sessione, le altre
+  calcolano solo l'impronta dello stato
+e controlla che i testi siano identici.
+
+Uso: python3 benchmarks/bench_memo.py [--sessioni N] [--modello nome]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from gitquest.executor import GitWorker
+from gitquest.levels import load_content
+from gitquest.memo import SHARED_OUTPUTS
+from gitquest.snapshots import SnapshotStore
+
+COMMANDS = ("git status", "git branch -v", "git log -3", "git show --stat")
+
+
+def run_all(workers, command):
+    start = time.perf_counter()
+    outputs = [worker.run(command) for worker in workers]
+    return (time.perf_counter() - start) / len(workers), outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Output memorizzato tra sessioni uguali")
+    parser.add_argument("--sessioni", type=int, default=50)
+    parser.add_argument("--modello", default="cherry_pick")
+    args = parser.parse_args()
+
+    base = tempfile.mkdtemp(prefix="bench-memo-")
+    try:
+        store = SnapshotStore(os.path.join(base, "modelli"), load_content().snapshots)
+        paths = []
+        for i in range(args.sessioni):
+            path = os.path.join(base, f"giocatore-{i}")
+            store.instantiate(args.modello, path)
+            paths.append(path)
+        print(f"{args.sessioni} sessioni dal modello {args.modello}\n")
+        print(f"{'':<20}{'senza (ms)':>12}{'con (ms)':>12}{'processi':>10}")
+        for command in COMMANDS:
+            plain, expected = run_all([GitWorker(path, outputs=None) for path in paths], command)
+            workers = [GitWorker(path) for path in paths]
+            memo, outputs = run_all(workers, command)
+            spawned = sum(worker.stats['exec'] for worker in workers)
+            print(f"{command:<20}{plain * 1000:>12.2f}{memo * 1000:>12.2f}{spawned:>10}")
+            if outputs != expected:
+                print("  ⚠️ output diverso da quello di git")
+        print(f"\nmemoria condivisa: {len(SHARED_OUTPUTS)} output, {SHARED_OUTPUTS.size / 1024:.1f} KB")
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
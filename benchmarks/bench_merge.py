@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark della fusione a tre vie in memoria (gitquest/merge.py) su file di
+migliaia di righe, confrontata con git merge-file (processo + file su disco).
+
+Per ogni dimensione controlla anche che il testo con i marcatori sia identico
+a quello prodotto da git.
+
+Uso: python3 benchmarks/bench_merge.py [ripetizioni]
+"""
+
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from gitquest.merge import check_resolution, merge3
+
+
+def make_sides(size, edits, seed=0):
+    """Base di `size` righe e due versioni con `edits` modifiche sparse ciascuna"""
+    rnd = random.Random(seed)
+    base = [f"riga {i}: {rnd.random():.6f}\n" for i in range(size)]
+    sides = []
+    for name in ("main", "feature"):
+        lines = list(base)
+        for position in sorted(rnd.sample(range(size), edits), reverse=True):
+            kind = rnd.random()
+            if kind < 0.5:
+                lines[position] = f"{name} cambia la riga {position}\n"
+            elif kind < 0.8:
+                lines[position:position] = [f"{name} aggiunge {position}.{k}\n" for k in range(3)]
+            else:
+                del lines[position]
+        sides.append(lines)
+    return "".join(base), "".join(sides[0]), "".join(sides[1])
+
+
+def git_merge_file(workdir, base, ours, theirs):
+    paths = []
+    for name, text in (("base", base), ("ours", ours), ("theirs", theirs)):
+        path = os.path.join(workdir, name)
+        with open(path, "w") as f:
+            f.write(text)
+        paths.append(path)
+    result = subprocess.run(["git", "merge-file", "-p", "-L", "HEAD", "-L", "base", "-L", "feature",
+                             paths[1], paths[0], paths[2]], capture_output=True, text=True)
+    return result.stdout
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    has_git = shutil.which("git") is not None
+    print(f"{'righe':>7}{'modifiche':>11}{'conflitti':>11}{'merge3 ms':>11}{'verifica ms':>13}"
+          f"{'git ms':>9}{'uguale a git':>14}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for size, edits in ((100, 5), (1000, 20), (5000, 50), (20000, 100)):
+            base, ours, theirs = make_sides(size, edits)
+
+            start = time.perf_counter()
+            for _ in range(rounds):
+                result = merge3(base, ours, theirs)
+            merge_ms = (time.perf_counter() - start) / rounds * 1000
+            text = result.render("HEAD", "feature")
+
+            resolved = result.resolve('both')
+            start = time.perf_counter()
+            for _ in range(rounds):
+                check_resolution(resolved, result)
+            check_ms = (time.perf_counter() - start) / rounds * 1000
+
+            git_ms, same = float("nan"), "-"
+            if has_git:
+                start = time.perf_counter()
+                for _ in range(rounds):
+                    expected = git_merge_file(workdir, base, ours, theirs)
+                git_ms = (time.perf_counter() - start) / rounds * 1000
+                same = "sì" if expected == text else "NO"
+            print(f"{size:>7}{edits:>11}{len(result.conflicts):>11}{merge_ms:>11.2f}{check_ms:>13.2f}"
+                  f"{git_ms:>9.2f}{same:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark della lettura degli oggetti senza git (gitquest/objects.py e gitquest/history.py).
+
+Su una storia sintetica impacchettata (gitquest/synthetic.py) confronta:
+• `git log --oneline -N` e `git reflog --oneline -10` eseguiti da git
+• le stesse schermate di history.show, con la cache degli oggetti vuota e piena
+• una seconda sessione sulla copia in hardlink dello stesso modello, che trova
+  gli oggetti già nella cache condivisa
+e controlla che il testo sia identico a quello di git.
+
+Uso: python3 benchmarks/bench_objects.py [--commit N] [--log N] [--ripetizioni N]
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from gitquest.history import show
+from gitquest.inspector import Inspector
+from gitquest.objects import SHARED_CACHE
+from gitquest.snapshots import TEMPLATE_ENV, SnapshotStore
+
+ENV = dict(os.environ, **TEMPLATE_ENV)
+
+
+def measure(label, runs, call):
+    start = time.perf_counter()
+    for _ in range(runs):
+        result = call()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<44}{elapsed / runs * 1000:>10.2f}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Schermate di git log e git reflog senza processi")
+    parser.add_argument("--commit", type=int, default=20_000)
+    parser.add_argument("--log", type=int, default=50, help="commit mostrati da git log")
+    parser.add_argument("--ripetizioni", type=int, default=50)
+    args = parser.parse_args()
+
+    base = tempfile.mkdtemp(prefix="bench-objects-")
+    try:
+        recipes = {'storia': {'steps': [('generate', {'commits': args.commit})]}}
+        store = SnapshotStore(os.path.join(base, "modelli"), recipes)
+        store.build('storia')
+        first = os.path.join(base, "giocatore-1")
+        second = os.path.join(base, "giocatore-2")
+        store.instantiate('storia', first)
+        store.instantiate('storia', second)
+        print(f"storia di {args.commit} commit, un pack condiviso in hardlink da due giocatori\n")
+        print(f"{'':<44}{'ms':>10}")
+
+        for command in (["log", "--oneline", f"-{args.log}"], ["reflog", "--oneline", "-10"]):
+            name = "git " + " ".join(command)
+            expected = measure(f"{name}: processo git", max(1, args.ripetizioni // 5),
+                               lambda: subprocess.run(["git", *command], cwd=first, env=ENV,
+                                                      capture_output=True, text=True).stdout)
+
+            def cold():
+                SHARED_CACHE.clear()
+                return show(Inspector(first), command, ENV)
+
+            inspector = Inspector(first)
+            results = [measure(f"{name}: cache vuota", args.ripetizioni, cold),
+                       measure(f"{name}: cache piena", args.ripetizioni, lambda: show(inspector, command, ENV)),
+                       measure(f"{name}: altro giocatore", args.ripetizioni,
+                               lambda: show(Inspector(second), command, ENV))]
+            if any(result != expected for result in results):
+                print("  ⚠️ output diverso da quello di git")
+        print(f"\ncache condivisa: {len(SHARED_CACHE)} oggetti, {SHARED_CACHE.size / 2**20:.1f} MB, "
+              f"{SHARED_CACHE.hits} hit / {SHARED_CACHE.misses} miss")
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
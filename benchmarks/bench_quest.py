@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Benchmark dell'intera partita, livello per livello, con un copione di risposte
+(gitquest/headless.py).
+
+Per ogni stato del gioco (level_1_basics, wrong_branch_scenario, ...) misura:
+• tempo reale
+• processi lanciati (evento di audit subprocess.Popen)
+• syscall di scrittura del processo Python (/proc/self/io, solo Linux)
+• file scritti nel repository (creati, modificati o cancellati, anche da git)
+• RSS del processo alla fine dello stato
+e in fondo le partite al secondo e i picchi di memoria (gioco e processi git).
+
+Modalità: cli (git reale, come il gioco da terminale), modelli (git reale con
+gli scenari istanziati da gitquest/snapshots.py), riserva (come modelli, ma
+attraverso WarmSnapshots di gitquest/warmpool.py, il default del server),
+pratica (git simulato in memoria).
+
+I repository stanno sotto --root (default: la stessa radice in RAM dei workspace
+del gioco, vedi gitquest/workspace.py); per misurare un altro filesystem, per
+esempio /mnt/c sotto WSL, basta indicarlo.
+
+Uso: python3 benchmarks/bench_quest.py [--rounds N] [--modes cli,modelli,riserva,pratica]
+                                       [--copione FILE] [--json FILE] [--root DIR]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from gitquest.headless import BufferedOutput, ScriptedInput, load_game_class, load_transcript
+from gitquest.levels import load_content
+from gitquest.snapshots import SnapshotStore
+from gitquest.warmpool import WarmSnapshots
+from gitquest.workspace import default_root
+
+DEFAULT_TRANSCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "copioni", "completo.txt")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+_active = None
+
+
+def _audit(event, args):
+    if _active is not None:
+        _active.audit(event, args)
+
+
+def read_proc_io():
+    """Syscall di scrittura fatte finora dal processo, se il sistema le espone"""
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("syscw:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def current_rss():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def scan(path):
+    """Stato dei file del repository (compreso .git) per contare quelli toccati"""
+    files = {}
+    if path is None or not os.path.isdir(path):
+        return files
+    for current, _, names in os.walk(path):
+        for name in names:
+            full = os.path.join(current, name)
+            try:
+                st = os.lstat(full)
+            except OSError:
+                continue
+            files[full] = (st.st_mtime_ns, st.st_size, st.st_ino)
+    return files
+
+
+class StateMeter:
+    """Raccoglie le misure tra un cambio di stato e il successivo (QuestEngine.on_state)"""
+
+    def __init__(self, repo_dir):
+        self.repo_dir = repo_dir
+        self.rows = {}
+        self.current = None
+        self.processes = 0
+        # Tempo speso a misurare (scansione dei file...), da togliere dal totale
+        self.overhead = 0.0
+
+    def audit(self, event, args):
+        if event == "subprocess.Popen":
+            self.processes += 1
+
+    def start(self):
+        self._files = scan(self.repo_dir)
+        self._begin()
+
+    def _begin(self):
+        self._processes = self.processes
+        self._syscw = read_proc_io()
+        self._time = time.perf_counter()
+
+    def __call__(self, state):
+        elapsed = time.perf_counter() - self._time
+        syscw = read_proc_io()
+        if self.current is not None:
+            files = scan(self.repo_dir)
+            touched = sum(1 for path, sig in files.items() if self._files.get(path) != sig)
+            touched += sum(1 for path in self._files if path not in files)
+            self._files = files
+            row = self.rows.setdefault(self.current, {'ms': 0.0, 'processi': 0, 'syscw': 0,
+                                                      'file': 0, 'rss': 0, 'volte': 0})
+            row['ms'] += elapsed * 1000
+            row['processi'] += self.processes - self._processes
+            if syscw is not None and self._syscw is not None:
+                row['syscw'] += syscw - self._syscw
+            row['file'] += touched
+            row['rss'] = max(row['rss'], current_rss())
+            row['volte'] += 1
+        self.current = state
+        self.overhead += time.perf_counter() - self._time - elapsed
+        self._begin()
+
+
+async def play_once(game_class, answers, mode, workdir, snapshots):
+    repo = os.path.join(workdir, "repo")
+    if mode != "pratica":
+        os.makedirs(repo)
+    out = BufferedOutput()
+    game = game_class(repo_dir=repo, reader=ScriptedInput(answers), out=out,
+                      snapshots=snapshots, practice=mode == "pratica")
+    meter = StateMeter(repo if mode != "pratica" else None)
+    game.engine.on_state = meter
+
+    global _active
+    _active = meter
+    meter.start()
+    start = time.perf_counter()
+    try:
+        await game.play()
+        finished = True
+    except EOFError:
+        finished = False
+    finally:
+        _active = None
+        game.git.close()
+    elapsed = time.perf_counter() - start - meter.overhead
+    if mode != "pratica":
+        shutil.rmtree(repo, ignore_errors=True)
+    return meter, elapsed, finished
+
+
+def isolated_git_env(workdir):
+    """Configurazione git neutra: stessi risultati su qualunque macchina"""
+    config = os.path.join(workdir, "gitconfig")
+    with open(config, "w") as f:
+        f.write("[init]\n\tdefaultBranch = main\n[user]\n\tname = Benchmark\n\temail = bench@example.com\n")
+    os.environ['GIT_CONFIG_GLOBAL'] = config
+    os.environ['GIT_CONFIG_NOSYSTEM'] = "1"
+
+
+def run_mode(game_class, answers, mode, rounds, workdir):
+    snapshots = None
+    if mode in ("modelli", "riserva"):
+        snapshots = SnapshotStore(os.path.join(workdir, "modelli"), load_content().snapshots)
+        if mode == "riserva":
+            # Una istanza pronta per modello: ogni partita ne trova una e la riserva si riempie
+            snapshots = WarmSnapshots(snapshots, workdir, demand=1)
+        snapshots.build_all()
+
+    totals = {}
+    elapsed = 0.0
+    try:
+        for _ in range(rounds):
+            meter, seconds, finished = asyncio.run(play_once(game_class, answers, mode, workdir, snapshots))
+            if not finished:
+                raise SystemExit(f"{mode}: il copione si è esaurito prima della fine della partita")
+            elapsed += seconds
+            for state, row in meter.rows.items():
+                total = totals.setdefault(state, dict.fromkeys(row, 0))
+                for key, value in row.items():
+                    total[key] = max(total[key], value) if key == 'rss' else total[key] + value
+    finally:
+        if hasattr(snapshots, 'close'):
+            snapshots.close()
+    for row in totals.values():
+        for key in ('ms', 'processi', 'syscw', 'file', 'volte'):
+            row[key] /= rounds
+    return {'stati': totals, 'partite_al_secondo': rounds / elapsed, 'ms_per_partita': elapsed / rounds * 1000}
+
+
+def print_report(mode, result):
+    print(f"\n=== {mode} ===")
+    print(f"{'stato':<34}{'ms':>9}{'processi':>10}{'syscall w':>11}{'file':>7}{'RSS MB':>9}")
+    totals = {'ms': 0, 'processi': 0, 'syscw': 0, 'file': 0}
+    for state, row in result['stati'].items():
+        print(f"{state:<34}{row['ms']:>9.2f}{row['processi']:>10.1f}{row['syscw']:>11.1f}"
+              f"{row['file']:>7.1f}{row['rss'] / 2**20:>9.1f}")
+        for key in totals:
+            totals[key] += row[key]
+    print(f"{'totale':<34}{totals['ms']:>9.2f}{totals['processi']:>10.1f}{totals['syscw']:>11.1f}"
+          f"{totals['file']:>7.1f}")
+    print(f"partite al secondo: {result['partite_al_secondo']:.1f}  ({result['ms_per_partita']:.1f} ms l'una)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dell'intera partita, stato per stato")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--modes", default="cli,modelli,riserva,pratica")
+    parser.add_argument("--copione", default=DEFAULT_TRANSCRIPT)
+    parser.add_argument("--json", metavar="FILE", help="salva i risultati per confrontarli nel tempo")
+    parser.add_argument("--root", help="filesystem su cui creare i repository (default: RAM se disponibile)")
+    args = parser.parse_args()
+
+    if shutil.which("git") is None and args.modes != "pratica":
+        raise SystemExit("git non trovato: usa --modes pratica")
+    sys.addaudithook(_audit)
+    game_class = load_game_class()
+    answers = load_transcript(args.copione)
+    results = {}
+    root = args.root or default_root()
+    print(f"Repository in {root}")
+    with tempfile.TemporaryDirectory(dir=root) as workdir:
+        isolated_git_env(workdir)
+        for mode in args.modes.split(","):
+            results[mode] = run_mode(game_class, answers, mode, args.rounds, workdir)
+            print_report(mode, results[mode])
+
+    peak_self = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    peak_children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    print(f"\nPicco RSS: gioco {peak_self:.1f} MB, processo git più grande {peak_children:.1f} MB")
+    if args.json:
+        results['picco_rss_mb'] = {'gioco': peak_self, 'git': peak_children}
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
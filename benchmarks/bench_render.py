@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark dell'output (gitquest/render.py): quante write arrivano all'output
+per ogni stato del gioco, giocando il copione in modalità pratica.
+
+Con il renderer ci si aspetta una write per schermata, cioè una per ogni
+risposta chiesta al giocatore più quella finale.
+
+Uso: python3 benchmarks/bench_render.py [--copione FILE] [--colori]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from gitquest.headless import BufferedOutput, ScriptedInput, load_game_class, load_transcript
+
+DEFAULT_TRANSCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "copioni", "completo.txt")
+
+
+class CountingOutput(BufferedOutput):
+    """Conta le write e i byte, come farebbe un socket"""
+
+    def __init__(self, color):
+        super().__init__()
+        self.color = color
+        self.writes = 0
+        self.bytes = 0
+
+    def isatty(self):
+        return self.color
+
+    def write(self, text):
+        self.writes += 1
+        self.bytes += len(text.encode("utf-8"))
+        return super().write(text)
+
+
+class WriteMeter:
+    def __init__(self, out, reader):
+        self.out = out
+        self.reader = reader
+        self.rows = {}
+        self.current = None
+        self._mark()
+
+    def _mark(self):
+        self._writes, self._bytes, self._answers = self.out.writes, self.out.bytes, len(self.reader.answers)
+
+    def __call__(self, state):
+        if self.current is not None:
+            row = self.rows.setdefault(self.current, [0, 0, 0])
+            row[0] += self.out.writes - self._writes
+            row[1] += self.out.bytes - self._bytes
+            row[2] += self._answers - len(self.reader.answers)
+        self.current = state
+        self._mark()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write per stato del gioco")
+    parser.add_argument("--copione", default=DEFAULT_TRANSCRIPT)
+    parser.add_argument("--colori", action="store_true", help="simula un terminale (codici ANSI attivi)")
+    args = parser.parse_args()
+
+    game_class = load_game_class()
+    out = CountingOutput(args.colori)
+    reader = ScriptedInput(load_transcript(args.copione))
+    game = game_class(repo_dir="/pratica", reader=reader, out=out, practice=True)
+    meter = WriteMeter(out, reader)
+    game.engine.on_state = meter
+
+    start = time.perf_counter()
+    try:
+        asyncio.run(game.play())
+    except EOFError:
+        raise SystemExit("il copione si è esaurito prima della fine della partita")
+    elapsed = time.perf_counter() - start
+
+    print(f"{'stato':<34}{'write':>7}{'risposte':>10}{'byte':>9}")
+    for state, (writes, size, answers) in meter.rows.items():
+        print(f"{state:<34}{writes:>7}{answers:>10}{size:>9}")
+    print(f"{'totale':<34}{out.writes:>7}{sum(r[2] for r in meter.rows.values()):>10}{out.bytes:>9}")
+    print(f"partita: {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark della latenza per comando di run_command.
+
+Confronta il vecchio percorso (subprocess.run con shell=True) con GitWorker
+ripetendo il setup di cherry_pick_scenario in un repository temporaneo. La
+terza colonna esegue gli stessi comandi come se li avesse scritti il giocatore:
+validati da una Policy ed eseguiti con i limiti di gitquest/sandbox.py.
+
+Uso: python3 benchmarks/bench_run_command.py [ripetizioni]
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from gitquest.executor import GitWorker
+from gitquest.sandbox import DEFAULT_LIMITS, DEFAULT_POLICY
+
+
+def legacy_run(cwd):
+    def run(command, capture_output=True):
+        result = subprocess.run(command, shell=True, capture_output=True, text=True, cwd=cwd)
+        return result.returncode == 0, result.stdout, result.stderr
+    return run
+
+
+def sandboxed_run(worker):
+    def run(command, capture_output=True):
+        return worker.run(DEFAULT_POLICY.check(command), True, DEFAULT_LIMITS)
+    return run
+
+
+def cherry_pick_setup(cwd, round_no):
+    """Gli stessi comandi di cherry_pick_scenario, con nomi unici per ogni giro"""
+    branch = f"experimental-{round_no}"
+    commands = [f"git checkout -b {branch}"]
+    for i in range(3):
+        name = f"feature_{round_no}_{i}.txt"
+        commands.append(("write", name, f"Feature numero {i}"))
+        commands.append(f"git add {name}")
+        commands.append(f'git commit -m "Aggiunta feature {i}"')
+    commands.append("git checkout main")
+    commands.append(f"git branch backup-{round_no}")
+    commands.append(f"git log --oneline {branch} -3")
+    return commands
+
+
+def measure(run, cwd, rounds, offset):
+    timings = defaultdict(list)
+    for r in range(rounds):
+        for command in cherry_pick_setup(cwd, offset + r):
+            if isinstance(command, tuple):
+                with open(os.path.join(cwd, command[1]), "w") as f:
+                    f.write(command[2])
+                continue
+            key = " ".join(command.split()[:2])
+            start = time.perf_counter()
+            success, _, error = run(command)
+            timings[key].append(time.perf_counter() - start)
+            if not success:
+                raise RuntimeError(f"{command}: {error}")
+    return timings
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    with tempfile.TemporaryDirectory() as cwd:
+        for command in ("git init -q -b main", "git config user.name Bench",
+                        "git config user.email bench@example.com",
+                        "git commit -q --allow-empty -m init"):
+            subprocess.run(command, shell=True, cwd=cwd, check=True)
+
+        before = measure(legacy_run(cwd), cwd, rounds, 0)
+        worker = GitWorker(cwd)
+        after = measure(worker.run, cwd, rounds, rounds)
+        sandboxed = measure(sandboxed_run(worker), cwd, rounds, 2 * rounds)
+        worker.close()
+
+    print(f"{'comando':<16}{'shell=True (ms)':>18}{'GitWorker (ms)':>18}{'speedup':>10}{'sandbox (ms)':>16}")
+    total_before = total_after = total_sandboxed = 0.0
+    for key in before:
+        b = sum(before[key]) / len(before[key]) * 1000
+        a = sum(after[key]) / len(after[key]) * 1000
+        s = sum(sandboxed[key]) / len(sandboxed[key]) * 1000
+        total_before += sum(before[key])
+        total_after += sum(after[key])
+        total_sandboxed += sum(sandboxed[key])
+        print(f"{key:<16}{b:>18.3f}{a:>18.3f}{b / a:>9.1f}x{s:>16.3f}")
+    print(f"{'totale':<16}{total_before * 1000:>18.1f}{total_after * 1000:>18.1f}"
+          f"{total_before / total_after:>9.1f}x{total_sandboxed * 1000:>16.1f}")
+    print(f"Statistiche GitWorker: {worker.stats}")
+
+
+if __name__ == "__main__":
+    main()
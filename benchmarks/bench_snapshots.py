@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark dell'ingresso negli scenari: ricostruzione con comandi git contro
+istanza di un modello (gitquest/snapshots.py).
+
+Uso: python3 benchmarks/bench_snapshots.py [ripetizioni]
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from gitquest.levels import load_content
+from gitquest.snapshots import TEMPLATE_ENV, SnapshotStore, clear_directory
+
+
+def replay(recipes, name, dest):
+    """Il vecchio modo: rieseguire ogni passo della ricetta (e delle sue basi)"""
+    recipe = recipes[name]
+    if recipe.get('base'):
+        replay(recipes, recipe['base'], dest)
+    else:
+        clear_directory(dest)
+        subprocess.run("git init -q -b main", shell=True, cwd=dest, check=True)
+    env = dict(os.environ, **TEMPLATE_ENV)
+    for step in recipe['steps']:
+        if step[0] == 'write':
+            with open(os.path.join(dest, step[1]), "w") as f:
+                f.write(step[2])
+        else:
+            subprocess.run(step[1], shell=True, cwd=dest, env=env, capture_output=True,
+                           check=step[0] == 'run')
+
+
+def private_bytes(path):
+    """Spazio occupato dai soli file non condivisi con il modello"""
+    total = 0
+    for current, _, files in os.walk(path):
+        for filename in files:
+            st = os.lstat(os.path.join(current, filename))
+            if st.st_nlink == 1:
+                total += st.st_size
+    return total
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    recipes = load_content().snapshots
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SnapshotStore(os.path.join(tmp, "modelli"), recipes)
+        start = time.perf_counter()
+        store.build_all()
+        print(f"Costruzione di tutti i modelli (una tantum): {(time.perf_counter() - start) * 1000:.1f} ms\n")
+
+        dest = os.path.join(tmp, "giocatore")
+        print(f"{'scenario':<20}{'replay (ms)':>14}{'modello (ms)':>14}{'byte privati':>14}")
+        for name in recipes:
+            start = time.perf_counter()
+            for _ in range(rounds):
+                replay(recipes, name, dest)
+            before = (time.perf_counter() - start) / rounds * 1000
+
+            start = time.perf_counter()
+            for _ in range(rounds):
+                store.instantiate(name, dest)
+            after = (time.perf_counter() - start) / rounds * 1000
+            print(f"{name:<20}{before:>14.2f}{after:>14.2f}{private_bytes(dest):>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark dell'avvio del gioco: quanto passa dal lancio di git-master-quest.py
+alla comparsa del banner, e quali import pesano di più (python -X importtime).
+
+Ogni lancio è un processo nuovo, come quando uno studente apre il gioco; il
+tempo di un interprete vuoto (python -c pass) è misurato a parte e sottratto.
+Con --freddo prima di ogni lancio si cancellano la cache dei contenuti compilati
+e quella della verifica di git, come al primo avvio in un container nuovo.
+
+Obiettivo: meno di 50 ms oltre all'interprete, anche a freddo.
+
+Uso: python3 benchmarks/bench_startup.py [--lanci N] [--pratica] [--freddo] [--import N]
+"""
+
+import argparse
+import glob
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from gitquest.executor import PROBE_CACHE
+from gitquest.levels import DATA_DIR
+
+SCRIPT = os.path.join(ROOT, "git-master-quest.py")
+BANNER = "GIT MASTER QUEST".encode("utf-8")
+TARGET_MS = 50
+
+
+def clear_caches():
+    for path in glob.glob(os.path.join(DATA_DIR, "__pycache__", "*.pickle")) + [PROBE_CACHE]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def time_to_banner(argv, env):
+    """Secondi dal lancio alla prima riga del banner sullo stdout"""
+    start = time.perf_counter()
+    proc = subprocess.Popen(argv, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL, env=env)
+    seen = b""
+    try:
+        while BANNER not in seen:
+            chunk = os.read(proc.stdout.fileno(), 65536)
+            if not chunk:
+                raise SystemExit("il gioco è terminato prima di mostrare il banner")
+            seen += chunk
+        return time.perf_counter() - start
+    finally:
+        proc.kill()
+        proc.wait()
+        proc.stdin.close()
+        proc.stdout.close()
+
+
+def time_interpreter(env):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], env=env)
+    return time.perf_counter() - start
+
+
+def import_times(argv, env, top):
+    """I moduli importati direttamente più costosi (tempo cumulativo in ms)"""
+    proc = subprocess.Popen([sys.executable, "-X", "importtime"] + argv[1:], stdin=subprocess.PIPE,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, env=env)
+    _, err = proc.communicate(b"", timeout=30)
+    rows = []
+    for line in err.decode("utf-8", "replace").splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Solo gli import di primo livello (un solo spazio prima del nome)
+        if name.startswith(" ") and not name.startswith("  "):
+            rows.append((int(cumulative) / 1000, name.strip()))
+    rows.sort(reverse=True)
+    return sum(ms for ms, _ in rows), rows[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo di avvio del gioco")
+    parser.add_argument("--lanci", type=int, default=20)
+    parser.add_argument("--pratica", action="store_true", help="modalità pratica (senza git)")
+    parser.add_argument("--freddo", action="store_true", help="cancella le cache prima di ogni lancio")
+    parser.add_argument("--import", dest="top", type=int, default=12, help="quanti import mostrare")
+    args = parser.parse_args()
+
+    argv = [sys.executable, SCRIPT] + (["--pratica"] if args.pratica else [])
+    with tempfile.TemporaryDirectory() as root:
+        env = dict(os.environ, GITQUEST_ROOT=root)
+        # Il primo lancio compila i .pyc del gioco: non lo contiamo
+        time_to_banner(argv, env)
+        interpreter, game = [], []
+        for _ in range(args.lanci):
+            if args.freddo:
+                clear_caches()
+            interpreter.append(time_interpreter(env))
+            game.append(time_to_banner(argv, env))
+        if args.freddo:
+            clear_caches()
+        imports, top = import_times(argv, env, args.top)
+
+    base = statistics.median(interpreter) * 1000
+    total = statistics.median(game) * 1000
+    print(f"{'modulo':<34}{'ms':>8}")
+    for ms, name in top:
+        print(f"{name:<34}{ms:>8.1f}")
+    print(f"{'import totali':<34}{imports:>8.1f}")
+    print()
+    print(f"interprete vuoto:      {base:7.1f} ms (mediana di {args.lanci})")
+    print(f"fino al banner:        {total:7.1f} ms (peggiore {max(game) * 1000:.1f} ms)")
+    print(f"costo del gioco:       {total - base:7.1f} ms (obiettivo < {TARGET_MS} ms: "
+          f"{'ok' if total - base < TARGET_MS else 'NO'})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark del generatore di storie sintetiche (gitquest/synthetic.py).
+
+Misura:
+• quanto costa creare un commit alla maniera delle ricette degli scenari
+  (git add + git commit, due processi per commit), su pochi commit
+• generate() con un solo flusso di git fast-import, per storie di varie
+  lunghezze: tempo, commit al secondo, dimensione del pack
+• quanto costa poi dare a ogni giocatore la sua copia: SnapshotStore.instantiate
+  del modello (hardlink del pack) contro rigenerare la storia
+
+Uso: python3 benchmarks/bench_synthetic.py [--commit N ...] [--a-mano N] [--istanze N]
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from gitquest.snapshots import TEMPLATE_ENV, SnapshotStore
+from gitquest.synthetic import generate
+
+ENV = dict(os.environ, **TEMPLATE_ENV)
+
+
+def init(path):
+    subprocess.run(["git", "init", "-q", "-b", "main", path], check=True, env=ENV)
+
+
+def pack_size(path):
+    pack = os.path.join(path, ".git", "objects", "pack")
+    return sum(os.path.getsize(os.path.join(pack, name)) for name in os.listdir(pack))
+
+
+def by_hand(path, commits):
+    """Un commit alla volta, come i passi ('run', 'git commit ...') delle ricette"""
+    init(path)
+    for i in range(commits):
+        with open(os.path.join(path, "file.txt"), "w") as f:
+            f.write(f"versione {i}\n")
+        subprocess.run(["git", "add", "file.txt"], cwd=path, check=True, env=ENV)
+        subprocess.run(["git", "commit", "-q", "-m", f"Commit {i}"], cwd=path, check=True, env=ENV)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generazione di storie lunghe")
+    parser.add_argument("--commit", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--a-mano", type=int, default=200, help="commit creati con git add/commit")
+    parser.add_argument("--istanze", type=int, default=20, help="copie del modello per i giocatori")
+    args = parser.parse_args()
+
+    base = tempfile.mkdtemp(prefix="bench-synthetic-")
+    try:
+        path = os.path.join(base, "a-mano")
+        start = time.perf_counter()
+        by_hand(path, args.a_mano)
+        elapsed = time.perf_counter() - start
+        print(f"git add + git commit: {args.a_mano} commit in {elapsed:.2f} s "
+              f"({args.a_mano / elapsed:.0f} commit/s)\n")
+
+        print(f"{'commit':>10}{'secondi':>10}{'commit/s':>12}{'pack MB':>10}")
+        for commits in args.commit:
+            path = os.path.join(base, f"storia-{commits}")
+            init(path)
+            start = time.perf_counter()
+            total = generate(path, commits=commits, env=ENV)
+            elapsed = time.perf_counter() - start
+            print(f"{total:>10}{elapsed:>10.2f}{total / elapsed:>12.0f}{pack_size(path) / 2**20:>10.1f}")
+
+        # Il modello si costruisce una volta; poi ogni giocatore ne riceve una copia
+        recipes = {'storia': {'steps': [('generate', {'commits': args.commit[0]})]}}
+        store = SnapshotStore(os.path.join(base, "modelli"), recipes)
+        start = time.perf_counter()
+        store.build('storia')
+        print(f"\nmodello di {args.commit[0]} commit costruito in {time.perf_counter() - start:.2f} s")
+        start = time.perf_counter()
+        for i in range(args.istanze):
+            store.instantiate('storia', os.path.join(base, f"giocatore-{i}"))
+        elapsed = time.perf_counter() - start
+        print(f"instantiate: {elapsed / args.istanze * 1000:.1f} ms per giocatore ({args.istanze} copie)")
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark dell'inizio lezione: N giocatori entrano insieme negli scenari
+conflict_branches e cherry_pick, con i comandi distribuiti sui thread git del
+server come in gitquest/server.py.
+
+Confronta SnapshotStore (istanza creata al momento) con WarmSnapshots (riserva
+preparata da un pool di processi, gitquest/warmpool.py) e mostra quanto aspetta
+ogni giocatore per avere il suo repository.
+
+Uso: python3 benchmarks/bench_warmpool.py [--giocatori N] [--thread N] [--root DIR]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from gitquest.levels import load_content
+from gitquest.snapshots import SnapshotStore
+from gitquest.warmpool import DEFAULT_NAMES, WarmSnapshots
+from gitquest.workspace import WorkspaceManager, default_root
+
+
+def wait_until_full(warm, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if all(len(warm.ready[name]) >= warm.demand for name in warm.names):
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def classroom(snapshots, workspaces, players, threads):
+    """Ogni giocatore istanzia gli scenari uno dopo l'altro; restituisce (attese, secondi)"""
+    sessions = [workspaces.create() for _ in range(players)]
+    waits = []
+
+    def play(workspace):
+        for name in DEFAULT_NAMES:
+            start = time.perf_counter()
+            snapshots.instantiate(name, workspace.path)
+            waits.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(play, sessions))
+    elapsed = time.perf_counter() - start
+    for workspace in sessions:
+        if not os.path.isdir(os.path.join(workspace.path, ".git")):
+            raise SystemExit(f"repository mancante in {workspace.path}")
+        workspace.release()
+    return waits, elapsed
+
+
+def report(label, waits, elapsed):
+    waits = sorted(w * 1000 for w in waits)
+    p95 = waits[int(len(waits) * 0.95) - 1]
+    print(f"{label:<22}{statistics.median(waits):>9.2f}{p95:>9.2f}{waits[-1]:>9.2f}{elapsed * 1000:>11.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scenari per una classe intera")
+    parser.add_argument("--giocatori", type=int, default=100)
+    parser.add_argument("--thread", type=int, default=(os.cpu_count() or 1) * 2,
+                        help="thread git del server (default: 2 x CPU)")
+    parser.add_argument("--root", default=default_root())
+    args = parser.parse_args()
+
+    recipes = load_content().snapshots
+    base = tempfile.mkdtemp(prefix="bench-warmpool-", dir=args.root)
+    workspaces = WorkspaceManager(base, quota=None)
+    try:
+        store = SnapshotStore(os.path.join(base, "modelli"), recipes)
+        store.build_all()
+        print(f"{'':<22}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}{'totale ms':>11}")
+        report("al momento", *classroom(store, workspaces, args.giocatori, args.thread))
+
+        warm = WarmSnapshots(SnapshotStore(os.path.join(base, "modelli"), recipes), base,
+                             demand=args.giocatori)
+        try:
+            start = time.perf_counter()
+            warm.build_all()
+            full = wait_until_full(warm)
+            print(f"(riserva di {args.giocatori} x {len(warm.names)} pronta in "
+                  f"{(time.perf_counter() - start) * 1000:.0f} ms con {warm.workers} processi"
+                  f"{'' if full else ', incompleta'})")
+            report("dalla riserva", *classroom(warm, workspaces, args.giocatori, args.thread))
+            stats = warm.stats()
+            print(f"consegne dalla riserva: {stats['hits']}, al momento: {stats['misses']}, "
+                  f"errori: {stats['failures']}")
+        finally:
+            warm.close()
+    finally:
+        workspaces.close()
+        shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
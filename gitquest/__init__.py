@@ -0,0 +1,4 @@
+"""
+🎮 GIT MASTER QUEST - Moduli di supporto
+Componenti usati da git-master-quest.py per eseguire git e gestire le sessioni di gioco
+"""
@@ -0,0 +1,310 @@
+"""
+Statistiche sulle risposte dei giocatori.
+
+Il gioco registrava solo `score += N`: quale opzione era stata scelta in un quiz
+o in uno scenario andava persa. Con un AnswerLog ogni risposta valutata da un
+livello (gitquest/levels.py, passi ask/match con dei casi) diventa un evento:
+    sessione, domanda, risposta, tempo per rispondere (ms), punti, esito
+dove l'esito è 1 se la risposta corrisponde a uno dei casi previsti e 0 se
+finisce in "otherwise" (risposta sbagliata o non valida).
+
+Il percorso interattivo si limita ad accodare l'evento in memoria. Un thread
+scrive gli eventi a blocchi in un log append-only (risposte.log):
+    "GQAL1\\n" | blocchi: lunghezza (u32) | crc32 (u32) | JSON compresso con zlib
+Ogni blocco è colonnare (una lista per campo, stringhe in un dizionario comune),
+quindi piccolo anche con migliaia di eventi. Quando il log cresce viene
+compattato in un database SQLite (risposte.sqlite) su cui girano le query
+aggregate: tasso di errore per domanda e percentili del tempo di risposta.
+
+La compattazione sposta il log in un file .compatta e ne registra il nome nella
+stessa transazione degli eventi: se il processo muore a metà, al giro dopo il
+file viene reinserito oppure solo cancellato, mai contato due volte.
+
+Un errore del thread (disco pieno, database bloccato) viene scritto nel log del
+processo e il thread continua: gli eventi che non si sono potuti scrivere sono
+persi e contati in AnswerLog.dropped, la coda non cresce all'infinito.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+_log = logging.getLogger(__name__)
+
+MAGIC = b"GQAL1\n"
+_BLOCK = struct.Struct("<II")
+
+# Eventi in coda oltre i quali il thread scrive subito, e attesa massima tra due scritture
+FLUSH_EVENTS = 512
+FLUSH_INTERVAL = 1.0
+
+# Dimensione del log oltre la quale si compatta nel database
+COMPACT_BYTES = 1 << 20
+
+# Le risposte sono testo libero: oltre questa lunghezza vengono troncate
+MAX_ANSWER = 200
+
+COLUMNS = ('time', 'session', 'question', 'answer', 'latency_ms', 'points', 'ok')
+_STRINGS = ('session', 'question', 'answer')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    time INTEGER, session TEXT, question TEXT, answer TEXT,
+    latency_ms INTEGER, points INTEGER, ok INTEGER);
+CREATE INDEX IF NOT EXISTS answers_question ON answers (question, latency_ms);
+CREATE TABLE IF NOT EXISTS compacted (name TEXT PRIMARY KEY);
+"""
+
+
+def encode_block(events):
+    """Eventi (tuple nell'ordine di COLUMNS) -> un blocco del log"""
+    strings, index = [], {}
+    columns = {name: [] for name in COLUMNS}
+    for event in events:
+        for name, value in zip(COLUMNS, event):
+            if name in _STRINGS:
+                ref = index.get(value)
+                if ref is None:
+                    ref = index[value] = len(strings)
+                    strings.append(value)
+                value = ref
+            columns[name].append(value)
+    columns['strings'] = strings
+    payload = zlib.compress(json.dumps(columns, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), 6)
+    return _BLOCK.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def read_events(path):
+    """Eventi di un log; un blocco finale troncato o corrotto (crash in scrittura) viene ignorato"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        return
+    offset = len(MAGIC)
+    while offset + _BLOCK.size <= len(data):
+        size, crc = _BLOCK.unpack_from(data, offset)
+        payload = data[offset + _BLOCK.size:offset + _BLOCK.size + size]
+        if len(payload) < size or zlib.crc32(payload) != crc:
+            return
+        offset += _BLOCK.size + size
+        columns = json.loads(zlib.decompress(payload))
+        strings = columns['strings']
+        for name in _STRINGS:
+            columns[name] = [strings[i] for i in columns[name]]
+        yield from zip(*(columns[name] for name in COLUMNS))
+
+
+class SessionLog:
+    """Le risposte di una partita; points sono i punti già attribuiti a una risposta"""
+
+    __slots__ = ('log', 'session', 'points')
+
+    def __init__(self, log, session):
+        self.log = log
+        self.session = session
+        self.points = 0
+
+    def record(self, question, answer, latency, points, ok):
+        self.points += points
+        self.log.record((int(time.time() * 1000), self.session, question, answer[:MAX_ANSWER],
+                         None if latency is None else int(latency * 1000), points, 1 if ok else 0))
+
+
+class AnswerLog:
+    """Raccoglie gli eventi di tutte le sessioni e li scrive a blocchi da un thread"""
+
+    def __init__(self, directory, flush_interval=FLUSH_INTERVAL, compact_bytes=COMPACT_BYTES):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.log_path = os.path.join(directory, "risposte.log")
+        self.db_path = os.path.join(directory, "risposte.sqlite")
+        self.flush_interval = flush_interval
+        self.compact_bytes = compact_bytes
+        self.recorded = 0
+        # Eventi persi perché la scrittura nel log è fallita
+        self.dropped = 0
+        self._pending = deque()
+        self._wake = threading.Event()
+        self._stop = False
+        self._thread = threading.Thread(target=self._writer, name="risposte", daemon=True)
+        self._thread.start()
+
+    def session(self):
+        """Registro per una nuova partita, con un identificativo casuale"""
+        return SessionLog(self, os.urandom(6).hex())
+
+    def record(self, event):
+        """Accoda un evento; non tocca il disco"""
+        self._pending.append(event)
+        if len(self._pending) >= FLUSH_EVENTS:
+            self._wake.set()
+
+    def flush(self):
+        """Scrive nel log gli eventi in coda (normalmente lo fa il thread)"""
+        events = []
+        try:
+            while True:
+                events.append(self._pending.popleft())
+        except IndexError:
+            pass
+        if not events:
+            return
+        try:
+            block = encode_block(events)
+            with self._locked():
+                with open(self.log_path, "ab") as f:
+                    if f.tell() == 0:
+                        block = MAGIC + block
+                    f.write(block)
+        except Exception:
+            self.dropped += len(events)
+            raise
+        self.recorded += len(events)
+
+    def compact(self):
+        """Sposta nel database il log e gli eventuali residui di compattazioni interrotte"""
+        # Sotto lock per tutto il tempo: gli altri processi aspettano solo per le loro scritture
+        with self._locked():
+            if os.path.exists(self.log_path):
+                os.replace(self.log_path, os.path.join(self.directory, f"risposte.{time.time_ns()}.compatta"))
+            names = sorted(name for name in os.listdir(self.directory) if name.endswith(".compatta"))
+            if not names:
+                return 0
+            moved = 0
+            with self._connect() as db:
+                for name in names:
+                    path = os.path.join(self.directory, name)
+                    if db.execute("SELECT 1 FROM compacted WHERE name = ?", (name,)).fetchone() is None:
+                        rows = list(read_events(path))
+                        with db:
+                            db.executemany("INSERT INTO answers VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                            db.execute("INSERT INTO compacted VALUES (?)", (name,))
+                        moved += len(rows)
+                    os.remove(path)
+            return moved
+
+    def close(self):
+        """Ferma il thread, scrive gli ultimi eventi e compatta"""
+        self._stop = True
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+        self.compact()
+
+    def _writer(self):
+        failing = False
+        while not self._stop:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            recorded = self.recorded
+            try:
+                self.flush()
+                if os.path.exists(self.log_path) and os.path.getsize(self.log_path) >= self.compact_bytes:
+                    self.compact()
+                failing = failing and self.recorded == recorded
+            except Exception:
+                # Il thread non deve morire: la coda resterebbe senza nessuno che la svuota.
+                # Un errore che si ripete a ogni giro si scrive una volta sola
+                if not failing:
+                    _log.exception("statistiche delle risposte: scrittura in %s fallita", self.directory)
+                failing = True
+
+    def _connect(self):
+        db = sqlite3.connect(self.db_path)
+        db.executescript(_SCHEMA)
+        return _Closing(db)
+
+    def _locked(self):
+        return _FileLock(os.path.join(self.directory, "risposte.lock"))
+
+
+class _Closing:
+    """Connessione SQLite chiusa all'uscita dal with (sqlite3 da solo fa solo commit)"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        return self.db
+
+    def __exit__(self, *exc):
+        self.db.close()
+
+
+class _FileLock:
+    """Lock tra processi che scrivono nella stessa directory (nessuno se manca fcntl)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def __enter__(self):
+        if fcntl is not None:
+            self.file = open(self.path, "a")
+            fcntl.flock(self.file, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+# --- Query -----------------------------------------------------------------------
+
+def question_stats(db_path, percentiles=(0.5, 0.9)):
+    """Per domanda: risposte, errori, tasso di errore, punti medi e percentili dei tempi (ms)"""
+    db = sqlite3.connect(db_path)
+    try:
+        db.executescript(_SCHEMA)
+        rows = db.execute("SELECT question, COUNT(*), SUM(ok = 0), AVG(points), COUNT(latency_ms) "
+                          "FROM answers GROUP BY question ORDER BY question").fetchall()
+        stats = []
+        for question, count, errors, points, timed in rows:
+            # Percentile nearest-rank letto dall'indice (question, latency_ms), senza ordinare
+            times = {}
+            for p in percentiles:
+                if timed:
+                    offset = max(0, min(timed - 1, int(p * timed + 0.5) - 1))
+                    times[p] = db.execute("SELECT latency_ms FROM answers WHERE question = ? AND latency_ms "
+                                          "IS NOT NULL ORDER BY latency_ms LIMIT 1 OFFSET ?",
+                                          (question, offset)).fetchone()[0]
+                else:
+                    times[p] = None
+            stats.append({'question': question, 'answers': count, 'errors': errors,
+                          'error_rate': errors / count, 'points': points, 'latency_ms': times})
+        return stats
+    finally:
+        db.close()
+
+
+def answer_counts(db_path, question, limit=10):
+    """Le risposte più frequenti a una domanda: [(risposta, esito, quante)]"""
+    db = sqlite3.connect(db_path)
+    try:
+        db.executescript(_SCHEMA)
+        return db.execute("SELECT answer, ok, COUNT(*) FROM answers WHERE question = ? "
+                          "GROUP BY answer, ok ORDER BY 3 DESC LIMIT ?", (question, limit)).fetchall()
+    finally:
+        db.close()
+
+
+def format_report(stats):
+    """Tabella leggibile di question_stats"""
+    lines = [f"{'domanda':<40}{'risposte':>9}{'errori':>8}{'% errori':>9}{'punti':>7}"
+             f"{'p50 ms':>9}{'p90 ms':>9}"]
+    for s in stats:
+        p50, p90 = s['latency_ms'].get(0.5), s['latency_ms'].get(0.9)
+        lines.append(f"{s['question']:<40}{s['answers']:>9}{s['errors']:>8}{s['error_rate'] * 100:>8.1f}%"
+                     f"{s['points']:>7.1f}{'-' if p50 is None else p50:>9}{'-' if p90 is None else p90:>9}")
+    return "\n".join(lines) + "\n"
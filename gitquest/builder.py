@@ -0,0 +1,483 @@
+"""
+Più commit in una volta sola per preparare gli scenari.
+
+La preparazione di uno scenario era una fila di passi write / git add / git
+commit (e git checkout tra un branch e l'altro): due processi e una riscrittura
+dell'index per ogni commit. Una lista dichiarativa di commit
+    {'commits': ({'message': "Aggiunta feature 0", 'files': (("feature_0.txt", "..."),),
+                  'new_branch': "experimental"}, ...),
+     'checkout': "main"}
+('new_branch' crea il branch da HEAD e ci passa, 'branch' passa a un branch
+esistente, 'checkout' è il branch su cui finire) viene invece scritta da
+apply() direttamente in .git, come una transazione:
+• blob, tree e commit come oggetti sciolti, con gli stessi hash di git
+• i lock di index, branch e HEAD presi tutti prima di scrivere qualcosa
+• il working tree cambia solo nei file che differiscono tra il commit di
+  partenza e quello di arrivo, e l'index si riscrive una volta sola
+• ogni branch si aggiorna una volta, con le stesse righe di reflog di git
+  ("commit: ...", "branch: Created from HEAD", "checkout: moving from ...")
+L'unico processo è git var, per l'identità di autore e committer (una volta
+per sessione in GitWorker.commit_batch).
+
+Quando il risultato potrebbe non essere quello dei comandi (file modificati
+o non tracciati che git checkout si rifiuterebbe di toccare, staging non
+vuoto, merge in corso, hook, filtri e configurazioni particolari, branch già
+esistenti...) apply() restituisce None senza toccare nulla, e si eseguono i
+passi equivalenti di commands(): il risultato e gli errori sono quelli di git.
+"""
+
+import hashlib
+import os
+import re
+import stat
+import struct
+import tempfile
+import zlib
+
+ZERO_OID = "0" * 40
+
+# Variabili d'ambiente con cui git scriverebbe altrove o con altri messaggi
+_UNSAFE_ENV = ("GIT_DIR", "GIT_WORK_TREE", "GIT_INDEX_FILE", "GIT_OBJECT_DIRECTORY", "GIT_COMMON_DIR",
+               "GIT_CONFIG", "GIT_CONFIG_PARAMETERS", "GIT_NAMESPACE", "GIT_REFLOG_ACTION")
+
+# Sezioni di configurazione che cambiano oggetti, index o hook di un commit
+_UNSAFE_SECTIONS = frozenset({'commit', 'filter', 'include', 'includeif', 'index', 'gpg', 'i18n', 'extensions',
+                              'feature', 'trailer'})
+
+# Chiavi di [core] ammesse, con i valori ammessi (None = qualunque): quelle scritte da git init
+_CORE_KEYS = {'repositoryformatversion': {'0'}, 'filemode': {'', 'true', 'yes', 'on', '1'},
+              'bare': {'false', 'no', 'off', '0'}, 'logallrefupdates': {'', 'true', 'yes', 'on', '1', 'always'},
+              'editor': None, 'pager': None, 'quotepath': None, 'abbrev': None}
+
+# File di .git che indicano un'operazione in corso (merge, cherry-pick, rebase...)
+_BUSY = ("MERGE_HEAD", "CHERRY_PICK_HEAD", "REVERT_HEAD", "rebase-merge", "rebase-apply", "sequencer",
+         "index.lock")
+
+# Nomi ammessi per branch e file nelle liste di commit: passano nei comandi senza apici
+_NAME = re.compile(r"^(?![-./])(?!.*\.\.)(?!.*//)(?!.*/[-.])(?!.*\.lock$)(?!.*[/.]$)[A-Za-z0-9._/-]+$")
+_MESSAGE = re.compile(r'^[^"\\$`\n]+$')
+
+# ctime, mtime (secondi e nanosecondi), dev, ino, modo, uid, gid, dimensione, oid, flag (come in gitquest/inspector.py)
+_INDEX_ENTRY = struct.Struct(">10I20sH")
+
+
+class _Fallback(Exception):
+    """Il risultato non sarebbe quello dei comandi: ci pensa git"""
+
+
+def validate(spec):
+    """ValueError se la lista di commit non si può scrivere come comandi semplici"""
+    if not spec['commits']:
+        raise ValueError("nessun commit")
+    for commit in spec['commits']:
+        if not _MESSAGE.match(commit['message']) or commit['message'] != commit['message'].strip():
+            raise ValueError(f"messaggio non valido {commit['message']!r}")
+        if not commit['files']:
+            raise ValueError(f"commit senza file {commit['message']!r}")
+        if commit.get('branch') and commit.get('new_branch'):
+            raise ValueError(f"branch e new_branch insieme in {commit['message']!r}")
+        for path, _ in commit['files']:
+            # I file stanno nella radice del repository, come quelli scritti dai passi write
+            if not _NAME.match(path) or "/" in path or path == ".git":
+                raise ValueError(f"file non valido {path!r}")
+        for name in (commit.get('branch'), commit.get('new_branch')):
+            if name and not _NAME.match(name):
+                raise ValueError(f"branch non valido {name!r}")
+    if spec.get('checkout') and not _NAME.match(spec['checkout']):
+        raise ValueError(f"branch non valido {spec['checkout']!r}")
+
+
+def commands(spec):
+    """Gli stessi commit come passi ('write', file, contenuto) e ('run', comando git)"""
+    steps = []
+    for commit in spec['commits']:
+        if commit.get('new_branch'):
+            steps.append(('run', f"git checkout -b {commit['new_branch']}"))
+        elif commit.get('branch'):
+            steps.append(('run', f"git checkout {commit['branch']}"))
+        for path, content in commit['files']:
+            steps.append(('write', path, content))
+        steps.append(('run', "git add " + " ".join(path for path, _ in commit['files'])))
+        steps.append(('run', f"git commit -m \"{commit['message']}\""))
+    if spec.get('checkout'):
+        steps.append(('run', f"git checkout {spec['checkout']}"))
+    return steps
+
+
+def apply(inspector, spec, author, committer, env=None):
+    """Scrive i commit di spec nel repository; None (senza aver toccato nulla) se deve pensarci git
+
+    author e committer sono identità complete, "Nome <email> secondi fuso".
+    """
+    try:
+        return _Batch(inspector, author, committer).run(spec, os.environ if env is None else env)
+    except _Fallback:
+        return None
+
+
+class _Batch:
+    def __init__(self, inspector, author, committer):
+        self.inspector = inspector
+        self.author = author
+        self.committer = committer
+        # oid -> oggetto completo ("tipo dimensione\0dati") da scrivere
+        self.new = {}
+        # oid di un tree -> {percorso: (modo, oid)}
+        self.flat = {}
+
+    def run(self, spec, env):
+        inspector = self.inspector
+        git_dir = inspector.git_dir
+        _check_setup(inspector, env)
+        head = inspector.head()
+        if head is None or head[0] != 'ref' or not head[1].startswith("refs/heads/"):
+            raise _Fallback()
+        current = head[1][len("refs/heads/"):]
+        start = inspector.ref(head[1])
+        index = inspector.index()
+        if index.unmerged or any(e.skip_worktree or e.intent_to_add for e in index.entries.values()):
+            raise _Fallback()
+        base = self.commit_files(start)
+        # Staging vuoto: git commit registrerebbe anche quello che c'è già nell'index
+        if {path: (f"{e.mode:o}", e.oid) for path, e in index.entries.items()} != base:
+            raise _Fallback()
+
+        tips = {}
+        logs = []
+        touched = set()
+        seen = [base]
+
+        def tip(name):
+            return tips[name] if name in tips else inspector.ref("refs/heads/" + name)
+
+        def switch(name):
+            oid = tip(name)
+            if oid is None or tip(current) is None:
+                raise _Fallback()
+            tips[name] = oid
+            logs.append(("HEAD", tip(current), oid, f"checkout: moving from {current} to {name}"))
+            seen.append(self.commit_files(oid))
+            return name
+
+        for commit in spec['commits']:
+            if commit.get('new_branch'):
+                name = commit['new_branch']
+                if tip(name) is not None or tip(current) is None:
+                    raise _Fallback()
+                tips[name] = tip(current)
+                logs.append(("refs/heads/" + name, ZERO_OID, tips[name], "branch: Created from HEAD"))
+                current = switch(name)
+            elif commit.get('branch'):
+                current = switch(commit['branch'])
+            parent = tip(current)
+            files = dict(self.commit_files(parent))
+            for path, content in commit['files']:
+                old = files.get(path)
+                mode = old[0] if old is not None and old[0] == "100755" else "100644"
+                files[path] = (mode, self.object("blob", content.encode("utf-8")))
+                touched.add(path)
+            if files == self.commit_files(parent):
+                # git commit: "nothing to commit"
+                raise _Fallback()
+            data = f"tree {self.write_tree(files)}\n"
+            if parent is not None:
+                data += f"parent {parent}\n"
+            data += f"author {self.author}\ncommitter {self.committer}\n\n{commit['message']}\n"
+            oid = self.object("commit", data.encode("utf-8"))
+            self.flat[oid] = files
+            action = "commit" if parent is not None else "commit (initial)"
+            message = f"{action}: {commit['message']}"
+            logs.append(("refs/heads/" + current, parent or ZERO_OID, oid, message))
+            logs.append(("HEAD", parent or ZERO_OID, oid, message))
+            tips[current] = oid
+            seen.append(files)
+        if spec.get('checkout'):
+            current = switch(spec['checkout'])
+        final = self.commit_files(tip(current))
+
+        # I file che i comandi avrebbero scritto o cancellato devono essere come nel commit di partenza
+        for files in seen:
+            touched.update(path for path in files.keys() | base.keys() if files.get(path) != base.get(path))
+        index_path = os.path.join(git_dir, "index")
+        try:
+            index_mtime = os.stat(index_path).st_mtime_ns
+        except FileNotFoundError:
+            index_mtime = 0
+        for path in touched:
+            if not self.clean(path, base.get(path), index.entries.get(path), index_mtime):
+                raise _Fallback()
+            entry = final.get(path)
+            if entry is not None and entry[0] not in ("100644", "100755"):
+                raise _Fallback()
+
+        refs = sorted({ref for ref, _, _, _ in logs if ref != "HEAD"})
+        locks = _Locks(git_dir)
+        try:
+            locks.take(["index"] + refs + ["HEAD"])
+            self.store_objects()
+            self.update_worktree(touched, base, final)
+            locks.commit("index", self.index_data(final, touched, index.entries, index_mtime))
+            for ref in refs:
+                locks.commit(ref, tips[ref[len("refs/heads/"):]] + "\n")
+            locks.commit("HEAD", f"ref: refs/heads/{current}\n")
+        finally:
+            locks.release()
+        for ref, old, new, message in logs:
+            path = os.path.join(git_dir, "logs", ref)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "a") as f:
+                f.write(f"{old} {new} {self.committer}\t{message}\n")
+        return True
+
+    # --- Oggetti -----------------------------------------------------------
+
+    def object(self, kind, data):
+        raw = b"%s %d\0" % (kind.encode(), len(data)) + data
+        oid = hashlib.sha1(raw).hexdigest()
+        self.new[oid] = raw
+        return oid
+
+    def read(self, oid):
+        """I dati di un oggetto, nuovo o già nel repository"""
+        raw = self.new.get(oid)
+        if raw is not None:
+            return raw[raw.index(b"\0") + 1:]
+        obj = self.inspector.read_object(oid)
+        if obj is None:
+            raise _Fallback()
+        return obj[1]
+
+    def commit_files(self, oid):
+        """{percorso: (modo, oid)} dei file del commit ({} per un branch senza commit)"""
+        if oid is None:
+            return {}
+        files = self.flat.get(oid)
+        if files is None:
+            commit = self.inspector.commit(oid)
+            if commit is None:
+                raise _Fallback()
+            files = self.flat[oid] = {}
+            self.flatten(commit.tree, "", files)
+        return files
+
+    def flatten(self, tree, prefix, files):
+        entries = self.inspector.tree(tree)
+        if entries is None:
+            raise _Fallback()
+        for name, (mode, oid) in entries.items():
+            if mode == "40000":
+                self.flatten(oid, prefix + name + "/", files)
+            else:
+                files[prefix + name] = (mode, oid)
+
+    def write_tree(self, files):
+        root = {}
+        for path, entry in files.items():
+            node = root
+            *dirs, name = path.split("/")
+            for directory in dirs:
+                node = node.setdefault(directory, {})
+                if not isinstance(node, dict):
+                    raise _Fallback()
+            if isinstance(node.get(name), dict):
+                raise _Fallback()
+            node[name] = entry
+        return self.tree_of(root)
+
+    def tree_of(self, node):
+        items = []
+        for name, value in node.items():
+            encoded = name.encode("utf-8", "surrogateescape")
+            if isinstance(value, dict):
+                # Come git: le cartelle si ordinano come se il nome finisse con /
+                items.append((encoded + b"/", b"40000", encoded, self.tree_of(value)))
+            else:
+                items.append((encoded, value[0].encode(), encoded, value[1]))
+        items.sort()
+        data = b"".join(b"%s %s\0%s" % (mode, name, bytes.fromhex(oid)) for _, mode, name, oid in items)
+        return self.object("tree", data)
+
+    def store_objects(self):
+        objects = os.path.join(self.inspector.git_dir, "objects")
+        for oid, raw in self.new.items():
+            directory = os.path.join(objects, oid[:2])
+            path = os.path.join(directory, oid[2:])
+            if os.path.exists(path):
+                continue
+            os.makedirs(directory, exist_ok=True)
+            fd, temp = tempfile.mkstemp(prefix="tmp_obj_", dir=directory)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(zlib.compress(raw))
+                os.chmod(temp, 0o444)
+                os.replace(temp, path)
+            except BaseException:
+                os.unlink(temp)
+                raise
+
+    # --- Working tree e index ---------------------------------------------
+
+    def clean(self, path, expected, entry, index_mtime):
+        """True se nel working tree path è come nel commit di partenza (expected None = assente)"""
+        full = os.path.join(self.inspector.repo_dir, path)
+        try:
+            st = os.lstat(full)
+        except (FileNotFoundError, NotADirectoryError):
+            return expected is None
+        if expected is None or not stat.S_ISREG(st.st_mode):
+            return False
+        if bool(st.st_mode & stat.S_IXUSR) != (expected[0] == "100755"):
+            return False
+        if (entry is not None and entry.size == st.st_size & 0xffffffff and entry.mtime == st.st_mtime_ns
+                and entry.ctime == st.st_ctime_ns and entry.ino == st.st_ino & 0xffffffff
+                and st.st_mtime_ns < index_mtime):
+            return True
+        with open(full, "rb") as f:
+            data = f.read()
+        return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest() == expected[1]
+
+    def update_worktree(self, touched, base, final):
+        root = self.inspector.repo_dir
+        for path in sorted(touched):
+            full = os.path.join(root, path)
+            entry = final.get(path)
+            if entry is None:
+                if path in base:
+                    os.remove(full)
+                    # Come git: le cartelle rimaste vuote spariscono
+                    directory = os.path.dirname(full)
+                    while directory != root:
+                        try:
+                            os.rmdir(directory)
+                        except OSError:
+                            break
+                        directory = os.path.dirname(directory)
+                continue
+            if entry == base.get(path):
+                continue
+            os.makedirs(os.path.dirname(full), exist_ok=True)
+            with open(full, "wb") as f:
+                f.write(self.read(entry[1]))
+            if entry[0] == "100755":
+                os.chmod(full, 0o755)
+
+    def index_data(self, final, touched, entries, index_mtime):
+        """L'index (versione 2) con i file di final"""
+        root = self.inspector.repo_dir
+        names = sorted(final, key=lambda p: p.encode("utf-8", "surrogateescape"))
+        parts = [struct.pack(">4sII", b"DIRC", 2, len(names))]
+        for path in names:
+            mode, oid = final[path]
+            try:
+                st = os.lstat(os.path.join(root, path))
+            except OSError:
+                st = None
+            old = entries.get(path)
+            if path not in touched and (st is None or old is None or old.size != st.st_size & 0xffffffff
+                                        or old.mtime != st.st_mtime_ns or old.ctime != st.st_ctime_ns
+                                        or old.ino != st.st_ino & 0xffffffff or st.st_mtime_ns >= index_mtime):
+                # Dati di stat azzerati: git confronterà il contenuto del file
+                st = None
+            if st is None:
+                fields = (0,) * 10
+            else:
+                fields = (st.st_ctime_ns // 1_000_000_000, st.st_ctime_ns % 1_000_000_000,
+                          st.st_mtime_ns // 1_000_000_000, st.st_mtime_ns % 1_000_000_000,
+                          st.st_dev, st.st_ino, 0, st.st_uid, st.st_gid, st.st_size)
+            fields = [value & 0xffffffff for value in fields]
+            fields[6] = int(mode, 8)
+            name = path.encode("utf-8", "surrogateescape")
+            size = _INDEX_ENTRY.size + len(name)
+            parts.append(_INDEX_ENTRY.pack(*fields, bytes.fromhex(oid), min(len(name), 0xfff)))
+            # Voci allineate a 8 byte, con almeno un NUL finale
+            parts.append(name + b"\0" * (((size + 8) & ~7) - size))
+        data = b"".join(parts)
+        return data + hashlib.sha1(data).digest()
+
+
+class _Locks:
+    """File .lock presi tutti insieme e rinominati al posto degli originali, come fa git"""
+
+    def __init__(self, git_dir):
+        self.git_dir = git_dir
+        self.held = []
+
+    def take(self, names):
+        for name in names:
+            path = os.path.join(self.git_dir, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                fd = os.open(path + ".lock", os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+            except FileExistsError:
+                self.release()
+                raise _Fallback() from None
+            os.close(fd)
+            self.held.append(path)
+
+    def commit(self, name, content):
+        path = os.path.join(self.git_dir, name)
+        with open(path + ".lock", "wb" if isinstance(content, bytes) else "w") as f:
+            f.write(content)
+        os.replace(path + ".lock", path)
+        self.held.remove(path)
+
+    def release(self):
+        for path in self.held:
+            try:
+                os.remove(path + ".lock")
+            except FileNotFoundError:
+                pass
+        self.held = []
+
+
+def _check_setup(inspector, env):
+    """_Fallback se ambiente, configurazione o repository cambierebbero quello che fanno i comandi"""
+    if any(name in env for name in _UNSAFE_ENV):
+        raise _Fallback()
+    git_dir = inspector.git_dir
+    if any(os.path.exists(os.path.join(git_dir, name)) for name in _BUSY):
+        raise _Fallback()
+    if (os.path.exists(os.path.join(inspector.repo_dir, ".gitattributes"))
+            or os.path.exists(os.path.join(git_dir, "info", "attributes"))):
+        raise _Fallback()
+    try:
+        hooks = [name for name in os.listdir(os.path.join(git_dir, "hooks")) if not name.endswith(".sample")]
+    except FileNotFoundError:
+        hooks = []
+    if hooks:
+        raise _Fallback()
+    from gitquest.history import config_env, config_paths
+    pairs = config_env(env)
+    if pairs is None:
+        raise _Fallback()
+    entries = [(name.split(".")[0].lower(), name.rsplit(".", 1)[-1].lower(), value.lower())
+               for name, value in pairs]
+    for path in config_paths(inspector, env):
+        try:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                entries.extend(_config_entries(f.read()))
+        except OSError:
+            continue
+    for section, key, value in entries:
+        if section in _UNSAFE_SECTIONS:
+            raise _Fallback()
+        if section == 'core' and (key not in _CORE_KEYS or
+                                  _CORE_KEYS[key] is not None and value not in _CORE_KEYS[key]):
+            raise _Fallback()
+
+
+def _config_entries(text):
+    """(sezione, chiave, valore) in minuscolo dal testo di un file di configurazione"""
+    section = ""
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith("["):
+            end = line.find("]")
+            header = line[1:end if end >= 0 else len(line)].split()
+            section = header[0].split(".")[0].lower() if header else ""
+            line = line[end + 1:].strip() if end >= 0 else ""
+        if not line or line[0] in "#;":
+            continue
+        key, _, value = line.partition("=")
+        value = re.split(r"[#;]", value, maxsplit=1)[0].strip().strip('"').lower()
+        yield section, key.strip().lower(), value
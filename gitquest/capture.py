@@ -0,0 +1,159 @@
+"""
+Output dei comandi git in memoria limitata.
+
+run_command catturava tutto con subprocess.run(capture_output=True, text=True):
+un `git log` o un `git reflog` su un repository con decine di migliaia di commit
+finiva per intero in memoria, e veniva decodificato, prima che il giocatore ne
+vedesse una riga. Capture tiene invece al massimo max_bytes e max_lines per
+flusso:
+• oltre il limite il resto non viene conservato e alla fine compare un avviso
+  di troncamento; i comandi di sola lettura (READ_ONLY) vengono fermati subito,
+  come con `| head`, gli altri finiscono il loro lavoro
+• in cattura si conservano i byte e si decodificano una sola volta, e solo quelli
+  tenuti; in streaming (sink) ogni pezzo viene decodificato appena arriva e
+  passato al renderer, senza conservare niente
+Come con text=True, \\r\\n e \\r diventano \\n.
+"""
+
+import codecs
+import io
+import os
+import selectors
+import subprocess
+import time
+
+# Limiti per flusso (stdout e stderr separati)
+MAX_BYTES = 256 * 1024
+MAX_LINES = 2000
+
+# Sottocomandi che si possono interrompere a limite raggiunto senza lasciare il repository a metà
+READ_ONLY = frozenset({'log', 'reflog', 'show', 'diff', 'blame', 'shortlog', 'rev-list', 'ls-files',
+                       'ls-tree', 'cat-file', 'grep'})
+
+
+def _decoder():
+    return io.IncrementalNewlineDecoder(codecs.getincrementaldecoder("utf-8")("replace"), True)
+
+
+class Capture:
+    """Un flusso di output tenuto entro max_bytes e max_lines"""
+
+    __slots__ = ('max_bytes', 'max_lines', 'sink', 'chunks', 'size', 'lines', 'truncated', '_decoder')
+
+    def __init__(self, max_bytes=MAX_BYTES, max_lines=MAX_LINES, sink=None):
+        self.max_bytes = max_bytes
+        self.max_lines = max_lines
+        # Se indicato riceve il testo man mano, e niente viene conservato
+        self.sink = sink
+        self.chunks = []
+        self.size = 0
+        self.lines = 0
+        self.truncated = False
+        self._decoder = _decoder() if sink is not None else None
+
+    def feed(self, data):
+        """Aggiunge un pezzo di output; False se il limite è stato raggiunto"""
+        if self.truncated:
+            return False
+        keep = len(data)
+        allowed = self.max_lines - self.lines
+        if allowed <= 0:
+            keep = 0
+        elif data.count(b"\n") > allowed:
+            # Si tiene fino all'a capo dell'ultima riga ammessa
+            keep = -1
+            for _ in range(allowed):
+                keep = data.index(b"\n", keep + 1)
+            keep += 1
+        if keep > self.max_bytes - self.size:
+            keep = self.max_bytes - self.size
+            # Meglio una riga intera in meno che mezza riga (o mezzo carattere)
+            newline = data.rfind(b"\n", 0, keep)
+            if newline >= 0:
+                keep = newline + 1
+        if keep < len(data):
+            self.truncated = True
+            data = data[:keep]
+        if data:
+            self.size += len(data)
+            self.lines += data.count(b"\n")
+            if self.sink is None:
+                self.chunks.append(data)
+            else:
+                text = self._decoder.decode(data)
+                if text:
+                    self.sink(text)
+        return not self.truncated
+
+    def marker(self):
+        if not self.truncated:
+            return ""
+        return f"[… output troncato dopo {self.lines} righe]\n"
+
+    def finish(self):
+        """In streaming: manda al sink l'ultimo pezzo e l'avviso di troncamento"""
+        if self.sink is not None:
+            text = self._decoder.decode(b"", final=True) + self.marker()
+            if text:
+                self.sink(text)
+
+    def text(self):
+        """Il testo conservato, decodificato adesso, con l'avviso di troncamento"""
+        if self.sink is not None:
+            return ""
+        return _decoder().decode(b"".join(self.chunks), final=True) + self.marker()
+
+
+def pump(proc, out, err, deadline=None, stop_when_full=False):
+    """Legge stdout e stderr di proc fino alla fine; restituisce perché si è fermato prima
+
+    "timeout" se è passato deadline (time.monotonic), "full" se un flusso ha
+    raggiunto il limite e stop_when_full è vero, altrimenti None. Nei primi due
+    casi il processo va terminato dal chiamante.
+    """
+    with selectors.DefaultSelector() as selector:
+        selector.register(proc.stdout, selectors.EVENT_READ, out)
+        selector.register(proc.stderr, selectors.EVENT_READ, err)
+        while selector.get_map():
+            timeout = None
+            if deadline is not None:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    return "timeout"
+            for key, _ in selector.select(timeout):
+                data = os.read(key.fd, 65536)
+                if not data:
+                    selector.unregister(key.fileobj)
+                elif not key.data.feed(data) and stop_when_full:
+                    return "full"
+    return None
+
+
+def is_read_only(args):
+    """True per `git <sottocomando di sola lettura> ...` (argv o stringa)"""
+    if isinstance(args, str):
+        args = args.split(None, 2)
+    return len(args) >= 2 and args[0] == "git" and args[1] in READ_ONLY
+
+
+def run_captured(args, cwd=None, env=None, shell=False, sink=None, max_bytes=MAX_BYTES, max_lines=MAX_LINES):
+    """Come subprocess.run(capture_output=True, text=True), ma con l'output limitato
+
+    Restituisce (exit code, stdout, stderr). Con sink lo stdout e lo stderr vanno
+    al sink man mano e le stringhe restituite sono vuote.
+    """
+    proc = subprocess.Popen(args, shell=shell, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=cwd, env=env)
+    out, err = Capture(max_bytes, max_lines, sink), Capture(max_bytes, max_lines, sink)
+    with proc:
+        stopped = pump(proc, out, err, stop_when_full=not shell and is_read_only(args))
+        if stopped is not None:
+            proc.kill()
+        proc.stdout.close()
+        proc.stderr.close()
+        returncode = proc.wait()
+    out.finish()
+    err.finish()
+    # Fermato di proposito dopo abbastanza output: per il gioco è andato a buon fine
+    if stopped == "full":
+        returncode = 0
+    return returncode, out.text(), err.text()
@@ -0,0 +1,370 @@
+"""
+Salvataggio e ripresa delle partite.
+
+Il motore prende un checkpoint all'ingresso di ogni stato (livello, punteggio,
+stato corrente). Solo quando la partita si interrompe (GitMasterQuest.save_point)
+lo si completa con lo stato del repository (vedi sotto) e lo si scrive su
+disco come un piccolo record binario:
+
+    "GQSV" | versione | flag | livello (u16) | punteggio (i32) | stato (u8 + utf-8)
+    | repository (compresso con zlib, se presente)
+
+Il repository è salvato così, senza pickle (un salvataggio manomesso non deve
+poter eseguire codice):
+• modalità pratica: "P" e lo stato in memoria di SimulatedGit in JSON (tuple,
+  dizionari e commit marcati, vedi _plain)
+• git reale: "D", il modello (u8 + utf-8, vuoto se non c'è) e un record per
+  directory, file o cancellazione: tipo (d/f/x) | modo (u16) | lunghezze di
+  percorso (u16) e contenuto (u32) | percorso | contenuto. Ci sono i file di
+  worktree e .git che differiscono dal modello dello scenario caricato per
+  ultimo (i pack collegati al modello non si copiano) e quelli cancellati;
+  senza modello, tutti i file. Di .git si salvano solo HEAD, index, ref,
+  reflog, oggetti e i file delle operazioni in corso (_GIT_FILES): config,
+  hook, info/ e il resto vengono dal modello (o sono quelli di git init), così
+  un salvataggio manomesso non può far eseguire comandi a git. Un percorso
+  assoluto, con .. o fuori da questo elenco rende il salvataggio illeggibile.
+
+Alla ripresa si istanzia il modello, si applicano le differenze e si riparte
+dall'inizio dello stato salvato, senza rifare i comandi dei livelli precedenti.
+Per questo il repository salvato è quello dell'ingresso nello stato, letto
+allora senza gli oggetti (pochi file piccoli: capture_directory con
+objects=False); gli oggetti, che git non modifica mai, si aggiungono solo al
+salvataggio (capture_objects) da quelli presenti in quel momento.
+"""
+
+import hashlib
+import json
+import os
+import re
+import struct
+import zlib
+
+MAGIC = b"GQSV"
+VERSION = 2
+_HEADER = struct.Struct("<4sBBHi")
+_ENTRY = struct.Struct("<cHHI")
+_HAS_REPO = 1
+
+# Parti di .git che git ricrea da solo o che il gioco non usa
+_SKIP_DIRS = {os.path.join(".git", "hooks"), os.path.join(".git", "logs", "refs", "remotes")}
+
+_OBJECTS = os.path.join(".git", "objects")
+
+# File diretti di .git che si salvano (più BISECT_*); le directory sono refs, logs e objects
+_GIT_FILES = frozenset({"HEAD", "index", "packed-refs", "ORIG_HEAD", "MERGE_HEAD", "MERGE_MSG", "MERGE_MODE",
+                        "CHERRY_PICK_HEAD", "REVERT_HEAD", "AUTO_MERGE", "COMMIT_EDITMSG"})
+
+# La configurazione di git init, per i repository ripresi senza modello
+DEFAULT_CONFIG = ("[core]\n\trepositoryformatversion = 0\n\tfilemode = true\n\tbare = false\n"
+                  "\tlogallrefupdates = true\n")
+
+
+class CheckpointError(Exception):
+    """Salvataggio illeggibile o di una versione diversa"""
+
+
+def encode(checkpoint):
+    """Checkpoint del motore (con l'eventuale 'repo') -> bytes"""
+    state = checkpoint['state'].encode("utf-8")
+    if len(state) > 255:
+        raise CheckpointError(f"nome di stato troppo lungo: {checkpoint['state']}")
+    repo = checkpoint.get('repo')
+    flags = _HAS_REPO if repo is not None else 0
+    record = _HEADER.pack(MAGIC, VERSION, flags, checkpoint['level'], checkpoint['score'])
+    record += bytes([len(state)]) + state
+    if repo is not None:
+        record += zlib.compress(_encode_repo(repo), 6)
+    return record
+
+
+def decode(record):
+    """bytes -> checkpoint utilizzabile da QuestEngine.run"""
+    if len(record) < _HEADER.size + 1:
+        raise CheckpointError("salvataggio troncato")
+    magic, version, flags, level, score = _HEADER.unpack_from(record)
+    if magic != MAGIC or version != VERSION:
+        raise CheckpointError("non è un salvataggio di questa versione del gioco")
+    size = record[_HEADER.size]
+    start = _HEADER.size + 1
+    checkpoint = {'state': record[start:start + size].decode("utf-8"), 'level': level, 'score': score}
+    if flags & _HAS_REPO:
+        try:
+            checkpoint['repo'] = _decode_repo(zlib.decompress(record[start + size:]))
+        except (zlib.error, ValueError, RecursionError) as e:
+            raise CheckpointError(f"repository salvato illeggibile: {e}")
+    return checkpoint
+
+
+def _encode_repo(repo):
+    if repo[0] == 'pratica':
+        return b"P" + json.dumps(_plain(repo[1]), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    _, template, (dirs, files, deleted) = repo
+    name = (template or "").encode("utf-8")
+    if len(name) > 255:
+        raise CheckpointError(f"nome di modello troppo lungo: {template}")
+    parts = [b"D", bytes([len(name)]), name]
+    for rel in dirs:
+        parts.append(_entry(b"d", rel))
+    for rel, (mode, content) in files.items():
+        parts.append(_entry(b"f", rel, mode, content))
+    for rel in deleted:
+        parts.append(_entry(b"x", rel))
+    return b"".join(parts)
+
+
+def _entry(kind, rel, mode=0, content=b""):
+    path = os.fsencode(rel)
+    return _ENTRY.pack(kind, mode, len(path), len(content)) + path + content
+
+
+def _decode_repo(data):
+    if data[:1] == b"P":
+        return ('pratica', _practice_state(_unplain(json.loads(data[1:].decode("utf-8")))))
+    if data[:1] != b"D" or len(data) < 2:
+        raise CheckpointError("formato del repository sconosciuto")
+    size = data[1]
+    if len(data) < 2 + size:
+        raise CheckpointError("repository salvato troncato")
+    template = data[2:2 + size].decode("utf-8") or None
+    dirs, files, deleted = [], {}, []
+    pos = 2 + size
+    while pos < len(data):
+        if pos + _ENTRY.size > len(data):
+            raise CheckpointError("repository salvato troncato")
+        kind, mode, path_size, content_size = _ENTRY.unpack_from(data, pos)
+        pos += _ENTRY.size
+        end = pos + path_size + content_size
+        if end > len(data):
+            raise CheckpointError("repository salvato troncato")
+        rel = os.fsdecode(data[pos:pos + path_size])
+        _check_path(rel)
+        if kind == b"d":
+            dirs.append(rel)
+        elif kind == b"f":
+            files[rel] = (mode, data[pos + path_size:end])
+        elif kind == b"x":
+            deleted.append(rel)
+        else:
+            raise CheckpointError(f"voce sconosciuta nel repository salvato: {kind!r}")
+        pos = end
+    return ('disco', template, (dirs, files, deleted))
+
+
+def _plain(value):
+    """Stato di SimulatedGit -> valori JSON: {"d": ...} dizionario, {"t": [...]} tupla, {"c": [...]} commit"""
+    from gitquest.simulated import Commit
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    if isinstance(value, tuple):
+        return {"t": [_plain(item) for item in value]}
+    if isinstance(value, dict) and all(isinstance(key, str) for key in value):
+        return {"d": {key: _plain(item) for key, item in value.items()}}
+    if isinstance(value, Commit):
+        return {"c": [_plain(getattr(value, name)) for name in Commit.__slots__]}
+    raise CheckpointError(f"valore non salvabile: {type(value).__name__}")
+
+
+def _unplain(value):
+    from gitquest.simulated import Commit
+    if isinstance(value, list):
+        return [_unplain(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if len(value) == 1:
+        (tag, items), = value.items()
+        if tag == "d" and isinstance(items, dict):
+            return {key: _unplain(item) for key, item in items.items()}
+        if tag == "t" and isinstance(items, list):
+            return tuple(_unplain(item) for item in items)
+        if tag == "c" and isinstance(items, list) and len(items) == len(Commit.__slots__):
+            return Commit(*(_unplain(item) for item in items))
+    raise CheckpointError("stato della modalità pratica illeggibile")
+
+
+def _practice_state(state):
+    """Lo stato di SimulatedGit.state() se ne ha la forma, altrimenti CheckpointError"""
+    from gitquest.simulated import Commit
+    shapes = (bool, dict, dict, (str, type(None)), (str, bool, type(None)), dict, dict, list,
+              (str, type(None)), (str, type(None)), (tuple, type(None)), list, dict, dict, (int, float, type(None)))
+    if (not isinstance(state, tuple) or len(state) != len(shapes)
+            or not all(isinstance(value, shape) for value, shape in zip(state, shapes))
+            or not all(isinstance(commit, Commit) for commit in state[1].values())
+            or not all(isinstance(name, str) and isinstance(content, str)
+                       for table in (state[2], state[5], state[12], state[13])
+                       for name, content in table.items())):
+        raise CheckpointError("stato della modalità pratica illeggibile")
+    return state
+
+
+def capture_directory(path, template=None, objects=True):
+    """Immagine di un repository su disco: (directory, {file: (modo, contenuto)}, cancellati)
+
+    Con un modello, i file identici (stesso inode o stesso contenuto) non vengono copiati.
+    Con objects=False .git/objects resta fuori (vedi capture_objects).
+    """
+    skip = _SKIP_DIRS if objects else _SKIP_DIRS | {_OBJECTS}
+    dirs, files = [], {}
+    present = set()
+    for current, subdirs, names in os.walk(path):
+        rel_dir = os.path.relpath(current, path)
+        if rel_dir in skip:
+            subdirs[:] = []
+            continue
+        if rel_dir != "." and _allowed(rel_dir):
+            dirs.append(rel_dir)
+        for name in names:
+            rel = os.path.normpath(os.path.join(rel_dir, name))
+            present.add(rel)
+            if not _allowed(rel):
+                continue
+            full = os.path.join(current, name)
+            if template is not None and _same_file(full, os.path.join(template, rel)):
+                continue
+            with open(full, "rb") as f:
+                files[rel] = (os.fstat(f.fileno()).st_mode & 0o777, f.read())
+    deleted = []
+    if template is not None:
+        for current, subdirs, names in os.walk(template):
+            rel_dir = os.path.relpath(current, template)
+            if rel_dir in skip:
+                subdirs[:] = []
+                continue
+            for name in names:
+                rel = os.path.normpath(os.path.join(rel_dir, name))
+                if rel not in present and _allowed(rel):
+                    deleted.append(rel)
+    return dirs, files, deleted
+
+
+def capture_objects(path, template=None):
+    """Gli oggetti di .git/objects che il modello non ha, come immagine senza cancellati"""
+    dirs, files = [], {}
+    for current, subdirs, names in os.walk(os.path.join(path, _OBJECTS)):
+        rel_dir = os.path.relpath(current, path)
+        if not _allowed(rel_dir):
+            subdirs[:] = []
+            continue
+        dirs.append(rel_dir)
+        for name in names:
+            rel = os.path.join(rel_dir, name)
+            full = os.path.join(current, name)
+            if template is not None and _same_file(full, os.path.join(template, rel)):
+                continue
+            with open(full, "rb") as f:
+                files[rel] = (os.fstat(f.fileno()).st_mode & 0o777, f.read())
+    return dirs, files, []
+
+
+def join_images(first, second):
+    """Un'immagine sola da due di capture_directory / capture_objects (vince la seconda)"""
+    known = set(first[0])
+    dirs = list(first[0]) + [rel for rel in second[0] if rel not in known]
+    return dirs, dict(first[1], **second[1]), list(first[2]) + list(second[2])
+
+
+def _same_file(path, reference):
+    try:
+        a, b = os.stat(path), os.stat(reference)
+    except OSError:
+        return False
+    if (a.st_dev, a.st_ino) == (b.st_dev, b.st_ino):
+        return True
+    if a.st_size != b.st_size:
+        return False
+    with open(path, "rb") as f, open(reference, "rb") as g:
+        return f.read() == g.read()
+
+
+def restore_directory(path, image):
+    """Applica un'immagine di capture_directory sopra il contenuto attuale di path"""
+    dirs, files, deleted = image
+    for rel in (*dirs, *files, *deleted):
+        _check_path(rel)
+    for rel in deleted:
+        try:
+            os.remove(os.path.join(path, rel))
+        except FileNotFoundError:
+            pass
+    for rel in dirs:
+        os.makedirs(os.path.join(path, rel), exist_ok=True)
+    for rel, (mode, content) in files.items():
+        full = os.path.join(path, rel)
+        if os.path.lexists(full):
+            # I pack del modello sono hardlink: non vanno modificati sul posto
+            os.remove(full)
+        with open(full, "wb") as f:
+            f.write(content)
+        os.chmod(full, 0o755 if mode & 0o100 else 0o644)
+    # Senza modello la configurazione è quella di git init, mai quella del salvataggio
+    config = os.path.join(path, ".git", "config")
+    if os.path.isdir(os.path.join(path, ".git")) and not os.path.exists(config):
+        with open(config, "w") as f:
+            f.write(DEFAULT_CONFIG)
+
+
+def _check_path(rel):
+    """CheckpointError se rel uscirebbe dal repository o non è tra le parti di .git salvate"""
+    parts = re.split(r"[/\\]", rel)
+    if (not rel or "\0" in rel or os.path.isabs(rel) or any(part in ("", ".", "..") for part in parts)
+            or not _allowed(rel)):
+        raise CheckpointError(f"percorso non valido nel salvataggio: {rel!r}")
+
+
+def _allowed(rel):
+    """True per i file del working tree e per le parti di .git che il gioco salva"""
+    parts = re.split(r"[/\\]", rel)
+    if ".git" in parts[1:]:
+        # Un repository annidato porterebbe con sé la sua configurazione
+        return False
+    if parts[0] != ".git" or len(parts) == 1:
+        return True
+    if len(parts) == 2 and (parts[1] in _GIT_FILES or parts[1].startswith("BISECT_")):
+        return True
+    if parts[1] in ("refs", "logs"):
+        return True
+    return parts[1] == "objects" and parts[2:3] != ["info"]
+
+
+def write_record(path, checkpoint):
+    """Scrive il checkpoint in path senza lasciare mai un file a metà"""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(encode(checkpoint))
+    os.replace(tmp, path)
+
+
+def read_record(path):
+    with open(path, "rb") as f:
+        return decode(f.read())
+
+
+class CheckpointStore:
+    """Un file per giocatore in una directory, scritto in modo atomico"""
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, player):
+        # Nome leggibile ma sicuro, più un'impronta per non confondere nomi simili
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", player)[:40].lstrip(".") or "giocatore"
+        digest = hashlib.sha1(player.encode("utf-8")).hexdigest()[:8]
+        return os.path.join(self.root, f"{safe}-{digest}.gqsv")
+
+    def save(self, player, checkpoint):
+        write_record(self.path(player), checkpoint)
+
+    def load(self, player):
+        """Il checkpoint salvato, oppure None se non c'è (o non è leggibile)"""
+        try:
+            return read_record(self.path(player))
+        except (OSError, CheckpointError):
+            return None
+
+    def discard(self, player):
+        try:
+            os.remove(self.path(player))
+        except FileNotFoundError:
+            pass
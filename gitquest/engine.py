@@ -0,0 +1,110 @@
+"""
+Motore a stati del gioco.
+
+I livelli non si chiamano più a catena (level_1_basics -> level_1_continued -> ...
+-> emergency_scenarios_menu -> scenario -> emergency_scenarios_menu ...): ogni
+stato è un metodo del gioco che restituisce il nome dello stato successivo, e il
+motore li esegue in un ciclo. La profondità dello stack resta costante e, finito
+uno stato, le sue variabili locali (compreso l'output git catturato) vengono liberate.
+
+La tabella degli stati è dichiarativa. Ogni voce è un livello compilato da
+gitquest/levels.py (con .run(game) e .next) oppure un dizionario
+    {'handler': 'nome_metodo' (default: il nome dello stato),
+     'next': 'stato_successivo' o None per finire}
+Uno stato può restituire il nome di un altro stato (es. la scelta del menu)
+oppure None per seguire 'next'; END termina subito la partita.
+
+on_state, se impostato, viene chiamato con il nome di ogni stato in cui si entra
+e con None quando la partita finisce o va in pausa (usato dai benchmark).
+Il checkpoint preso all'ingresso di ogni stato contiene stato, livello e
+punteggio; on_checkpoint, se impostato, lo riceve subito (il gioco ci legge il
+repository com'è in quel momento, vedi GitMasterQuest.enable_checkpoints).
+
+Da terminale il gioco non ha bisogno di un event loop (input() e git sono
+bloccanti, nessuna coroutine si sospende davvero): run_sync lo fa girare senza
+importare asyncio, che da solo costava più di tutto il resto dell'avvio.
+"""
+
+END = "__end__"
+
+
+def run_sync(coroutine):
+    """Esegue fino in fondo una coroutine che non si sospende mai; restituisce il risultato"""
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    coroutine.close()
+    raise RuntimeError("la partita si è sospesa in attesa dell'event loop: usare asyncio.run")
+
+
+class QuestEngine:
+    """Esegue gli stati del gioco uno dopo l'altro con stack costante"""
+
+    def __init__(self, game, states, start):
+        self.game = game
+        self.states = states
+        self.start = start
+        self.current = None
+        self.checkpoint = None
+        self.on_state = None
+        self.on_checkpoint = None
+        self._pause_requested = False
+
+    def pause(self):
+        """Chiede di fermarsi al prossimo cambio di stato"""
+        self._pause_requested = True
+
+    async def run(self, checkpoint=None):
+        """Gioca fino alla fine (None) o fino a una pausa (restituisce il checkpoint)"""
+        if checkpoint is not None:
+            self.restore(checkpoint)
+            state = checkpoint['state']
+        else:
+            state = self.start
+
+        self._pause_requested = False
+        while state is not None and state != END:
+            if state not in self.states:
+                raise KeyError(f"stato sconosciuto: {state}")
+            # Il checkpoint si prende all'ingresso: riprendendo, lo stato ricomincia
+            # da capo con il punteggio che il giocatore aveva in quel momento
+            self.current = state
+            self.checkpoint = self.snapshot(state)
+            if self.on_checkpoint is not None:
+                self.on_checkpoint(self.checkpoint)
+            if self._pause_requested:
+                self._notify(None)
+                return self.checkpoint
+            self._notify(state)
+
+            entry = self.states[state]
+            if isinstance(entry, dict):
+                result = await getattr(self.game, entry.get('handler', state))()
+                following = entry.get('next')
+            else:
+                result = await entry.run(self.game)
+                following = entry.next
+            state = result if result is not None else following
+
+        self.current = None
+        self._notify(None)
+        return None
+
+    def _notify(self, state):
+        if self.on_state is not None:
+            self.on_state(state)
+
+    def snapshot(self, state):
+        """Stato minimo per riprendere la partita più tardi"""
+        return {'state': state, 'level': self.game.level, 'score': self.game.score}
+
+    def resume_level(self, checkpoint):
+        """Livello che mostrerà il banner riprendendo checkpoint (lo stato può cambiarlo)"""
+        entry_level = getattr(self.states.get(checkpoint['state']), 'entry_level', None)
+        level = entry_level() if entry_level is not None else None
+        return checkpoint['level'] if level is None else level
+
+    def restore(self, checkpoint):
+        self.game.level = checkpoint['level']
+        self.game.score = checkpoint['score']
@@ -0,0 +1,408 @@
+"""
+Esecuzione dei comandi git per una sessione di gioco.
+
+Il gioco lanciava ogni comando con subprocess.run(shell=True): una shell e poi git,
+due fork/exec per ogni passo. GitWorker resta vivo per tutta la sessione e:
+• esegue git direttamente (senza /bin/sh) quando il comando non usa sintassi di shell
+• crea i branch (git branch X, git checkout -b X, git switch -c X) in-process,
+  scrivendo ref e reflog come farebbe git
+• risolve le revisioni con un unico processo `git cat-file --batch-check` persistente
+• mostra git log --oneline e git reflog leggendo .git (gitquest/history.py),
+  quando l'output va catturato e non a un terminale
+• riusa l'output già calcolato dei comandi di sola lettura quando lo stato del
+  repository è lo stesso, anche di un'altra sessione (gitquest/memo.py)
+Il risultato è sempre la tupla (successo, stdout, stderr) di run_command.
+
+probe_git() verifica all'avvio che git sia installato; l'esito resta in una
+piccola cache legata al binario (percorso, dimensione e mtime), così i lanci
+successivi non pagano il processo `git --version`.
+"""
+
+import json
+import os
+import re
+import shlex
+import shutil
+import subprocess
+import sys
+import time
+from functools import lru_cache
+
+ZERO_OID = "0" * 40
+
+# Valore di default di outputs: la cache condivisa, importata solo quando serve
+_SHARED = object()
+
+PROBE_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "__pycache__", "git-probe.json")
+
+# Caratteri che, fuori dagli apici, richiedono davvero una shell
+_SHELL_OPERATORS = set("|&;<>()*?[\n\\")
+
+# Nomi di branch che sappiamo gestire da soli; tutto il resto lo valida git
+_SIMPLE_BRANCH = re.compile(r"^(?![-.])(?!.*\.\.)(?!.*//)(?!.*/\.)(?!.*\.lock$)(?!.*[/.]$)[A-Za-z0-9._/-]+$")
+
+
+def needs_shell(command):
+    """Indica se il comando usa sintassi che solo la shell sa interpretare"""
+    quote = None
+    prev = " "
+    for ch in command:
+        if quote == "'":
+            if ch == "'":
+                quote = None
+        elif ch in "$`":
+            return True
+        elif quote == '"':
+            if ch == '"':
+                quote = None
+        elif ch in "'\"":
+            quote = ch
+        elif ch in _SHELL_OPERATORS or (ch == "~" and prev.isspace()):
+            return True
+        prev = ch
+    return quote is not None
+
+
+def split_command(command):
+    """Divide il comando in argv, oppure None se deve passare dalla shell"""
+    if needs_shell(command):
+        return None
+    try:
+        argv = shlex.split(command)
+    except ValueError:
+        return None
+    if not argv or _which(argv[0]) is None:
+        # Builtin della shell (cd, export...) o comando inesistente
+        return None
+    return argv
+
+
+@lru_cache(maxsize=64)
+def _which(program):
+    return shutil.which(program)
+
+
+@lru_cache(maxsize=None)
+def probe_git(cache_path=PROBE_CACHE):
+    """Versione di git installata ("git version 2.x"), oppure None se git manca"""
+    path = _which("git")
+    if path is None:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    key = [os.path.realpath(path), st.st_size, st.st_mtime_ns]
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached['key'] == key:
+            return cached['version']
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    try:
+        result = subprocess.run([path, "--version"], capture_output=True, text=True)
+    except OSError:
+        return None
+    if result.returncode != 0:
+        return None
+    version = result.stdout.strip()
+    # Se la directory non è scrivibile si va avanti senza cache
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({'key': key, 'version': version}, f)
+        os.replace(tmp, cache_path)
+    except OSError:
+        pass
+    return version
+
+
+class GitWorker:
+    """Worker git persistente associato a una sessione di gioco"""
+
+    def __init__(self, cwd, env=None, max_bytes=None, max_lines=None, outputs=_SHARED):
+        self.cwd = cwd
+        self.env = env
+        # Output memorizzati (gitquest/memo.py): di default quelli condivisi dal processo, None = nessuno
+        self.outputs = outputs
+        # Output catturato per flusso oltre il quale si tronca (None = default di gitquest/capture.py)
+        self.max_bytes = max_bytes
+        self.max_lines = max_lines
+        self._batch = None
+        # Uscita di git var per GIT_AUTHOR_IDENT / GIT_COMMITTER_IDENT, letta una volta per sessione
+        self._idents = {}
+        self._inspector = None
+        # Hash dei file del working tree per le impronte di gitquest/memo.py
+        self._tokens = {}
+        self.stats = {'in_process': 0, 'memo': 0, 'exec': 0, 'shell': 0}
+        # Exit code dell'ultimo comando (per la strumentazione)
+        self.returncode = None
+
+    def run(self, command, capture_output=True, limits=None, sink=None):
+        """Esegue un comando e restituisce (successo, stdout, stderr)
+
+        command è il testo di un comando dei contenuti, oppure l'argv di un comando
+        del giocatore già validato da gitquest/sandbox.py: quello non passa mai
+        dalla shell e gira entro limits. Con sink l'output catturato va al sink
+        man mano che arriva e stdout e stderr restituiti sono vuoti.
+        """
+        if isinstance(command, str):
+            argv = split_command(command)
+            if argv is None:
+                self.stats['shell'] += 1
+                return self._spawn(command, capture_output, shell=True, sink=sink)
+        else:
+            argv = command
+
+        if argv[0] == "git":
+            # Sul terminale git decora e colora l'output: lì le schermate le fa lui
+            result = self._try_in_process(argv[1:], display=capture_output or sink is not None)
+            if result is not None:
+                self.stats['in_process'] += 1
+                self.returncode = 0 if result[0] else 128
+                if capture_output and sink is None:
+                    return result
+                if sink is not None:
+                    sink(result[1] + result[2])
+                else:
+                    sys.stdout.write(result[1])
+                    sys.stderr.write(result[2])
+                return result[0], "", ""
+
+        key = None
+        if capture_output and sink is None:
+            key = self._memo_key(argv, limits.output if limits is not None else self.max_bytes)
+            if key is not None:
+                result = self.outputs.get(key)
+                if result is not None:
+                    self.stats['memo'] += 1
+                    self.returncode = 0
+                    return result
+
+        self.stats['exec'] += 1
+        if limits is not None:
+            from gitquest.sandbox import run_limited
+            self.returncode, output, error = run_limited(argv, self.cwd, self.env, limits, sink)
+            if not capture_output:
+                sys.stdout.write(output)
+                sys.stderr.write(error)
+                return self.returncode == 0, "", ""
+            result = self.returncode == 0, output, error
+        else:
+            result = self._spawn(argv, capture_output, shell=False, sink=sink)
+        if key is not None and result[0]:
+            self.outputs.put(key, result)
+        return result
+
+    def _memo_key(self, argv, max_bytes):
+        """Chiave dell'output memorizzato di argv nello stato attuale; None se non memorizzabile"""
+        if self.outputs is None or not os.path.isdir(os.path.join(self.cwd, ".git")):
+            return None
+        from gitquest.memo import SHARED_OUTPUTS, fingerprint, memoizable
+        if self.outputs is _SHARED:
+            self.outputs = SHARED_OUTPUTS
+        if not memoizable(argv):
+            return None
+        state = fingerprint(self.inspector(), self._tokens)
+        if state is None:
+            return None
+        env = None if self.env is None else tuple(sorted(self.env.items()))
+        return tuple(argv), max_bytes, self.max_lines, env, state
+
+    def write_file(self, name, content):
+        """Scrive un file nel working tree"""
+        with open(os.path.join(self.cwd, name), "w") as f:
+            f.write(content)
+
+    def read_file(self, name):
+        with open(os.path.join(self.cwd, name), "r") as f:
+            return f.read()
+
+    def remove_file(self, name):
+        os.remove(os.path.join(self.cwd, name))
+
+    def file_exists(self, name):
+        return os.path.exists(os.path.join(self.cwd, name))
+
+    def inspector(self):
+        """Inspector (gitquest/inspector.py) del repository, creato al primo uso"""
+        if self._inspector is None:
+            from gitquest.inspector import Inspector
+            self._inspector = Inspector(self.cwd)
+        return self._inspector
+
+    def close(self):
+        """Chiude il processo git persistente e i pack mappati in memoria"""
+        if self._inspector is not None:
+            self._inspector.objects.close()
+            self._inspector = None
+        self._tokens.clear()
+        if self._batch is not None:
+            try:
+                self._batch.stdin.close()
+                self._batch.wait(timeout=1)
+            except (OSError, subprocess.TimeoutExpired):
+                self._batch.kill()
+            self._batch = None
+
+    def _spawn(self, args, capture_output, shell, sink=None):
+        if capture_output:
+            from gitquest.capture import MAX_BYTES, MAX_LINES, run_captured
+            self.returncode, output, error = run_captured(args, self.cwd, self.env, shell, sink,
+                                                          self.max_bytes or MAX_BYTES, self.max_lines or MAX_LINES)
+            return self.returncode == 0, output, error
+        # Direttamente sul terminale: niente da trattenere, ma nemmeno un pager che aspetta "q"
+        env = dict(self.env if self.env is not None else os.environ, GIT_PAGER="cat")
+        result = subprocess.run(args, shell=shell, cwd=self.cwd, env=env)
+        self.returncode = result.returncode
+        return result.returncode == 0, "", ""
+
+    # --- Operazioni in-process -------------------------------------------
+
+    def _try_in_process(self, args, display=False):
+        """Gestisce da solo i comandi deterministici più comuni, o restituisce None"""
+        if len(args) == 2 and args[0] == "branch":
+            return self._create_branch(args[1], switch=False)
+        if len(args) == 3 and (args[:2] == ["checkout", "-b"] or args[:2] == ["switch", "-c"]):
+            return self._create_branch(args[2], switch=True)
+        if len(args) in (2, 3) and args[0] == "rev-parse" and args[1:-1] in ([], ["--verify"]):
+            oid = self.resolve(args[-1]) if not args[-1].startswith("-") else None
+            if oid is not None:
+                return True, oid + "\n", ""
+        if display and args[:1] in (["log"], ["reflog"]) and os.path.isdir(os.path.join(self.cwd, ".git")):
+            from gitquest.history import show
+            text = show(self.inspector(), args, self.env)
+            if text is not None:
+                return True, text, ""
+        return None
+
+    def _create_branch(self, name, switch):
+        git_dir = os.path.join(self.cwd, ".git")
+        if not _SIMPLE_BRANCH.match(name) or not os.path.isdir(git_dir):
+            return None
+        # Con una data forzata dall'ambiente lasciamo fare a git
+        if 'GIT_COMMITTER_DATE' in (self.env if self.env is not None else os.environ):
+            return None
+
+        try:
+            with open(os.path.join(git_dir, "HEAD")) as f:
+                head = f.read().strip()
+        except OSError:
+            return None
+        if not head.startswith("ref: refs/heads/"):
+            return None
+        current = head[len("ref: refs/heads/"):]
+
+        oid = self.resolve("HEAD")
+        if oid is None or self.resolve("refs/heads/" + name) is not None:
+            return None
+        ident = self._committer_ident()
+        if ident is None:
+            return None
+
+        ref = "refs/heads/" + name
+        if not self._write_locked(os.path.join(git_dir, ref), oid + "\n"):
+            return None
+        self._append_reflog(git_dir, ref, ZERO_OID, oid, ident, "branch: Created from HEAD")
+
+        if not switch:
+            return True, "", ""
+
+        if not self._write_locked(os.path.join(git_dir, "HEAD"), "ref: " + ref + "\n"):
+            return False, "", "fatal: impossibile aggiornare HEAD\n"
+        self._append_reflog(git_dir, "HEAD", oid, oid, ident,
+                            f"checkout: moving from {current} to {name}")
+        return True, "", f"Switched to a new branch '{name}'\n"
+
+    def _write_locked(self, path, content):
+        """Scrive un ref con lo stesso protocollo .lock + rename usato da git"""
+        lock = path + ".lock"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd = os.open(lock, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        except OSError:
+            return False
+        try:
+            os.write(fd, content.encode())
+        finally:
+            os.close(fd)
+        os.replace(lock, path)
+        return True
+
+    def _append_reflog(self, git_dir, ref, old, new, ident, message):
+        path = os.path.join(git_dir, "logs", ref)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        now = time.time()
+        tz = time.strftime("%z", time.localtime(now))
+        with open(path, "a") as f:
+            f.write(f"{old} {new} {ident} {int(now)} {tz}\t{message}\n")
+
+    def _committer_ident(self):
+        """Nome ed email del committer, letti una sola volta per sessione"""
+        ident = self._git_ident("COMMITTER")
+        # "Nome <email> timestamp fuso" -> teniamo solo "Nome <email>"
+        return None if ident is None else ident.rsplit(" ", 2)[0]
+
+    def _git_ident(self, who):
+        """Identità completa di AUTHOR o COMMITTER in questo momento: Nome <email> timestamp fuso"""
+        ident = self._idents.get(who)
+        if ident is None:
+            result = subprocess.run(["git", "var", f"GIT_{who}_IDENT"], capture_output=True,
+                                    text=True, cwd=self.cwd, env=self.env)
+            if result.returncode != 0:
+                return None
+            ident = self._idents[who] = result.stdout.strip()
+        # Con una data forzata dall'ambiente vale sempre quella, altrimenti l'ora attuale
+        if f"GIT_{who}_DATE" in (self.env if self.env is not None else os.environ):
+            return ident
+        now = time.time()
+        return f"{ident.rsplit(' ', 2)[0]} {int(now)} {time.strftime('%z', time.localtime(now))}"
+
+    def commit_batch(self, spec):
+        """Scrive in una volta i commit di spec (gitquest/builder.py) senza un processo per comando
+
+        False se non si può: allora vanno eseguiti i passi di builder.commands(spec).
+        """
+        if not os.path.isdir(os.path.join(self.cwd, ".git")):
+            return False
+        author = self._git_ident("AUTHOR")
+        committer = self._git_ident("COMMITTER")
+        if author is None or committer is None:
+            return False
+        from gitquest.builder import apply
+        if not apply(self.inspector(), spec, author, committer, self.env):
+            return False
+        self.stats['in_process'] += 1
+        return True
+
+    # --- Processo cat-file persistente -----------------------------------
+
+    def resolve(self, rev):
+        """Risolve una revisione nel suo hash senza lanciare nuovi processi"""
+        if not rev or any(c.isspace() for c in rev):
+            return None
+        if self._batch is None and not os.path.isdir(os.path.join(self.cwd, ".git")):
+            return None
+        for _ in range(2):
+            if self._batch is None:
+                self._batch = subprocess.Popen(["git", "cat-file", "--batch-check"],
+                                               stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                               stderr=subprocess.DEVNULL, text=True, bufsize=1,
+                                               cwd=self.cwd, env=self.env)
+            try:
+                self._batch.stdin.write(rev + "\n")
+                self._batch.stdin.flush()
+                line = self._batch.stdout.readline()
+            except OSError:
+                line = ""
+            if line:
+                parts = line.split()
+                if len(parts) == 3 and parts[1] != "missing":
+                    return parts[0]
+                return None
+            # Il processo è morto (es. repository appena creato): lo rilanciamo
+            self.close()
+        return None
@@ -0,0 +1,379 @@
+"""
+La partita: stato del giocatore, input/output e comandi git di una sessione.
+
+Sta in un modulo del pacchetto (e non in git-master-quest.py) perché Python
+ricompila da zero ad ogni lancio il codice dello script principale, mentre i
+moduli importati usano il bytecode già in __pycache__.
+"""
+
+import os
+import sys
+import time
+
+# Solo i moduli che servono per arrivare al banner: asyncio (il più costoso), git
+# simulato, salvataggi e server si importano quando servono davvero
+from gitquest.engine import END, QuestEngine
+from gitquest.inputs import ConsoleInput, InputTimeout
+from gitquest.levels import load_content
+from gitquest.render import Renderer
+from gitquest.workspace import QuotaExceeded, default_manager
+
+
+class GitMasterQuest:
+    def __init__(self, repo_dir=None, reader=None, out=None, executor=None, snapshots=None,
+                 practice=False, instruments=None, workspace=None, analytics=None, deterministic=False):
+        self.level = 1
+        self.score = 0
+        self.current_repo = None
+        # Senza una directory esplicita il repository vive in un workspace temporaneo
+        # (in RAM se possibile, vedi gitquest/workspace.py) con il suo limite di spazio
+        if workspace is None and repo_dir is None and not practice:
+            workspace = default_manager().create()
+        self.workspace = workspace
+        if workspace is not None:
+            repo_dir = workspace.path
+        self.repo_dir = repo_dir or "/pratica"
+        # Le risposte arrivano da una sorgente di gitquest/inputs.py (default: la tastiera);
+        # in modalità server input/output passano dalla connessione del giocatore
+        # e i comandi git girano nell'executor condiviso, senza bloccare gli altri
+        self.input = reader if reader is not None else ConsoleInput()
+        self.out = out or sys.stdout
+        # Ogni schermata esce con una sola write; colori solo se l'output è un terminale
+        self.render = Renderer(self.out)
+        self.colors = self.render.codes
+        self.executor = executor
+        # Modelli già pronti dei repository degli scenari (solo se la directory è nostra)
+        self.snapshots = snapshots
+        # Ultimo modello istanziato: i salvataggi memorizzano solo le differenze da lui
+        self.repo_template = None
+        # (checkpoint, repository) all'ingresso dello stato corrente, se enable_checkpoints
+        self._entry = None
+        # Livelli e quiz arrivano da gitquest/data/quest.json, compilati una volta per processo
+        self.content = load_content()
+        # Esito di check_resolution per ogni file in conflitto risolto dal giocatore
+        self.resolutions = {}
+        # Strumentazione dei comandi (gitquest/metrics.py): None = nessuna misura
+        self.instruments = instruments
+        # Risposte di questa partita per le statistiche (gitquest/analytics.py): None = non registrate
+        self.answers = analytics.session() if analytics is not None else None
+        # In modalità pratica il repository vive in memoria: niente disco, niente processi
+        self.practice = practice
+        if practice:
+            from gitquest.simulated import SimulatedGit, SimulatedSnapshots
+            self.git = SimulatedGit(self.repo_dir, out=self.out)
+            self.executor = None
+            if self.snapshots is None:
+                self.snapshots = SimulatedSnapshots(self.content.snapshots)
+        else:
+            from gitquest.executor import GitWorker
+            env = None
+            if deterministic:
+                # Identità, date e configurazione fisse come nei modelli: partite uguali
+                # producono gli stessi hash (il simulato ha già un orologio deterministico)
+                from gitquest.snapshots import TEMPLATE_ENV
+                env = dict(os.environ, **TEMPLATE_ENV)
+            self.git = GitWorker(repo_dir, env=env)
+        self.engine = QuestEngine(self, self.content.levels, self.content.start)
+
+    def print_colored(self, text, color='END'):
+        self.render.line(text, color)
+
+    def print_banner(self):
+        banner = """
+╔══════════════════════════════════════════════════════════════╗
+║                    🎮 GIT MASTER QUEST 🎮                    ║
+║                                                              ║
+║          Impara Git attraverso sfide pratiche!              ║
+║                                                              ║
+║    Livello: {level:<2}                              Punteggio: {score:<6} ║
+╚══════════════════════════════════════════════════════════════╝
+        """.format(level=self.level, score=self.score)
+        self.print_colored(banner, 'CYAN')
+
+    async def ask(self, prompt="", timeout=None):
+        """Legge una riga dal giocatore; InputTimeout se non risponde entro timeout secondi"""
+        self.render.write(prompt)
+        self.render.flush()
+        drain = getattr(self.out, 'drain', None)
+        if drain is not None:
+            await drain()
+        return await self.input.read(timeout)
+
+    async def wait_for_input(self, prompt="Premi INVIO per continuare..."):
+        await self.ask(f"\n{self.colors['YELLOW']}{prompt}{self.colors['END']}")
+
+    async def run_command(self, command, capture_output=True, policy=None):
+        """Esegue un comando e restituisce il risultato; con una policy il comando è del giocatore"""
+        if self.instruments is not None:
+            start = time.perf_counter()
+        argv = None
+        try:
+            if policy is None:
+                success, output, error, direct = await self._execute(command, capture_output)
+            else:
+                # Mai la shell: argv validato ed eseguito con i limiti di gitquest/sandbox.py
+                argv = policy.check(command)
+                from gitquest.sandbox import DEFAULT_LIMITS
+                success, output, error, direct = await self._execute(
+                    command if self.practice else argv, True, DEFAULT_LIMITS)
+        except Exception as e:
+            if self.instruments is not None:
+                self._record(command, argv, policy, time.perf_counter() - start, False, "", str(e), False, e)
+            return False, "", str(e)
+        if self.instruments is not None:
+            self._record(command, argv, policy, time.perf_counter() - start, success, output, error, direct, None)
+        if self.workspace is not None:
+            self.workspace.check()
+        if capture_output or direct:
+            return success, output, error
+        # In remoto (o senza terminale) l'output va al giocatore, non allo stdout del processo
+        self.render.write(output + error)
+        return success, "", ""
+
+    async def _execute(self, command, capture_output, limits=None):
+        """Esegue il comando; l'ultimo valore indica se l'output è già arrivato al giocatore"""
+        options = {}
+        # Limiti e streaming valgono solo per git vero (il simulato non lancia processi)
+        if limits is not None and not self.practice:
+            options['limits'] = limits
+        streaming = not capture_output and not self.practice
+        if self.executor is not None:
+            import asyncio
+            from functools import partial
+            loop = asyncio.get_running_loop()
+            if streaming:
+                # Dal thread di git al giocatore man mano, senza accumulare l'output
+                options['sink'] = lambda text: loop.call_soon_threadsafe(self._stream, text)
+            success, output, error = await loop.run_in_executor(
+                self.executor, partial(self.git.run, command, True, **options))
+            return success, output, error, streaming
+        if capture_output or self.out is not sys.stdout:
+            if streaming:
+                options['sink'] = self.render.write
+            return self.git.run(command, True, **options) + (streaming,)
+        # git scrive da solo sul terminale: prima deve uscire il testo già in coda
+        self.render.flush()
+        return self.git.run(command, False) + (True,)
+
+    def _stream(self, text):
+        """Un pezzo di output di un comando in corso, inviato subito"""
+        self.render.write(text)
+        self.render.flush()
+
+    def _record(self, command, argv, policy, duration, success, output, error, direct, exception):
+        """Passa l'evento alla strumentazione (byte ignoti se l'output è già stato mostrato)
+
+        L'etichetta viene dall'argv accettato dalla policy, mai dal testo del giocatore;
+        i comandi dei contenuti sono fidati e si dividono sugli spazi.
+        """
+        from gitquest.metrics import REJECTED, CommandEvent, command_label
+        if policy is None:
+            label = command_label(command.split(None, 2))
+        else:
+            label = REJECTED if argv is None else command_label(argv)
+        self.instruments.record(CommandEvent(
+            command, label, self.engine.current, duration, success,
+            None if exception else getattr(self.git, 'returncode', None),
+            None if direct else len(output.encode("utf-8")),
+            None if direct else len(error.encode("utf-8")),
+            type(exception).__name__ if exception else None))
+
+    async def load_snapshot(self, name):
+        """Sostituisce il repository con il modello pronto dello scenario, se disponibile"""
+        if self.snapshots is None:
+            return False
+        if self.practice:
+            if not self.snapshots.simulable(name):
+                return False
+            self.snapshots.instantiate(name, self.git)
+            return True
+        # Il processo git persistente punterebbe agli oggetti del repository vecchio
+        self.git.close()
+        if self.executor is None:
+            self.snapshots.instantiate(name, self.repo_dir)
+        else:
+            import asyncio
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self.executor, self.snapshots.instantiate, name, self.repo_dir)
+        self.repo_template = name
+        if self.workspace is not None:
+            self.workspace.check()
+        return True
+
+    def answer_key(self, name):
+        """Risposte della ricetta name cercate nel repository attuale (senza modello pronto)"""
+        answers = self.content.snapshots[name].get('answers')
+        if not answers:
+            return {}
+        from gitquest.snapshots import answer_key
+        return answer_key(self.repo_state(), answers)
+
+    async def resolve_commit(self, rev):
+        """Hash del commit a cui git risolve rev (git rev-parse --verify rev^{commit}); None se non c'è"""
+        if not rev or rev.startswith("-") or any(c.isspace() for c in rev):
+            return None
+        import shlex
+        success, output, _ = await self.run_command(
+            f"git rev-parse --verify --quiet {shlex.quote(rev + '^{commit}')}")
+        oid = output.strip()
+        return oid if success and oid else None
+
+    async def build_commits(self, spec):
+        """Crea i commit di spec in una volta (gitquest/builder.py); False se vanno fatti comando per comando"""
+        if self.practice:
+            return False
+        if self.executor is None:
+            done = self.git.commit_batch(spec)
+        else:
+            import asyncio
+            loop = asyncio.get_running_loop()
+            done = await loop.run_in_executor(self.executor, self.git.commit_batch, spec)
+        if done and self.workspace is not None:
+            self.workspace.check()
+        return done
+
+    def repo_state(self):
+        """Chi risponde alle verifiche sul repository: SimulatedGit in pratica, altrimenti un Inspector"""
+        if self.practice:
+            return self.git
+        return self.git.inspector()
+
+    async def build_recipe(self, name):
+        """Senza modelli pronti: esegue la ricetta del modello direttamente nel repository
+
+        False in modalità pratica, dove le ricette con storie generate non si possono simulare.
+        """
+        if self.practice:
+            return False
+        from gitquest.snapshots import populate
+        self.git.close()
+        if self.executor is None:
+            populate(self.repo_dir, self.content.snapshots, name)
+        else:
+            import asyncio
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self.executor, populate, self.repo_dir, self.content.snapshots, name)
+        self.repo_template = None
+        if self.workspace is not None:
+            self.workspace.check()
+        return True
+
+    async def check_git_installed(self):
+        """Verifica se Git è installato"""
+        if self.practice:
+            success, _, _ = await self.run_command("git --version")
+        else:
+            # Esito ricordato tra un lancio e l'altro finché il binario di git non cambia
+            from gitquest.executor import probe_git
+            success = probe_git() is not None
+        if not success:
+            self.print_colored("❌ Git non è installato! Installa Git prima di continuare.", 'RED')
+            return False
+        return True
+
+    async def play(self, checkpoint=None):
+        """Gioca dall'inizio o da un checkpoint; restituisce il checkpoint se messo in pausa"""
+        if checkpoint is not None and checkpoint.get('repo') is not None:
+            await self.restore_repo(checkpoint['repo'])
+        try:
+            return await self.engine.run(checkpoint)
+        except QuotaExceeded as e:
+            self.print_colored(f"\n💾 Partita interrotta: {e}.", 'RED')
+            return None
+        except InputTimeout:
+            self.print_colored("\n⏰ Partita chiusa per inattività.", 'YELLOW')
+            raise
+        finally:
+            self.render.flush()
+
+    def enable_checkpoints(self):
+        """Da qui in poi all'ingresso di ogni stato si ricorda il repository (per save_point)"""
+        self.engine.on_checkpoint = self._capture_entry
+
+    def _capture_entry(self, checkpoint):
+        # Lo stato ripreso ricomincia dal primo passo: il repository deve essere quello di adesso.
+        # Su disco senza gli oggetti, che si aggiungono solo salvando
+        if self.practice:
+            self._entry = (checkpoint, ('pratica', self.git.state()))
+            return
+        from gitquest.checkpoint import capture_directory
+        template = self._template_dir(self.repo_template)
+        self._entry = (checkpoint, ('disco', self.repo_template,
+                                    capture_directory(self.repo_dir, template, objects=False)))
+
+    def _template_dir(self, name):
+        return self.snapshots.template_path(name) if name is not None else None
+
+    def save_point(self):
+        """Checkpoint da salvare: lo stato corrente con il repository di quando è cominciato
+
+        None se la partita non è ancora entrata in uno stato. Senza enable_checkpoints
+        il repository è quello di adesso.
+        """
+        checkpoint = self.engine.checkpoint
+        if checkpoint is None:
+            return None
+        from gitquest.checkpoint import capture_directory, capture_objects, join_images
+        entry = self._entry
+        if entry is None or entry[0] is not checkpoint:
+            if self.practice:
+                return dict(checkpoint, repo=('pratica', self.git.state()))
+            image = capture_directory(self.repo_dir, self._template_dir(self.repo_template))
+            return dict(checkpoint, repo=('disco', self.repo_template, image))
+        repo = entry[1]
+        if repo[0] == 'pratica':
+            return dict(checkpoint, repo=repo)
+        _, template, image = repo
+        # Gli oggetti non cambiano mai: quelli di adesso comprendono quelli dell'ingresso
+        objects = capture_objects(self.repo_dir, self._template_dir(template))
+        return dict(checkpoint, repo=('disco', template, join_images(image, objects)))
+
+    async def restore_repo(self, repo):
+        """Ricrea il repository salvato da save_point"""
+        from gitquest.checkpoint import CheckpointError
+        if repo[0] == 'pratica':
+            try:
+                self.git.load_state(repo[1])
+            except (TypeError, ValueError, KeyError, AttributeError) as e:
+                raise CheckpointError(f"stato della modalità pratica illeggibile: {e}")
+            return
+        from gitquest.checkpoint import restore_directory
+        from gitquest.snapshots import clear_directory
+        _, template, image = repo
+        if template is not None and self.snapshots is None:
+            raise CheckpointError("il salvataggio richiede i modelli degli scenari")
+        self.git.close()
+
+        def restore():
+            if template is not None:
+                self.snapshots.instantiate(template, self.repo_dir)
+            else:
+                clear_directory(self.repo_dir)
+            restore_directory(self.repo_dir, image)
+
+        if self.executor is None:
+            restore()
+        else:
+            import asyncio
+            await asyncio.get_running_loop().run_in_executor(self.executor, restore)
+        self.repo_template = template
+
+    async def check_git(self):
+        """Passo iniziale: senza Git la partita non può cominciare"""
+        if not await self.check_git_installed():
+            return END
+
+    def write_file(self, name, content):
+        """Scrive un file nel repository del giocatore (su disco o in memoria)"""
+        if self.workspace is not None:
+            self.workspace.check(len(content.encode("utf-8")))
+        self.git.write_file(name, content)
+
+    def read_file(self, name):
+        return self.git.read_file(name)
+
+    def remove_file(self, name):
+        self.git.remove_file(name)
+
+    def file_exists(self, name):
+        return self.git.file_exists(name)
@@ -0,0 +1,63 @@
+"""
+Partite senza giocatore: le risposte arrivano da un copione e l'output finisce
+in un buffer invece che sul terminale.
+
+Serve per i benchmark (quante partite complete al secondo regge una macchina),
+per le regressioni e per provare i livelli senza digitare a mano.
+
+Un copione è un file di testo con una risposta per riga, nell'ordine in cui il
+gioco le chiede; le righe vuote equivalgono a premere INVIO.
+"""
+
+import asyncio
+import importlib.util
+import io
+import os
+
+from gitquest.inputs import ScriptedInput
+
+SCRIPT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "git-master-quest.py")
+
+
+class BufferedOutput(io.StringIO):
+    """Output in memoria con la stessa interfaccia di SessionOutput"""
+
+    async def drain(self):
+        pass
+
+
+def load_transcript(path):
+    """Legge un copione: una risposta per riga"""
+    with open(path, encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+def load_game_class(path=SCRIPT_PATH):
+    """Carica GitMasterQuest dallo script principale (il nome col trattino non è importabile)"""
+    spec = importlib.util.spec_from_file_location("git_master_quest", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.GitMasterQuest
+
+
+async def play_scripted(game_class, answers, echo=True, **options):
+    """Gioca una partita intera con le risposte date; restituisce (gioco, output, finita)
+
+    finita è False se il copione si è esaurito prima della fine del gioco.
+    """
+    out = BufferedOutput()
+    reader = ScriptedInput(answers, echo=out if echo else None)
+    game = game_class(reader=reader, out=out, **options)
+    try:
+        await game.play()
+        finished = True
+    except EOFError:
+        finished = False
+    finally:
+        game.git.close()
+    return game, out.getvalue(), finished
+
+
+def run_scripted(game_class, answers, echo=True, **options):
+    """Versione bloccante di play_scripted"""
+    return asyncio.run(play_scripted(game_class, answers, echo=echo, **options))
@@ -0,0 +1,211 @@
+"""
+Le schermate di git log e git reflog calcolate senza lanciare git.
+
+Gli scenari mostrano spesso la storia (`git log --oneline experimental -3`,
+`git reflog --oneline -10`) e il giocatore la chiede di continuo: ogni volta
+era un processo git. show() produce lo stesso testo leggendo ref, reflog e
+oggetti con gitquest/inspector.py:
+• git log --oneline [-N | -n N | --max-count=N] [revisioni...]
+• git reflog [show] [--oneline] [-N | -n N] [HEAD | branch]
+con gli hash abbreviati come git (core.abbrev=auto e prefissi non ambigui) e
+nell'ordine di git (data del committer, poi ordine di arrivo).
+
+Tutto ciò che potrebbe rendere diverso l'output di git (altre opzioni,
+revisioni con ~ o ^, configurazione di log/format/color, note, replace,
+repository shallow, oggetti mancanti, variabili GIT_DIR & co.) fa restituire
+None, e il comando lo esegue git come prima.
+"""
+
+import os
+
+# Variabili d'ambiente con cui git leggerebbe un altro repository o un'altra configurazione
+_UNSAFE_ENV = ("GIT_DIR", "GIT_WORK_TREE", "GIT_COMMON_DIR", "GIT_OBJECT_DIRECTORY",
+               "GIT_ALTERNATE_OBJECT_DIRECTORIES", "GIT_CONFIG", "GIT_CONFIG_PARAMETERS",
+               "GIT_REPLACE_REF_BASE", "GIT_GRAFT_FILE",
+               "GIT_NAMESPACE", "GIT_NOTES_REF", "GIT_NOTES_DISPLAY_REF")
+
+# Sezioni e chiavi di configurazione che cambiano queste schermate (in minuscolo)
+_CONFIG_MARKERS = ("[log", "[format", "[pretty", "[color", "[i18n", "[include", "[notes", "abbrev")
+
+# File che cambiano la storia vista da git
+_HISTORY_FILES = ("shallow", "info/grafts", "objects/info/alternates")
+
+
+def show(inspector, args, env=None):
+    """Il testo di git log / git reflog con questi argomenti, o None se deve pensarci git"""
+    if not args or not plain_setup(inspector, env):
+        return None
+    if args[0] == "log":
+        return _log(inspector, args[1:])
+    if args[0] == "reflog":
+        return _reflog(inspector, args[1:])
+    return None
+
+
+def plain_setup(inspector, env=None):
+    """True se repository, ambiente e configurazione non cambiano l'output predefinito di git"""
+    env = os.environ if env is None else env
+    if any(name in env for name in _UNSAFE_ENV):
+        return False
+    pairs = config_env(env)
+    if pairs is None:
+        return False
+    text = "".join(f"[{key}]\n{value}\n" for key, value in pairs).lower()
+    if any(marker in text for marker in _CONFIG_MARKERS):
+        return False
+    git_dir = inspector.git_dir
+    if any(os.path.exists(os.path.join(git_dir, name)) for name in _HISTORY_FILES):
+        return False
+    if inspector.refs("refs/replace/") or inspector.refs("refs/notes/"):
+        return False
+    for path in config_paths(inspector, env):
+        try:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                text = f.read().lower()
+        except OSError:
+            continue
+        if any(marker in text for marker in _CONFIG_MARKERS):
+            return False
+    return True
+
+
+def config_paths(inspector, env=None):
+    """I file di configurazione che git leggerebbe nel repository, dal più specifico"""
+    env = os.environ if env is None else env
+    configs = [os.path.join(inspector.git_dir, "config")]
+    if "GIT_CONFIG_GLOBAL" in env:
+        configs.append(env["GIT_CONFIG_GLOBAL"])
+    else:
+        home = env.get("HOME", "")
+        configs.append(os.path.join(env.get("XDG_CONFIG_HOME") or os.path.join(home, ".config"), "git", "config"))
+        if home:
+            configs.append(os.path.join(home, ".gitconfig"))
+    if not env.get("GIT_CONFIG_NOSYSTEM"):
+        configs.append(env.get("GIT_CONFIG_SYSTEM", "/etc/gitconfig"))
+    return configs
+
+
+def config_env(env=None):
+    """Coppie (chiave, valore) date con GIT_CONFIG_COUNT e GIT_CONFIG_KEY_n/VALUE_n; None se git le rifiuterebbe"""
+    env = os.environ if env is None else env
+    count = env.get("GIT_CONFIG_COUNT")
+    if count is None:
+        return []
+    if not count.isdigit():
+        return None
+    pairs = []
+    for i in range(int(count)):
+        key = env.get(f"GIT_CONFIG_KEY_{i}")
+        value = env.get(f"GIT_CONFIG_VALUE_{i}")
+        if not key or value is None:
+            return None
+        pairs.append((key, value))
+    return pairs
+
+
+def _limit(args, i):
+    """(limite, indice successivo) se args[i] è un limite di git log, altrimenti None"""
+    arg = args[i]
+    if arg[:1] == "-" and arg[1:].isdigit():
+        return int(arg[1:]), i + 1
+    if arg in ("-n", "--max-count") and i + 1 < len(args) and args[i + 1].isdigit():
+        return int(args[i + 1]), i + 2
+    if arg.startswith("-n") and arg[2:].isdigit():
+        return int(arg[2:]), i + 1
+    if arg.startswith("--max-count=") and arg[12:].isdigit():
+        return int(arg[12:]), i + 1
+    return None
+
+
+def _dwim(inspector, name):
+    """Il ref completo a cui git risolverebbe name, se è uno solo; None altrimenti"""
+    if name == "HEAD":
+        return "HEAD"
+    if not name or name.startswith("-") or any(c in name for c in "~^:@{}*?[\\") or name.endswith("/"):
+        return None
+    # Un file con quel nome direttamente in .git (FETCH_HEAD, ORIG_HEAD...) lo decide git
+    if os.path.lexists(os.path.join(inspector.git_dir, name)):
+        return None
+    candidates = ("refs/" + name, "refs/tags/" + name, "refs/heads/" + name, "refs/remotes/" + name,
+                  "refs/remotes/" + name + "/HEAD")
+    found = [ref for ref in candidates if inspector.ref(ref) is not None]
+    # Con più candidati git avvisa che il nome è ambiguo: lo lasciamo dire a lui
+    return found[0] if len(found) == 1 else None
+
+
+def _log(inspector, args):
+    oneline = False
+    limit = None
+    refs = []
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        parsed = _limit(args, i)
+        if parsed is not None:
+            limit, i = parsed
+            continue
+        if arg == "--oneline":
+            oneline = True
+        elif arg.startswith("-"):
+            return None
+        else:
+            # Un file con lo stesso nome renderebbe l'argomento ambiguo
+            if os.path.lexists(os.path.join(inspector.repo_dir, arg)):
+                return None
+            ref = _dwim(inspector, arg)
+            if ref is None:
+                return None
+            refs.append(ref)
+        i += 1
+    if not oneline:
+        return None
+    starts = [inspector.ref(ref) for ref in refs or ["HEAD"]]
+    if None in starts:
+        # HEAD senza commit: il messaggio d'errore è di git
+        return None
+    commits = inspector.log(starts, limit)
+    if commits is None or any(commit.encoding for _, commit in commits):
+        return None
+    store = inspector.objects
+    length = store.abbrev_length()
+    return "".join(f"{store.abbrev(oid, length)} {commit.subject}\n" for oid, commit in commits)
+
+
+def _reflog(inspector, args):
+    if args and args[0] == "show":
+        args = args[1:]
+    limit = None
+    name = None
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        parsed = _limit(args, i)
+        if parsed is not None:
+            limit, i = parsed
+            continue
+        if arg.startswith("-"):
+            if arg != "--oneline":
+                return None
+        elif name is None:
+            name = arg
+        else:
+            return None
+        i += 1
+    name = name or "HEAD"
+    ref = _dwim(inspector, name)
+    if ref is None:
+        return None
+    entries = inspector.reflog(ref)
+    if not entries:
+        return None
+    store = inspector.objects
+    length = store.abbrev_length()
+    lines = []
+    for position, entry in enumerate(reversed(entries)):
+        if limit is not None and position >= limit:
+            break
+        # Voci di cancellazione o commit spariti: git le tratta a modo suo
+        if inspector.commit(entry.new) is None:
+            return None
+        lines.append(f"{store.abbrev(entry.new, length)} {name}@{{{position}}}: {entry.message}\n")
+    return "".join(lines)
@@ -0,0 +1,116 @@
+"""
+Da dove arrivano le risposte del giocatore.
+
+Tutti i livelli e gli scenari chiedono le righe a GitMasterQuest.ask, che le
+legge da una sorgente con la stessa interfaccia in tutte le modalità:
+    await source.read(timeout=None) -> riga senza a capo
+    source.cancel()                 -> la lettura in corso e le successive finiscono
+Sorgenti:
+• ConsoleInput: la tastiera (stdin). Non si sospende mai, quindi funziona anche
+  con run_sync senza event loop; il timeout richiede un terminale (select)
+• StreamInput: la connessione di un giocatore in modalità server (asyncio)
+• ScriptedInput: le risposte di un copione (gitquest/headless.py)
+
+A fine input si solleva EOFError. Allo scadere del timeout (quello del prompt
+o, se manca, quello di inattività della sorgente) si solleva InputTimeout, che
+è un EOFError: chi gestiva già la disconnessione (salvataggio della partita,
+chiusura della sessione) gestisce allo stesso modo il giocatore inattivo.
+"""
+
+import sys
+from collections import deque
+
+
+class InputTimeout(EOFError):
+    """Il giocatore non ha risposto in tempo"""
+
+
+class ConsoleInput:
+    """Righe dallo stdin del processo"""
+
+    def __init__(self, timeout=None, stream=None):
+        # Secondi di inattività dopo cui la partita finisce (None = mai)
+        self.timeout = timeout
+        self.stream = stream
+        self.cancelled = False
+
+    async def read(self, timeout=None):
+        if self.cancelled:
+            raise EOFError("input annullato")
+        stream = self.stream or sys.stdin
+        timeout = timeout if timeout is not None else self.timeout
+        # Da una pipe lo stdin è bufferizzato e select non vede le righe già lette
+        if timeout is None or not stream.isatty():
+            if stream is sys.stdin:
+                return input()
+            line = stream.readline()
+        else:
+            import select
+            ready, _, _ = select.select([stream], [], [], timeout)
+            if not ready:
+                raise InputTimeout(f"nessuna risposta in {timeout:g} secondi")
+            line = stream.readline()
+        if not line:
+            raise EOFError("fine dell'input")
+        return line.rstrip("\r\n")
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class StreamInput:
+    """Righe da un asyncio.StreamReader (la connessione di un giocatore)"""
+
+    def __init__(self, reader, timeout=None):
+        self.reader = reader
+        self.timeout = timeout
+        self.cancelled = False
+        self._pending = None
+
+    async def read(self, timeout=None):
+        import asyncio
+        if self.cancelled:
+            raise EOFError("input annullato")
+        timeout = timeout if timeout is not None else self.timeout
+        # Un futuro a parte, così cancel() può interrompere solo l'attesa della riga
+        self._pending = asyncio.ensure_future(self.reader.readline())
+        try:
+            line = await asyncio.wait_for(self._pending, timeout)
+        except asyncio.TimeoutError:
+            raise InputTimeout(f"nessuna risposta in {timeout:g} secondi") from None
+        except asyncio.CancelledError:
+            if not self.cancelled:
+                raise
+            raise EOFError("input annullato") from None
+        finally:
+            self._pending = None
+        if not line:
+            raise EOFError("connessione chiusa")
+        return line.decode("utf-8", "replace").rstrip("\r\n")
+
+    def cancel(self):
+        self.cancelled = True
+        if self._pending is not None:
+            self._pending.cancel()
+
+
+class ScriptedInput:
+    """Le risposte di un copione, una per lettura; il timeout non scade mai"""
+
+    def __init__(self, answers, echo=None):
+        self.answers = deque(answers)
+        # Se indicato, ogni risposta viene ricopiata nell'output come se fosse stata digitata
+        self.echo = echo
+        self.timeout = None
+        self.cancelled = False
+
+    async def read(self, timeout=None):
+        if self.cancelled or not self.answers:
+            raise EOFError("copione finito")
+        answer = self.answers.popleft()
+        if self.echo is not None:
+            self.echo.write(answer + "\n")
+        return answer
+
+    def cancel(self):
+        self.cancelled = True
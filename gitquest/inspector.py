@@ -0,0 +1,498 @@
+"""
+Lettura diretta dello stato di un repository, senza lanciare git.
+
+Per sapere se il giocatore ha davvero fatto quello che doveva (HEAD sul branch
+giusto, file nello staging, commit sparito da main) i livelli potevano solo
+fidarsi del testo digitato o rilanciare git status / git log. Inspector legge
+invece i file di .git:
+• HEAD e i ref, sia sciolti (refs/heads/...) sia in packed-refs
+• l'index (formato DIRC, versioni 2, 3 e 4)
+• i reflog (logs/HEAD, logs/refs/...)
+• gli oggetti, sciolti o nei pack, con ObjectStore di gitquest/objects.py
+  (e la sua cache condivisa tra le sessioni)
+Ogni file letto viene tenuto in memoria già analizzato, con la chiave
+(mtime, dimensione, inode): finché git non lo riscrive una nuova domanda costa
+una stat. Come per il "racy git", un file cambiato da meno di RACY_NS si
+rilegge sempre: l'orologio dei file avanza a scatti e gli inode liberati si
+riusano, quindi due scritture ravvicinate possono lasciare la stessa chiave. Le verifiche dei livelli ({"check": ...} in gitquest/levels.py) usano
+le stesse domande anche in modalità pratica, dove le fa SimulatedGit; le
+schermate di git log e git reflog (gitquest/history.py) usano log().
+"""
+
+import hashlib
+import heapq
+import os
+import stat
+import struct
+import time
+from collections import deque
+
+from gitquest.objects import ObjectStore
+
+_INDEX_HEADER = struct.Struct(">4sII")
+# ctime, mtime (secondi e nanosecondi), dev, ino, mode, uid, gid, size, oid, flags
+_INDEX_ENTRY = struct.Struct(">10I20sH")
+
+# Flag delle voci dell'index
+_EXTENDED = 0x4000
+_SKIP_WORKTREE = 0x4000  # nei flag estesi
+_INTENT_TO_ADD = 0x2000  # nei flag estesi
+
+# Cartelle in cui cercare un nome abbreviato, nell'ordine di git rev-parse
+_REF_PREFIXES = ("", "refs/", "refs/tags/", "refs/heads/", "refs/remotes/")
+
+# Commit da visitare al massimo cercando un messaggio nella storia di un branch
+HISTORY_LIMIT = 200
+
+# Da quanto deve essere fermo un file perché i suoi dati di stat bastino a dire che non è cambiato
+RACY_NS = 2_000_000_000
+
+# Commit già analizzati tenuti da ogni Inspector (un hash indica sempre lo stesso commit)
+COMMIT_MEMO = 4096
+
+
+class IndexEntry:
+    """Una voce dell'index: il file com'era quando è stato aggiunto"""
+
+    __slots__ = ('path', 'mode', 'oid', 'stage', 'size', 'mtime', 'skip_worktree', 'intent_to_add', 'ctime',
+                 'ino')
+
+    def __init__(self, path, mode, oid, stage, size, mtime, skip_worktree=False, intent_to_add=False,
+                 ctime=0, ino=0):
+        self.path = path
+        self.mode = mode
+        self.oid = oid
+        self.stage = stage
+        self.size = size
+        # In nanosecondi, come st_mtime_ns e st_ctime_ns
+        self.mtime = mtime
+        self.ctime = ctime
+        # Troncato a 32 bit, come lo scrive git
+        self.ino = ino
+        self.skip_worktree = skip_worktree
+        self.intent_to_add = intent_to_add
+
+
+class Index:
+    """L'index analizzato: voci normali e percorsi in conflitto"""
+
+    __slots__ = ('version', 'entries', 'unmerged', '_key')
+
+    def __init__(self, version, entries, unmerged):
+        self.version = version
+        # percorso -> IndexEntry (stage 0)
+        self.entries = entries
+        # percorso -> {stage: IndexEntry} per i file in conflitto
+        self.unmerged = unmerged
+        self._key = None
+
+    def content_key(self):
+        """Hash delle voci senza i dati di stat: uguale per index con lo stesso contenuto"""
+        if self._key is None:
+            digest = hashlib.blake2b(digest_size=16)
+            every = list(self.entries.values())
+            for stages in self.unmerged.values():
+                every.extend(stages.values())
+            for entry in sorted(every, key=lambda e: (e.path, e.stage)):
+                digest.update(f"{entry.path}\0{entry.mode:o} {entry.oid} {entry.stage} "
+                              f"{entry.skip_worktree:d}{entry.intent_to_add:d}\n".encode("utf-8", "surrogateescape"))
+            self._key = digest.digest()
+        return self._key
+
+
+class Commit:
+    """Le parti di un commit che servono a verifiche e schermate"""
+
+    __slots__ = ('tree', 'parents', 'time', 'subject', 'encoding')
+
+    def __init__(self, tree, parents, time, subject, encoding=None):
+        self.tree = tree
+        self.parents = parents
+        # Data del committer (secondi dall'epoca): l'ordine di git log
+        self.time = time
+        # Il titolo come in git log --oneline: il primo paragrafo su una riga
+        self.subject = subject
+        # Codifica dichiarata dal commit (None = UTF-8)
+        self.encoding = encoding
+
+
+class ReflogEntry:
+    __slots__ = ('old', 'new', 'who', 'time', 'message')
+
+    def __init__(self, old, new, who, time, message):
+        self.old = old
+        self.new = new
+        self.who = who
+        self.time = time
+        self.message = message
+
+
+def parse_index(data):
+    """Index dai byte del file; ValueError se non è un index di git"""
+    signature, version, count = _INDEX_HEADER.unpack_from(data)
+    if signature != b"DIRC" or version not in (2, 3, 4):
+        raise ValueError(f"index non riconosciuto (versione {version})")
+    entries = {}
+    unmerged = {}
+    offset = _INDEX_HEADER.size
+    previous = b""
+    for _ in range(count):
+        fields = _INDEX_ENTRY.unpack_from(data, offset)
+        ctime = fields[0] * 1_000_000_000 + fields[1]
+        mtime = fields[2] * 1_000_000_000 + fields[3]
+        mode, size, oid, flags = fields[6], fields[9], fields[10], fields[11]
+        start = offset
+        offset += _INDEX_ENTRY.size
+        extended = 0
+        if flags & _EXTENDED and version >= 3:
+            extended = struct.unpack_from(">H", data, offset)[0]
+            offset += 2
+        if version == 4:
+            # Il nome riusa l'inizio del precedente: si toglie un numero di byte (varint) e si aggiunge il resto
+            strip, offset = _varint(data, offset)
+            end = data.index(b"\0", offset)
+            name = previous[:len(previous) - strip] + data[offset:end]
+            offset = end + 1
+        else:
+            end = data.index(b"\0", offset)
+            name = data[offset:end]
+            # Voci allineate a 8 byte, con almeno un NUL finale
+            offset = start + ((end - start + 8) & ~7)
+        previous = name
+        entry = IndexEntry(name.decode("utf-8", "surrogateescape"), mode, oid.hex(), (flags >> 12) & 3,
+                           size, mtime, bool(extended & _SKIP_WORKTREE), bool(extended & _INTENT_TO_ADD),
+                           ctime, fields[5])
+        if entry.stage:
+            unmerged.setdefault(entry.path, {})[entry.stage] = entry
+        else:
+            entries[entry.path] = entry
+    return Index(version, entries, unmerged)
+
+
+def _varint(data, offset):
+    """Intero a lunghezza variabile dell'index v4 (la codifica "offset" di git)"""
+    byte = data[offset]
+    offset += 1
+    value = byte & 0x7f
+    while byte & 0x80:
+        byte = data[offset]
+        offset += 1
+        value = ((value + 1) << 7) | (byte & 0x7f)
+    return value, offset
+
+
+def parse_packed_refs(data):
+    """nome -> oid da packed-refs (le righe ^ dei tag annotati si ignorano)"""
+    refs = {}
+    for line in data.decode("utf-8", "surrogateescape").splitlines():
+        if not line or line[0] in "#^":
+            continue
+        oid, _, name = line.partition(" ")
+        refs[name] = oid
+    return refs
+
+
+def parse_reflog(data):
+    """Voci di un reflog, dalla più vecchia"""
+    entries = []
+    for line in data.decode("utf-8", "surrogateescape").splitlines():
+        head, _, message = line.partition("\t")
+        parts = head.split(" ", 2)
+        if len(parts) < 3:
+            continue
+        who, _, when = parts[2].rpartition(">")
+        timestamp = when.split()[0] if when.split() else "0"
+        entries.append(ReflogEntry(parts[0], parts[1], who + ">", int(timestamp), message))
+    return entries
+
+
+def _parse_commit(data):
+    """Commit dai byte dell'oggetto"""
+    header, _, message = data.partition(b"\n\n")
+    tree = None
+    parents = []
+    time = 0
+    encoding = None
+    for line in header.split(b"\n"):
+        key, _, value = line.partition(b" ")
+        if key == b"tree":
+            tree = value.decode()
+        elif key == b"parent":
+            parents.append(value.decode())
+        elif key == b"committer":
+            fields = value.rsplit(b" ", 2)
+            time = int(fields[1]) if len(fields) == 3 and fields[1].isdigit() else 0
+        elif key == b"encoding":
+            encoding = value.decode("ascii", "replace")
+    # Come git: si saltano le righe vuote iniziali e il primo paragrafo diventa una riga sola
+    lines = []
+    for line in message.decode("utf-8", "replace").split("\n"):
+        if not line.strip():
+            if lines:
+                break
+            continue
+        lines.append(line.rstrip())
+    return Commit(tree, tuple(parents), time, " ".join(lines), encoding)
+
+
+def _parse_tree(data):
+    """nome -> (modo, oid) da un tree"""
+    entries = {}
+    offset = 0
+    while offset < len(data):
+        space = data.index(b" ", offset)
+        nul = data.index(b"\0", space)
+        name = data[space + 1:nul].decode("utf-8", "surrogateescape")
+        entries[name] = (data[offset:space].decode(), data[nul + 1:nul + 21].hex())
+        offset = nul + 21
+    return entries
+
+
+class Inspector:
+    """Domande sullo stato di un repository su disco, con le risposte lette da .git"""
+
+    def __init__(self, repo_dir):
+        self.repo_dir = repo_dir
+        self.git_dir = os.path.join(repo_dir, ".git")
+        # percorso -> ((mtime, dimensione, inode), valore analizzato)
+        self._files = {}
+        self.objects = ObjectStore(self.git_dir)
+        self._commits = {}
+
+    def _cached(self, rel, parse):
+        """Il file rel di .git analizzato con parse, riletto solo se è cambiato; None se manca"""
+        path = os.path.join(self.git_dir, rel)
+        try:
+            st = os.stat(path)
+        except (FileNotFoundError, NotADirectoryError):
+            st = None
+        if st is None or not stat.S_ISREG(st.st_mode):
+            self._files.pop(path, None)
+            return None
+        key = (st.st_mtime_ns, st.st_size, st.st_ino)
+        hit = self._files.get(path)
+        if hit is not None and hit[0] == key:
+            return hit[1]
+        try:
+            with open(path, "rb") as f:
+                value = parse(f.read())
+        except FileNotFoundError:
+            return None
+        if st.st_mtime_ns < time.time_ns() - RACY_NS:
+            self._files[path] = (key, value)
+        else:
+            self._files.pop(path, None)
+        return value
+
+    # --- Ref ---------------------------------------------------------------
+
+    def head(self):
+        """('ref', 'refs/heads/main') oppure ('oid', hash) con HEAD staccato; None senza repository"""
+        content = self._cached("HEAD", _strip)
+        if content is None:
+            return None
+        if content.startswith("ref: "):
+            return ('ref', content[5:])
+        return ('oid', content)
+
+    def current_branch(self):
+        """Nome del branch corrente, None con HEAD staccato"""
+        head = self.head()
+        if head is None or head[0] != 'ref' or not head[1].startswith("refs/heads/"):
+            return None
+        return head[1][len("refs/heads/"):]
+
+    def packed_refs(self):
+        return self._cached("packed-refs", parse_packed_refs) or {}
+
+    def ref(self, name):
+        """oid di un ref con il nome completo (refs/heads/main) o HEAD; None se non esiste"""
+        for _ in range(5):
+            content = self._cached(name, _strip)
+            if content is None:
+                return self.packed_refs().get(name)
+            if not content.startswith("ref: "):
+                return content
+            # Ref simbolico: si segue, con un limite contro i cicli
+            name = content[5:]
+        return None
+
+    def resolve(self, name):
+        """oid di HEAD, di un hash completo o di un nome abbreviato (main, v1.0, origin/main)"""
+        if len(name) == 40 and all(c in "0123456789abcdef" for c in name):
+            return name
+        if name in ("HEAD", "@"):
+            return self.ref("HEAD")
+        for prefix in _REF_PREFIXES:
+            oid = self.ref(prefix + name)
+            if oid is not None:
+                return oid
+        return None
+
+    def refs(self, prefix="refs/"):
+        """nome completo -> oid dei ref sotto prefix: packed-refs, poi quelli sciolti che li sostituiscono"""
+        found = {name: oid for name, oid in self.packed_refs().items() if name.startswith(prefix)}
+        base = os.path.join(self.git_dir, prefix.rstrip("/"))
+        for current, _, files in os.walk(base):
+            for filename in files:
+                rel = os.path.relpath(os.path.join(current, filename), self.git_dir).replace(os.sep, "/")
+                oid = self.ref(rel)
+                if oid is not None:
+                    found[rel] = oid
+        return found
+
+    def branches(self):
+        """nome breve -> oid dei branch locali"""
+        return {name[len("refs/heads/"):]: oid for name, oid in self.refs("refs/heads/").items()}
+
+    def reflog(self, name="HEAD"):
+        """Voci del reflog di HEAD o di un ref completo, dalla più vecchia"""
+        return self._cached(os.path.join("logs", name), parse_reflog) or []
+
+    # --- Index -------------------------------------------------------------
+
+    def index(self):
+        """L'index analizzato (vuoto se non c'è ancora)"""
+        return self._cached("index", parse_index) or Index(2, {}, {})
+
+    def tracked(self, path):
+        return _normalize(path) in self.index().entries
+
+    def conflicted(self):
+        """Percorsi in conflitto (con più versioni nell'index)"""
+        return set(self.index().unmerged)
+
+    def staged(self, path):
+        """True se l'index ha per path una versione diversa da HEAD (aggiunta, modifica o cancellazione)
+
+        None se manca un oggetto che servirebbe per dirlo.
+        """
+        path = _normalize(path)
+        entry = self.index().entries.get(path)
+        head = self.ref("HEAD")
+        if head is None:
+            return entry is not None
+        commit = self.commit(head)
+        if commit is None:
+            return None
+        found = self.tree_entry(commit.tree, path)
+        if found is False:
+            return None
+        if entry is None:
+            return found is not None
+        return found is None or found[1] != entry.oid
+
+    # --- Oggetti -----------------------------------------------------------
+
+    def read_object(self, oid):
+        """(tipo, contenuto) di un oggetto, sciolto o in un pack; None se non c'è"""
+        return self.objects.read(oid)
+
+    def commit(self, oid):
+        """Il Commit con questo hash; None se non leggibile"""
+        commit = self._commits.get(oid)
+        if commit is not None:
+            return commit
+        obj = self.read_object(oid)
+        if obj is None or obj[0] != "commit":
+            return None
+        if len(self._commits) >= COMMIT_MEMO:
+            self._commits.clear()
+        commit = self._commits[oid] = _parse_commit(obj[1])
+        return commit
+
+    def tree(self, oid):
+        """nome -> (modo, oid) del tree; None se non leggibile"""
+        obj = self.read_object(oid)
+        if obj is None or obj[0] != "tree":
+            return None
+        return _parse_tree(obj[1])
+
+    def tree_entry(self, tree, path):
+        """(modo, oid) di path dentro il tree; None se non c'è, False se un tree non è leggibile"""
+        entry = ('40000', tree)
+        for name in path.split("/"):
+            if not entry[0].startswith("4"):
+                return None
+            obj = self.read_object(entry[1])
+            if obj is None:
+                return False
+            entry = _parse_tree(obj[1]).get(name)
+            if entry is None:
+                return None
+        return entry
+
+    def history_contains(self, ref, subject, limit=HISTORY_LIMIT):
+        """True se tra gli ultimi limit commit raggiungibili da ref ce n'è uno con questo messaggio
+
+        None se la storia non si può leggere per intero fin lì (oggetti mancanti).
+        """
+        found = self.find_commit(ref, subject, limit)
+        return None if found is False else found is not None
+
+    def find_commit(self, ref, subject, limit=HISTORY_LIMIT):
+        """Hash del commit più vicino a ref con questo messaggio, tra gli ultimi limit
+
+        None se non c'è, False se la storia non si può leggere per intero fin lì.
+        """
+        start = self.resolve(ref)
+        if start is None:
+            return None
+        seen = set()
+        queue = deque([start])
+        while queue and len(seen) < limit:
+            oid = queue.popleft()
+            if oid in seen:
+                continue
+            seen.add(oid)
+            commit = self.commit(oid)
+            if commit is None:
+                return False
+            if commit.subject == subject:
+                return oid
+            queue.extend(commit.parents)
+        return None
+
+    def log(self, starts, limit=None):
+        """Coppie (oid, Commit) raggiungibili da starts, nell'ordine di git log
+
+        L'ordine è quello di git senza opzioni: data del committer decrescente e,
+        a parità di data, ordine di arrivo. None se un commit non è leggibile.
+        """
+        queue = []
+        seen = set()
+        arrivals = 0
+        for oid in starts:
+            if oid in seen:
+                continue
+            commit = self.commit(oid)
+            if commit is None:
+                return None
+            seen.add(oid)
+            heapq.heappush(queue, (-commit.time, arrivals, oid, commit))
+            arrivals += 1
+        found = []
+        while queue and (limit is None or len(found) < limit):
+            _, _, oid, commit = heapq.heappop(queue)
+            found.append((oid, commit))
+            for parent in commit.parents:
+                if parent in seen:
+                    continue
+                seen.add(parent)
+                parent_commit = self.commit(parent)
+                if parent_commit is None:
+                    return None
+                heapq.heappush(queue, (-parent_commit.time, arrivals, parent, parent_commit))
+                arrivals += 1
+        return found
+
+
+def _strip(data):
+    return data.decode("utf-8", "surrogateescape").strip()
+
+
+def _normalize(path):
+    path = path.replace("\\", "/")
+    while path.startswith("./"):
+        path = path[2:]
+    return path.rstrip("/")
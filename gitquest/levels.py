@@ -0,0 +1,768 @@
+"""
+Contenuti del gioco: livelli, quiz e scenari definiti in gitquest/data/quest.json.
+
+Il file descrive ogni livello come una lista di passi; all'avvio viene compilato
+una sola volta in oggetti immutabili con __slots__, condivisi da tutte le sessioni
+del processo. La forma compilata viene salvata in __pycache__ accanto al file,
+così gli avvii successivi non devono rifare il parsing del JSON.
+
+Nella cache ogni livello è un'unità a sé (LazyLevels): all'avvio si leggono solo
+i byte, e un livello diventa oggetti Python la prima volta che il motore ci entra.
+Degli scenari del menu di emergenza si materializzano quindi solo quelli scelti,
+e i moduli che servono solo a loro (es. gitquest/merge.py) vengono importati da
+pickle in quel momento.
+
+Passi disponibili (una chiave principale per passo):
+    {"text": "...", "color": "GREEN"}      testo colorato ($score, $input, $output... vengono sostituiti)
+    {"banner": true}                       intestazione con livello e punteggio
+    {"set_level": 2}                       cambia il livello mostrato nel banner
+    {"wait": "prompt" | null}              attende INVIO
+    {"write": "file", "content": "..."}    scrive un file nel repository ("file": "nome" usa la sezione files)
+    {"remove": "file"}                     cancella un file dal repository
+    {"run": "git ...", "capture": true, "ok": [...], "fail": [...]}
+                                           (se contiene $input il comando è del giocatore: passa dalla
+                                           policy del livello, "allow", vedi gitquest/sandbox.py)
+    {"score": 15}                          aggiunge punti
+    {"snapshot": "nome", "fallback": [...], "fail": [...]}
+                                           carica un modello, altrimenti esegue fallback; le risposte
+                                           del modello ("answers" della ricetta) diventano variabili ($nome = hash),
+                                           fail se dopo fallback qualcuna non si trova nella storia
+    {"commits": [{"message": "...", "files": {"file": "contenuto" | {"file": "nome"}},
+                  "new_branch" | "branch": "nome"}, ...], "checkout": "main"}
+                                           commit creati in una volta da gitquest/builder.py (new_branch come
+                                           git checkout -b, branch come git checkout); se non si può, gli
+                                           stessi passi write / git add / git commit / git checkout
+    {"recipe": "nome", "fail": [...]}      esegue la ricetta del modello direttamente nel repository
+                                           (fail in modalità pratica, se la ricetta non si può simulare)
+    {"ask": "prompt", "lower": false, "cases": [...], "otherwise": [...]}
+                                           (con "timeout": secondi, allo scadere la risposta è vuota)
+    {"match": [...casi...], "otherwise": [...]}   come ask, ma sull'ultima risposta
+                                           (con "id": "nome" la domanda ha un nome fisso nelle
+                                           statistiche, altrimenti livello.numero; vedi gitquest/analytics.py)
+                                           (con "on": "output" confronta l'output dell'ultimo run,
+                                           e la risposta non entra nelle statistiche)
+    {"if_exists": "file", "then": [...], "else": [...]}
+    {"show_file": "file", "text": "...$content...", "color": "BLUE"}
+    {"merge_file": "file", "base": "nome", "ours": "nome", "theirs": "nome", "labels": ["HEAD", "feature"]}
+                                           scrive il file con i conflitti calcolati da gitquest/merge.py
+    {"resolve": "file", "choice": "ours" | "theirs" | "both"}   risolve i conflitti dell'ultimo merge_file
+    {"check_resolution": "file", "ok": [...], "fail": [...]}   valuta il file risolto ($choices, $problems)
+    {"check": {"branch": "feature", "staged": ["file"], ...}, "ok": [...], "fail": [...]}
+                                           verifica lo stato del repository leggendo .git (gitquest/inspector.py,
+                                           in pratica SimulatedGit); $problem descrive la prima condizione
+                                           non soddisfatta. Condizioni: branch, staged, committed, tracked,
+                                           untracked, no_conflicts, in / not_in ({"branch": "messaggio del commit"})
+    {"by_score": [{"min": 200, "then": [...]}, ..., {"min": null, "then": [...]}]}
+    {"goto": "stato"}                      passa subito a un altro stato
+    {"call": "metodo"}                     esegue un metodo del gioco (per la logica speciale)
+Un caso è {"equals" | "contains" | "contains_all" | "startswith": [...], "then": [...]}
+oppure {"nonempty": true, "then": [...]}. Per le risposte che sono comandi git si usa
+{"command": ["git checkout -b feature", "git commit ** -m *"], "then": [...]}: il confronto
+ignora spazi, apici e alias equivalenti (vedi gitquest/matcher.py). Con
+{"commit": "nome", "then": [...]} la risposta deve essere una revisione che git risolve
+(git rev-parse --verify) nel commit della risposta nome dello scenario: l'hash, anche
+abbreviato, oppure experimental~1 e simili.
+"""
+
+import os
+import pickle
+import sys
+import time
+from collections.abc import Mapping
+from string import Template
+
+from gitquest.matcher import CommandMatcher, canonical
+from gitquest.render import prerender
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DEFAULT_PATH = os.path.join(DATA_DIR, "quest.json")
+
+# Da incrementare quando cambia la forma compilata, per invalidare la cache
+FORMAT_VERSION = 13
+
+_loaded = {}
+
+
+class ContentError(Exception):
+    """Errore nel file dei contenuti"""
+
+
+def _template(text):
+    """Template solo se il testo contiene davvero dei $segnaposto"""
+    for match in Template.pattern.finditer(text):
+        if match.group('named') or match.group('braced'):
+            return Template(text)
+    return None
+
+
+class Scope(dict):
+    """Variabili visibili ai passi di un livello: risposta, output, punteggio..."""
+
+    __slots__ = ('game',)
+
+    def __init__(self, game):
+        super().__init__()
+        self.game = game
+
+    def __missing__(self, key):
+        if key == 'score':
+            return self.game.score
+        if key == 'level':
+            return self.game.level
+        raise KeyError(key)
+
+
+async def run_steps(steps, game, scope):
+    """Esegue i passi in ordine; restituisce lo stato scelto da un goto/call, se c'è"""
+    for step in steps:
+        result = await step.run(game, scope)
+        if result is not None:
+            return result
+    return None
+
+
+class Frozen:
+    """Base degli oggetti compilati: slot fissati nel costruttore e poi immutabili"""
+
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} è immutabile")
+
+    def __reduce__(self):
+        return (type(self), tuple(getattr(self, name) for name in self.__slots__))
+
+
+# --- Passi -------------------------------------------------------------------
+
+class Text(Frozen):
+    # rendered: il testo statico già colorato (render.prerender), None se ha segnaposto
+    __slots__ = ('text', 'template', 'color', 'rendered')
+
+    async def run(self, game, scope):
+        if self.template is None:
+            game.render.static(self.rendered)
+        else:
+            game.print_colored(self.template.safe_substitute(scope), self.color)
+
+
+class Banner(Frozen):
+    __slots__ = ()
+
+    async def run(self, game, scope):
+        game.print_banner()
+
+
+class SetLevel(Frozen):
+    __slots__ = ('level',)
+
+    async def run(self, game, scope):
+        game.level = self.level
+
+
+class Wait(Frozen):
+    __slots__ = ('prompt',)
+
+    async def run(self, game, scope):
+        if self.prompt is None:
+            await game.wait_for_input()
+        else:
+            await game.wait_for_input(self.prompt)
+
+
+class Write(Frozen):
+    __slots__ = ('path', 'content')
+
+    async def run(self, game, scope):
+        game.write_file(self.path, self.content)
+
+
+class Remove(Frozen):
+    __slots__ = ('path',)
+
+    async def run(self, game, scope):
+        game.remove_file(self.path)
+
+
+class Run(Frozen):
+    # policy: None per i comandi dei contenuti, la Policy del livello per quelli del giocatore
+    __slots__ = ('command', 'template', 'capture', 'ok', 'fail', 'policy')
+
+    async def run(self, game, scope):
+        command = self.template.safe_substitute(scope) if self.template else self.command
+        success, output, error = await game.run_command(command, self.capture, self.policy)
+        scope['output'] = output
+        scope['error'] = error
+        return await run_steps(self.ok if success else self.fail, game, scope)
+
+
+class Score(Frozen):
+    __slots__ = ('points',)
+
+    async def run(self, game, scope):
+        game.score += self.points
+
+
+class Snapshot(Frozen):
+    __slots__ = ('name', 'fallback', 'fail')
+
+    async def run(self, game, scope):
+        # Le risposte dello scenario ($nome nei passi, casi 'commit'): dalla tabella
+        # del modello, oppure cercate nella storia appena preparata dai passi di riserva
+        if await game.load_snapshot(self.name):
+            scope.update(game.snapshots.answers(self.name))
+            return None
+        result = await run_steps(self.fallback, game, scope)
+        if result is not None:
+            return result
+        key = game.answer_key(self.name)
+        scope.update(key)
+        if len(key) < len(game.content.snapshots[self.name].get('answers', ())):
+            return await run_steps(self.fail, game, scope)
+        return None
+
+
+class Recipe(Frozen):
+    __slots__ = ('name', 'fail')
+
+    async def run(self, game, scope):
+        if not await game.build_recipe(self.name):
+            return await run_steps(self.fail, game, scope)
+        scope.update(game.answer_key(self.name))
+
+
+class Commits(Frozen):
+    # fallback: gli stessi commit come passi write/run (builder.commands), per la pratica e per
+    # i repository in cui il risultato lo deve decidere git
+    __slots__ = ('spec', 'fallback')
+
+    async def run(self, game, scope):
+        if not await game.build_commits(self.spec):
+            return await run_steps(self.fallback, game, scope)
+
+
+class Case(Frozen):
+    __slots__ = ('kind', 'values', 'then')
+
+    def matches(self, answer, command=None, scope=None, oid=None):
+        if self.kind == 'commit':
+            # oid: il commit a cui git risolve la risposta (Match.run)
+            return oid is not None and scope is not None and scope.get(self.values) == oid
+        if self.kind == 'command':
+            return self.values.match_tokens(command if command is not None else canonical(answer))
+        if self.kind == 'equals':
+            return answer in self.values
+        if self.kind == 'contains':
+            return any(value in answer for value in self.values)
+        if self.kind == 'contains_all':
+            return all(value in answer for value in self.values)
+        if self.kind == 'startswith':
+            return answer.startswith(self.values)
+        return bool(answer)
+
+
+class Match(Frozen):
+    # question: identificativo per le statistiche delle risposte (None se non ci sono casi)
+    # on: la variabile confrontata, 'input' (la risposta) oppure 'output'
+    __slots__ = ('cases', 'otherwise', 'question', 'on')
+
+    def select(self, answer, scope=None, oid=None):
+        """Passi da eseguire per la risposta, e se la risposta era tra quelle previste"""
+        command = None
+        for case in self.cases:
+            # La forma canonica del comando si calcola una volta per tutti i casi
+            if case.kind == 'command' and command is None:
+                command = canonical(answer)
+            if case.matches(answer, command, scope, oid):
+                return case.then, True
+        return self.otherwise, False
+
+    async def run(self, game, scope):
+        answer = scope.get(self.on, "")
+        oid = None
+        if answer and any(case.kind == 'commit' for case in self.cases):
+            oid = await game.resolve_commit(answer)
+        steps, expected = self.select(answer, scope, oid)
+        if game.answers is None or self.question is None:
+            return await run_steps(steps, game, scope)
+        # Punti della risposta: quelli guadagnati nei suoi passi, meno quelli già
+        # attribuiti alle domande annidate
+        score, claimed = game.score, game.answers.points
+        result = await run_steps(steps, game, scope)
+        points = game.score - score - (game.answers.points - claimed)
+        game.answers.record(self.question, answer, scope.get('latency'), points, expected)
+        return result
+
+
+class Ask(Frozen):
+    __slots__ = ('prompt', 'lower', 'match', 'timeout')
+
+    async def run(self, game, scope):
+        if game.answers is None:
+            answer = await self.read(game)
+        else:
+            start = time.monotonic()
+            answer = await self.read(game)
+            scope['latency'] = time.monotonic() - start
+        scope['input'] = answer.lower() if self.lower else answer
+        return await self.match.run(game, scope)
+
+    async def read(self, game):
+        if self.timeout is None:
+            return (await game.ask(self.prompt)).strip()
+        from gitquest.inputs import InputTimeout
+        try:
+            return (await game.ask(self.prompt, self.timeout)).strip()
+        except InputTimeout:
+            game.print_colored("\n⏰ Tempo scaduto!", 'YELLOW')
+            return ""
+
+
+class IfExists(Frozen):
+    __slots__ = ('path', 'then', 'otherwise')
+
+    async def run(self, game, scope):
+        steps = self.then if game.file_exists(self.path) else self.otherwise
+        return await run_steps(steps, game, scope)
+
+
+class ShowFile(Frozen):
+    __slots__ = ('path', 'template', 'color')
+
+    async def run(self, game, scope):
+        try:
+            scope['content'] = game.read_file(self.path)
+        except OSError:
+            return None
+        game.print_colored(self.template.safe_substitute(scope), self.color)
+
+
+class MergeFile(Frozen):
+    # result: la fusione a tre vie, calcolata una volta sola in compilazione
+    __slots__ = ('path', 'result', 'label_ours', 'label_theirs')
+
+    async def run(self, game, scope):
+        game.write_file(self.path, self.result.render(self.label_ours, self.label_theirs))
+        scope['merge'] = self
+
+
+class Resolve(Frozen):
+    __slots__ = ('path', 'choice')
+
+    async def run(self, game, scope):
+        game.write_file(self.path, scope['merge'].result.resolve(self.choice))
+
+
+CHOICE_NAMES = {'ours': "versione corrente", 'theirs': "versione in arrivo", 'both': "entrambe",
+                'base': "versione originale", 'custom': "riscritto a mano", None: "non trovato"}
+
+
+class CheckResolution(Frozen):
+    __slots__ = ('path', 'ok', 'fail')
+
+    async def run(self, game, scope):
+        try:
+            text = game.read_file(self.path)
+        except OSError:
+            text = ""
+        from gitquest.merge import check_resolution
+        resolution = check_resolution(text, scope['merge'].result)
+        game.resolutions[self.path] = resolution
+        scope['choices'] = ", ".join(f"blocco {i}: {CHOICE_NAMES[choice]}"
+                                     for i, choice in enumerate(resolution.choices, 1))
+        problems = []
+        if resolution.markers:
+            lines = ", ".join(map(str, resolution.markers))
+            problems.append(f"marcatori di conflitto ancora presenti (righe {lines})")
+        if None in resolution.choices:
+            problems.append("alcune righe fuori dai conflitti sono state cancellate o cambiate")
+        scope['problems'] = "; ".join(problems)
+        return await run_steps(self.fail if problems else self.ok, game, scope)
+
+
+def _check_branch(state, name):
+    current = state.current_branch()
+    if current != name:
+        if current is None:
+            return f"HEAD non è su nessun branch, doveva essere su {name}"
+        return f"HEAD è su {current}, non su {name}"
+
+
+def _check_staged(state, paths):
+    for path in paths:
+        if state.staged(path) is False:
+            return f"{path} non è nello staging area"
+
+
+def _check_committed(state, paths):
+    for path in paths:
+        if not state.tracked(path) or state.staged(path):
+            return f"{path} non è nell'ultimo commit"
+
+
+def _check_tracked(state, paths):
+    for path in paths:
+        if not state.tracked(path):
+            return f"{path} non è tracciato da git"
+
+
+def _check_untracked(state, paths):
+    for path in paths:
+        if state.tracked(path):
+            return f"{path} è ancora tracciato da git"
+
+
+def _check_no_conflicts(state, expected):
+    conflicted = state.conflicted()
+    if expected and conflicted:
+        return "ci sono ancora conflitti in " + ", ".join(sorted(conflicted))
+
+
+def _check_in(state, commits):
+    for branch, subject in commits.items():
+        if state.history_contains(branch, subject) is False:
+            return f"il commit \"{subject}\" non è in {branch}"
+
+
+def _check_not_in(state, commits):
+    for branch, subject in commits.items():
+        if state.history_contains(branch, subject):
+            return f"il commit \"{subject}\" è ancora in {branch}"
+
+
+# Condizioni di {"check": ...}: None se soddisfatta, altrimenti la descrizione del problema.
+# Una risposta None di staged/history_contains (oggetti non leggibili) non conta come errore.
+CHECKS = {'branch': _check_branch, 'staged': _check_staged, 'committed': _check_committed,
+          'tracked': _check_tracked, 'untracked': _check_untracked, 'no_conflicts': _check_no_conflicts,
+          'in': _check_in, 'not_in': _check_not_in}
+
+
+class Check(Frozen):
+    # conditions: coppie (nome della condizione, argomento), verificate in ordine
+    __slots__ = ('conditions', 'ok', 'fail')
+
+    async def run(self, game, scope):
+        state = game.repo_state()
+        for kind, arg in self.conditions:
+            problem = CHECKS[kind](state, arg)
+            if problem:
+                scope['problem'] = problem
+                return await run_steps(self.fail, game, scope)
+        return await run_steps(self.ok, game, scope)
+
+
+class ByScore(Frozen):
+    __slots__ = ('branches',)
+
+    async def run(self, game, scope):
+        for minimum, steps in self.branches:
+            if minimum is None or game.score >= minimum:
+                return await run_steps(steps, game, scope)
+
+
+class Goto(Frozen):
+    __slots__ = ('state',)
+
+    async def run(self, game, scope):
+        return self.state
+
+
+class Call(Frozen):
+    __slots__ = ('hook',)
+
+    async def run(self, game, scope):
+        return await getattr(game, self.hook)()
+
+
+class Level(Frozen):
+    """Un livello o scenario: uno stato del motore di gioco"""
+
+    __slots__ = ('id', 'next', 'steps')
+
+    async def run(self, game):
+        return await run_steps(self.steps, game, Scope(game))
+
+    def entry_level(self):
+        """Livello che lo stato imposta sempre (set_level fuori da ask e match), o None"""
+        for step in self.steps:
+            if isinstance(step, SetLevel):
+                return step.level
+        return None
+
+
+class QuestContent(Frozen):
+    """Tutti i contenuti compilati: stato iniziale, livelli e ricette dei modelli"""
+
+    __slots__ = ('start', 'levels', 'files', 'snapshots')
+
+
+class LazyLevels(Mapping):
+    """Livelli tenuti come byte di pickle e ricostruiti al primo accesso"""
+
+    def __init__(self, units):
+        self.units = units
+        self.loaded = {}
+
+    @classmethod
+    def from_levels(cls, levels):
+        return cls({name: pickle.dumps(level, protocol=pickle.HIGHEST_PROTOCOL)
+                    for name, level in levels.items()})
+
+    def __getitem__(self, name):
+        level = self.loaded.get(name)
+        if level is None:
+            level = self.loaded[name] = pickle.loads(self.units[name])
+        return level
+
+    def __contains__(self, name):
+        return name in self.units
+
+    def __iter__(self):
+        return iter(self.units)
+
+    def __len__(self):
+        return len(self.units)
+
+    def __reduce__(self):
+        return (type(self), (self.units,))
+
+
+# --- Compilazione --------------------------------------------------------------
+
+class _Compiler:
+    def __init__(self, data):
+        self.files = {sys.intern(k): v for k, v in data.get('files', {}).items()}
+        self.level_ids = set(data['levels'])
+        self.snapshot_ids = set(data.get('snapshots', {}))
+        # Livello in compilazione e domande numerate finora, per gli id delle domande
+        self.level = None
+        self.questions = 0
+
+    def compile_level(self, name, level):
+        self.level, self.questions = name, 0
+        self.allow = None
+        if 'allow' in level:
+            from gitquest.sandbox import compile_policy
+            try:
+                self.allow = compile_policy(level['allow'])
+            except ValueError as e:
+                raise ContentError(f"levels.{name}.allow: {e}") from None
+        return Level(name, level.get('next'), self.steps(level['steps'], f"levels.{name}"))
+
+    def steps(self, items, where):
+        if not isinstance(items, list):
+            raise ContentError(f"{where}: attesa una lista di passi")
+        return tuple(self.step(item, f"{where}[{i}]") for i, item in enumerate(items))
+
+    def step(self, d, where):
+        if 'text' in d and 'show_file' not in d:
+            text, template, color = sys.intern(d['text']), _template(d['text']), d.get('color', 'END')
+            return Text(text, template, color, None if template else prerender(text, color))
+        if 'banner' in d:
+            return Banner()
+        if 'set_level' in d:
+            return SetLevel(int(d['set_level']))
+        if 'wait' in d:
+            return Wait(d['wait'])
+        if 'write' in d:
+            return Write(d['write'], self.content(d, where))
+        if 'remove' in d:
+            return Remove(d['remove'])
+        if 'run' in d:
+            policy = None
+            if "$input" in d['run'] or "${input}" in d['run']:
+                from gitquest.sandbox import DEFAULT_POLICY
+                policy = self.allow or DEFAULT_POLICY
+            return Run(d['run'], _template(d['run']), d.get('capture', True),
+                       self.steps(d.get('ok', []), where + ".ok"),
+                       self.steps(d.get('fail', []), where + ".fail"), policy)
+        if 'score' in d:
+            return Score(int(d['score']))
+        if 'snapshot' in d:
+            return Snapshot(d['snapshot'], self.steps(d.get('fallback', []), where + ".fallback"),
+                            self.steps(d.get('fail', []), where + ".fail"))
+        if 'commits' in d:
+            spec = self.commit_spec(d['commits'], d.get('checkout'), where)
+            from gitquest.builder import commands
+            fallback = [{'write': step[1], 'content': step[2]} if step[0] == 'write' else {'run': step[1]}
+                        for step in commands(spec)]
+            return Commits(spec, self.steps(fallback, where + ".commits"))
+        if 'recipe' in d:
+            if d['recipe'] not in self.snapshot_ids:
+                raise ContentError(f"{where}: modello sconosciuto {d['recipe']!r}")
+            return Recipe(d['recipe'], self.steps(d.get('fail', []), where + ".fail"))
+        if 'ask' in d:
+            timeout = d.get('timeout')
+            return Ask(d['ask'], bool(d.get('lower')), self.match(d, where),
+                       None if timeout is None else float(timeout))
+        if 'match' in d:
+            return self.match(dict(d, cases=d['match']), where)
+        if 'if_exists' in d:
+            return IfExists(d['if_exists'], self.steps(d.get('then', []), where + ".then"),
+                            self.steps(d.get('else', []), where + ".else"))
+        if 'show_file' in d:
+            return ShowFile(d['show_file'], Template(d['text']), d.get('color', 'END'))
+        if 'merge_file' in d:
+            sides = [self.content({'file': d[side]}, where) for side in ('base', 'ours', 'theirs')]
+            label_ours, label_theirs = d.get('labels', ("HEAD", "theirs"))
+            from gitquest.merge import merge3
+            return MergeFile(d['merge_file'], merge3(*sides), label_ours, label_theirs)
+        if 'resolve' in d:
+            if d['choice'] not in ('ours', 'theirs', 'both', 'base'):
+                raise ContentError(f"{where}: scelta sconosciuta {d['choice']!r}")
+            return Resolve(d['resolve'], d['choice'])
+        if 'check_resolution' in d:
+            return CheckResolution(d['check_resolution'], self.steps(d.get('ok', []), where + ".ok"),
+                                   self.steps(d.get('fail', []), where + ".fail"))
+        if 'check' in d:
+            unknown = sorted(set(d['check']) - set(CHECKS))
+            if unknown:
+                raise ContentError(f"{where}: condizioni sconosciute {unknown}")
+            return Check(tuple(d['check'].items()), self.steps(d.get('ok', []), where + ".ok"),
+                         self.steps(d.get('fail', []), where + ".fail"))
+        if 'by_score' in d:
+            return ByScore(tuple((b.get('min'), self.steps(b['then'], where + ".by_score"))
+                                 for b in d['by_score']))
+        if 'goto' in d:
+            if d['goto'] not in self.level_ids:
+                raise ContentError(f"{where}: stato sconosciuto {d['goto']!r}")
+            return Goto(sys.intern(d['goto']))
+        if 'call' in d:
+            return Call(sys.intern(d['call']))
+        raise ContentError(f"{where}: passo non riconosciuto {sorted(d)}")
+
+    def match(self, d, where):
+        question = None
+        on = d.get('on', 'input')
+        if on not in ('input', 'output'):
+            raise ContentError(f"{where}: confronto sconosciuto {on!r}")
+        if d.get('cases') and on == 'input':
+            # Numerata prima dei casi: le domande annidate vengono dopo quella che le contiene
+            self.questions += 1
+            question = sys.intern(d.get('id') or f"{self.level}.{self.questions}")
+        cases = []
+        for i, c in enumerate(d.get('cases', [])):
+            then = self.steps(c['then'], f"{where}.cases[{i}]")
+            for kind in ('command', 'commit', 'equals', 'contains', 'contains_all', 'startswith', 'nonempty'):
+                if kind in c:
+                    if kind == 'command':
+                        values = CommandMatcher(c[kind])
+                    elif kind == 'commit':
+                        values = sys.intern(c[kind])
+                    elif kind == 'equals':
+                        values = frozenset(c[kind])
+                    elif kind == 'nonempty':
+                        values = None
+                    else:
+                        values = tuple(c[kind])
+                    cases.append(Case(kind, values, then))
+                    break
+            else:
+                raise ContentError(f"{where}.cases[{i}]: tipo di confronto mancante")
+        return Match(tuple(cases), self.steps(d.get('otherwise', []), where + ".otherwise"), question,
+                     sys.intern(on))
+
+    def content(self, d, where):
+        if 'file' in d:
+            if d['file'] not in self.files:
+                raise ContentError(f"{where}: file sconosciuto {d['file']!r}")
+            return self.files[d['file']]
+        return d['content']
+
+    def commit_spec(self, commits, checkout, where):
+        """La lista di commit per gitquest/builder.py, con i contenuti della sezione files risolti"""
+        compiled = []
+        for i, commit in enumerate(commits):
+            files = tuple((path, self.content(value, f"{where}.commits[{i}]") if isinstance(value, dict) else value)
+                          for path, value in commit['files'].items())
+            compiled.append({key: commit[key] for key in ('branch', 'new_branch') if commit.get(key)})
+            compiled[-1].update(message=commit['message'], files=files)
+        spec = {'commits': tuple(compiled), 'checkout': checkout}
+        from gitquest.builder import validate
+        try:
+            validate(spec)
+        except ValueError as e:
+            raise ContentError(f"{where}: {e}") from None
+        return spec
+
+    def recipe(self, name, recipe):
+        steps = []
+        for step in recipe['steps']:
+            if step[0] == 'write' and isinstance(step[2], dict):
+                steps.append(('write', step[1], self.content(step[2], f"snapshots.{name}")))
+            elif step[0] == 'commits':
+                steps.append(('commits', self.commit_spec(step[1], step[2] if len(step) > 2 else None,
+                                                          f"snapshots.{name}")))
+            else:
+                steps.append(tuple(step))
+        compiled = {'steps': steps}
+        if recipe.get('base'):
+            compiled['base'] = recipe['base']
+        if recipe.get('answers'):
+            answers = {}
+            for key, target in recipe['answers'].items():
+                if not key.isidentifier() or len(target) != 2:
+                    raise ContentError(f"snapshots.{name}.answers: risposta non valida {key!r}")
+                answers[key] = tuple(target)
+            compiled['answers'] = answers
+        return compiled
+
+
+def compile_content(data):
+    """Trasforma il JSON dei contenuti negli oggetti usati dal motore"""
+    compiler = _Compiler(data)
+    levels = {}
+    for name, level in data['levels'].items():
+        nxt = level.get('next')
+        if nxt is not None and nxt not in compiler.level_ids:
+            raise ContentError(f"levels.{name}: stato successivo sconosciuto {nxt!r}")
+        levels[sys.intern(name)] = compiler.compile_level(sys.intern(name), level)
+    if data['start'] not in levels:
+        raise ContentError(f"stato iniziale sconosciuto {data['start']!r}")
+    snapshots = {name: compiler.recipe(name, r) for name, r in data.get('snapshots', {}).items()}
+    return QuestContent(data['start'], levels, compiler.files, snapshots)
+
+
+def load_content(path=DEFAULT_PATH):
+    """Carica i contenuti una volta per processo, usando la cache compilata se valida"""
+    content = _loaded.get(path)
+    if content is not None:
+        return content
+
+    st = os.stat(path)
+    cache_dir = os.path.join(os.path.dirname(path), "__pycache__")
+    cache = os.path.join(cache_dir, f"{os.path.basename(path)}.v{FORMAT_VERSION}-{st.st_size}-{st.st_mtime_ns}.pickle")
+    try:
+        with open(cache, "rb") as f:
+            content = pickle.load(f)
+    except (OSError, pickle.PickleError, EOFError, AttributeError, TypeError):
+        import json
+        with open(path, encoding="utf-8") as f:
+            content = compile_content(json.load(f))
+        _write_cache(cache_dir, cache, content)
+
+    _loaded[path] = content
+    return content
+
+
+def _write_cache(cache_dir, cache, content):
+    """Salva la forma compilata; se la directory non è scrivibile si va avanti senza"""
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        prefix = cache.rsplit(".v", 1)[0]
+        for name in os.listdir(cache_dir):
+            old = os.path.join(cache_dir, name)
+            if old.startswith(prefix) and old.endswith(".pickle"):
+                os.remove(old)
+        tmp = f"{cache}.{os.getpid()}.tmp"
+        lazy = QuestContent(content.start, LazyLevels.from_levels(content.levels), content.files,
+                            content.snapshots)
+        with open(tmp, "wb") as f:
+            pickle.dump(lazy, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache)
+    except OSError:
+        pass
@@ -0,0 +1,266 @@
+"""
+Confronto tra il comando scritto dal giocatore e le risposte accettate.
+
+Prima i controlli erano un misto di uguaglianza esatta, sottostringhe e startswith,
+quindi `git  init`, `git init .` o `git switch -c feature` venivano giudicati in
+modo incoerente. Qui il comando viene:
+1. diviso in token con le regole della shell (apici compresi)
+2. normalizzato: alias di sottocomandi e opzioni (switch -c -> checkout -b,
+   --message -> -m, -am -> -a -m, -mFix -> -m Fix, ./file -> file, ...)
+3. confrontato con un automa deterministico costruito una volta sola a partire
+   da tutte le risposte accettate della domanda.
+Il confronto costa O(lunghezza del comando) anche con centinaia di varianti.
+
+Nei pattern `*` accetta un token qualsiasi e `**` zero o più token.
+"""
+
+import shlex
+
+ANY = "*"
+REST = "**"
+
+# Sottocomandi equivalenti e relative opzioni da tradurre
+SUBCOMMAND_ALIASES = {
+    'switch': ('checkout', {'-c': '-b', '--create': '-b', '-C': '-B', '--force-create': '-B'}),
+}
+
+# Opzioni lunghe (o sinonimi) tradotte nella forma breve, per sottocomando
+FLAG_ALIASES = {
+    'commit': {'--message': '-m', '--all': '-a'},
+    'add': {'--all': '-A', '--update': '-u'},
+    'branch': {'--delete': '-d', '--all': '-a', '--move': '-m'},
+    'clone': {'--branch': '-b'},
+    'log': {'--max-count': '-n'},
+    'reset': {'--mixed': None},
+    'stash': {'push': None},
+}
+
+# Sottocomandi in cui le opzioni brevi si possono unire (-am == -a -m): lettere delle
+# opzioni senza valore e di quelle con un valore, che si prendono il resto del token
+COMBINABLE = {
+    'commit': ("anqsvepioz", "mFCctuS"),
+    'add': ("AnvfipeuN", ""),
+    'branch': ("adDrmMcCflvqt", "u"),
+}
+
+# Sottocomandi i cui argomenti sono percorsi (./file == file)
+PATH_ARGS = {'add', 'checkout', 'restore', 'rm', 'mv'}
+
+
+def tokenize(text):
+    """Divide il comando in token; con apici non chiusi ripiega su split()"""
+    # Senza apici né backslash shlex darebbe lo stesso risultato, molto più lentamente
+    if "'" not in text and '"' not in text and "\\" not in text:
+        return text.split()
+    try:
+        return shlex.split(text)
+    except ValueError:
+        return text.split()
+
+
+def normalize(tokens):
+    """Riduce un comando git alla sua forma canonica"""
+    if len(tokens) < 2 or tokens[0] != "git":
+        return tuple(tokens)
+
+    sub = tokens[1]
+    flags = {}
+    if sub in SUBCOMMAND_ALIASES:
+        sub, flags = SUBCOMMAND_ALIASES[sub]
+    flags = dict(flags, **FLAG_ALIASES.get(sub, {}))
+
+    result = ["git", sub]
+    paths_only = False
+    for token in tokens[2:]:
+        if paths_only:
+            result.append(_path(sub, token))
+            continue
+        if token == "--":
+            paths_only = True
+            result.append(token)
+            continue
+        if token.startswith("--") and "=" in token:
+            name, value = token.split("=", 1)
+            name = flags.get(name, name)
+            if name is not None:
+                result.append(name)
+            result.append(value)
+            continue
+        if sub in COMBINABLE and len(token) > 2 and token[0] == "-" and token[1] != "-":
+            split = _split_short(COMBINABLE[sub], token)
+            if split is not None:
+                result.extend(split)
+                continue
+        if token in flags:
+            if flags[token] is not None:
+                result.append(flags[token])
+            continue
+        result.append(token if token.startswith("-") else _path(sub, token))
+
+    if sub == "init" and result[2:] == ["."]:
+        del result[2:]
+    return tuple(result)
+
+
+def _split_short(letters, token):
+    """-am -> [-a, -m], -mFix -> [-m, Fix]; None se il token contiene un'opzione sconosciuta"""
+    plain, valued = letters
+    split = []
+    for i, c in enumerate(token[1:], 1):
+        if c in valued:
+            split.append("-" + c)
+            if i + 1 < len(token):
+                split.append(token[i + 1:])
+            return split
+        if c not in plain:
+            return None
+        split.append("-" + c)
+    return split
+
+
+def _path(sub, token):
+    if sub in PATH_ARGS and token.startswith("./") and len(token) > 2:
+        return token[2:]
+    return token
+
+
+def canonical(text):
+    """Forma canonica di un comando scritto dal giocatore"""
+    return normalize(tokenize(text))
+
+
+class CommandMatcher:
+    """Automa deterministico che riconosce un insieme di comandi accettati"""
+
+    __slots__ = ('patterns', 'dfa')
+
+    def __init__(self, patterns):
+        self.patterns = tuple(patterns)
+        self.dfa = _build_dfa([_pattern_tokens(p) for p in self.patterns])
+
+    def __reduce__(self):
+        return (_restore_matcher, (self.patterns, self.dfa))
+
+    def matches(self, text):
+        return self.match_tokens(canonical(text))
+
+    def match_tokens(self, tokens):
+        """Percorre l'automa una volta sola: O(numero di token)"""
+        dfa = self.dfa
+        state = 0
+        for token in tokens:
+            transitions, default, _ = dfa[state]
+            state = transitions.get(token, default)
+            if state < 0:
+                return False
+        return dfa[state][2]
+
+
+def _restore_matcher(patterns, dfa):
+    matcher = CommandMatcher.__new__(CommandMatcher)
+    matcher.patterns = patterns
+    matcher.dfa = dfa
+    return matcher
+
+
+def _pattern_tokens(pattern):
+    """I jolly restano tali, il resto viene normalizzato come l'input"""
+    tokens = tokenize(pattern)
+    literal = [t if t not in (ANY, REST) else "\0" + t for t in tokens]
+    return tuple(t[1:] if t.startswith("\0") else t for t in normalize(literal))
+
+
+class _Node:
+    __slots__ = ('edges', 'any', 'rest', 'loop', 'final')
+
+    def __init__(self, loop=False):
+        self.edges = {}
+        self.any = None
+        self.rest = None
+        self.loop = loop
+        self.final = False
+
+
+def _build_dfa(patterns):
+    """Trie dei pattern (NFA con jolly) determinizzato con la costruzione per sottoinsiemi"""
+    nodes = [_Node()]
+
+    def child(node, token):
+        if token == ANY:
+            if node.any is None:
+                node.any = len(nodes)
+                nodes.append(_Node())
+            return node.any
+        if token == REST:
+            if node.rest is None:
+                node.rest = len(nodes)
+                nodes.append(_Node(loop=True))
+            return node.rest
+        if token not in node.edges:
+            node.edges[token] = len(nodes)
+            nodes.append(_Node())
+        return node.edges[token]
+
+    for tokens in patterns:
+        current = 0
+        for token in tokens:
+            current = child(nodes[current], token)
+        nodes[current].final = True
+
+    def closure(ids):
+        # `**` può anche non consumare nulla: transizione vuota verso il suo nodo
+        stack = list(ids)
+        seen = set(ids)
+        while stack:
+            rest = nodes[stack.pop()].rest
+            if rest is not None and rest not in seen:
+                seen.add(rest)
+                stack.append(rest)
+        return frozenset(seen)
+
+    def step(state, token):
+        target = set()
+        for i in state:
+            node = nodes[i]
+            if token is not None and token in node.edges:
+                target.add(node.edges[token])
+            if node.any is not None:
+                target.add(node.any)
+            if node.loop:
+                target.add(i)
+        return closure(target)
+
+    # Un `**` finale accetta qualsiasi seguito: tutti gli insiemi che lo contengono
+    # collassano in un unico stato, altrimenti con molti pattern del tipo
+    # "git merge ** X **" gli insiemi possibili crescerebbero in modo esponenziale
+    sink = len(nodes)
+    nodes.append(_Node(loop=True))
+    nodes[sink].final = True
+    accept_all = frozenset({sink})
+
+    start = closure({0})
+    index = {start: 0}
+    order = [start]
+    dfa = []
+    while len(dfa) < len(order):
+        state = order[len(dfa)]
+        alphabet = set()
+        for i in state:
+            alphabet.update(nodes[i].edges)
+
+        def target_id(target):
+            if not target:
+                return -1
+            if any(nodes[i].loop and nodes[i].final for i in target):
+                target = accept_all
+            if target not in index:
+                index[target] = len(order)
+                order.append(target)
+            return index[target]
+
+        transitions = {token: target_id(step(state, token)) for token in sorted(alphabet)}
+        default = target_id(step(state, None))
+        # Le transizioni uguali a quella di default sono superflue
+        transitions = {t: s for t, s in transitions.items() if s != default}
+        dfa.append((transitions, default, any(nodes[i].final for i in state)))
+    return tuple(dfa)
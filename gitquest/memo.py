@@ -0,0 +1,164 @@
+"""
+Output memorizzato dei comandi git di sola lettura.
+
+Molti passi mostrano un output che dipende solo dallo stato del repository:
+`git status` subito dopo la preparazione di uno scenario, `git branch`, `git log`
+dopo i commit fissi. Con migliaia di partite uguali (i modelli di
+gitquest/snapshots.py hanno gli stessi hash per tutti) ognuna lanciava git per
+calcolare lo stesso testo. GitWorker chiede prima a SHARED_OUTPUTS, un LRU
+limitato in byte e condiviso da tutte le sessioni del processo, con la chiave
+(argv, limite dell'output, impronta dello stato).
+
+L'impronta (fingerprint) si calcola leggendo .git con gitquest/inspector.py e
+guardando il working tree, senza processi, e non contiene nulla che dipenda
+dal percorso o dall'ora:
+• HEAD e tutti i ref (sciolti e in packed-refs) con i loro hash
+• il contenuto dell'index (percorsi, modi, hash, stage; non i dati di stat)
+• i file di stato di .git (config, MERGE_HEAD, CHERRY_PICK_HEAD, bisect, rebase...)
+• il working tree: nome, tipo e bit di esecuzione di ogni file; per i file
+  tracciati che corrispondono all'index (dimensione, mtime, ctime e inode, come
+  fa git) basta questo, per gli altri conta il contenuto; il suo hash resta
+  in tokens (uno per sessione) finché i dati di stat del file non cambiano,
+  se il file era già fermo da RACY_NS quando è stato calcolato
+Sono memorizzabili solo i comandi di MEMO_COMMANDS senza gli argomenti che
+fanno dipendere l'output dall'ora o dal reflog (--since, --date=relative,
+HEAD@{1}, formati con %).
+"""
+
+import hashlib
+import os
+import stat
+import time
+
+from gitquest.inspector import RACY_NS
+from gitquest.objects import ObjectCache
+
+# Byte di output tenuti da SHARED_OUTPUTS
+SHARED_OUTPUT_BYTES = 16 << 20
+
+# Sottocomandi il cui output è funzione dello stato del repository
+MEMO_COMMANDS = frozenset({'status', 'branch', 'log', 'show', 'diff', 'shortlog', 'rev-list', 'ls-files',
+                           'ls-tree', 'cat-file', 'blame', 'grep'})
+
+# Opzioni con cui git branch si limita a elencare
+_BRANCH_LIST = frozenset({'-a', '--all', '-r', '--remotes', '-v', '-vv', '--verbose', '--list', '--no-color'})
+
+# Pezzi di argomento che legano l'output all'ora, al reflog o a un file esterno
+_UNSTABLE = ("@{", "%", "--since", "--until", "--after", "--before", "--max-age", "--min-age", "relative",
+             "human", "--walk-reflogs", "--reflog", "--output", "--no-index")
+
+# File e cartelle di .git che cambiano quello che git mostra (operazioni in corso, configurazione)
+_STATE_FILES = ("config", "info/exclude", "info/sparse-checkout", "MERGE_HEAD", "MERGE_MSG", "MERGE_MODE",
+                "CHERRY_PICK_HEAD", "REVERT_HEAD", "ORIG_HEAD", "FETCH_HEAD", "AUTO_MERGE", "BISECT_LOG",
+                "BISECT_START", "BISECT_TERMS", "BISECT_EXPECTED_REV", "shallow")
+_STATE_DIRS = ("rebase-merge", "rebase-apply", "sequencer")
+
+
+class OutputCache(ObjectCache):
+    """LRU dei risultati (successo, stdout, stderr) limitato in byte"""
+
+    def cost(self, value):
+        return len(value[1]) + len(value[2]) + self.OVERHEAD
+
+
+SHARED_OUTPUTS = OutputCache(SHARED_OUTPUT_BYTES)
+
+
+def memoizable(argv):
+    """True se l'output di argv dipende solo dallo stato del repository"""
+    if len(argv) < 2 or argv[0] != "git" or argv[1] not in MEMO_COMMANDS:
+        return False
+    args = argv[2:]
+    if argv[1] == "branch":
+        # Con un nome git branch crea, rinomina o cancella
+        return all(arg in _BRANCH_LIST for arg in args)
+    if argv[1] == "log" and "-g" in args:
+        return False
+    return not any(part in arg for arg in args for part in _UNSTABLE)
+
+
+def fingerprint(inspector, tokens=None):
+    """Impronta dello stato del repository (bytes); None se non è un repository
+
+    tokens (percorso -> (dati di stat, hash del contenuto)) ricorda gli hash dei
+    file del working tree tra una chiamata e l'altra.
+    """
+    head = inspector.head()
+    if head is None:
+        return None
+    git_dir = inspector.git_dir
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{head[0]} {head[1]}\n".encode())
+    for name, oid in sorted(inspector.refs("refs/").items()):
+        digest.update(f"{name} {oid}\n".encode("utf-8", "surrogateescape"))
+    index = inspector.index()
+    digest.update(index.content_key())
+    for name in _STATE_FILES:
+        _add_file(digest, name, os.path.join(git_dir, name))
+    for name in _STATE_DIRS:
+        base = os.path.join(git_dir, name)
+        for current, dirs, files in os.walk(base):
+            dirs.sort()
+            for filename in sorted(files):
+                path = os.path.join(current, filename)
+                _add_file(digest, os.path.relpath(path, git_dir), path)
+    try:
+        # Un file modificato nello stesso istante in cui è stato scritto l'index va riletto (racy git)
+        index_mtime = os.stat(os.path.join(git_dir, "index")).st_mtime_ns
+    except OSError:
+        index_mtime = 0
+    _add_worktree(digest, inspector.repo_dir, "", index.entries, index_mtime,
+                  {} if tokens is None else tokens, time.time_ns() - RACY_NS)
+    return digest.digest()
+
+
+def _add_file(digest, name, path):
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+        return
+    digest.update(b"%s %d\n" % (name.encode("utf-8", "surrogateescape"), len(data)))
+    digest.update(data)
+
+
+def _add_worktree(digest, root, prefix, entries, index_mtime, tokens, settled):
+    try:
+        items = sorted(os.scandir(os.path.join(root, prefix) if prefix else root), key=lambda e: e.name)
+    except (FileNotFoundError, NotADirectoryError):
+        return
+    for item in items:
+        if item.name == ".git":
+            continue
+        rel = prefix + item.name
+        st = item.stat(follow_symlinks=False)
+        if stat.S_ISDIR(st.st_mode):
+            _add_worktree(digest, root, rel + "/", entries, index_mtime, tokens, settled)
+            continue
+        name = rel.encode("utf-8", "surrogateescape")
+        if stat.S_ISLNK(st.st_mode):
+            digest.update(b"L %s\0%s\n" % (name, os.fsencode(os.readlink(item.path))))
+            continue
+        if not stat.S_ISREG(st.st_mode):
+            continue
+        # Come git: conta solo il bit di esecuzione del proprietario
+        executable = b"x" if st.st_mode & stat.S_IXUSR else b"-"
+        entry = entries.get(rel)
+        if (entry is not None and entry.size == st.st_size & 0xffffffff and entry.mtime == st.st_mtime_ns
+                and entry.ctime == st.st_ctime_ns and entry.ino == st.st_ino & 0xffffffff
+                and st.st_mtime_ns < index_mtime):
+            digest.update(b"= %s %s\n" % (executable, name))
+            continue
+        key = (st.st_size, st.st_mtime_ns, st.st_ctime_ns, st.st_ino)
+        known = tokens.get(rel)
+        if known is not None and known[0] == key:
+            content = known[1]
+        else:
+            try:
+                with open(item.path, "rb") as f:
+                    content = hashlib.blake2b(f.read(), digest_size=20).digest()
+            except OSError:
+                content = b"?"
+            if st.st_ctime_ns < settled:
+                tokens[rel] = (key, content)
+        digest.update(b"F %s %s\0%s\n" % (executable, name, content))
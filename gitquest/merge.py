@@ -0,0 +1,423 @@
+"""
+Fusione a tre vie di file di testo, tutta in memoria.
+
+Il confronto riga per riga usa l'algoritmo di Myers (differenze minime, tempo
+proporzionale a lunghezza x numero di differenze), e la fusione segue diff3:
+le zone in cui né "noi" né "loro" hanno toccato la base fanno da punti di
+sincronizzazione, tra una zona e l'altra si decide chi ha cambiato cosa. Come
+git (livello "zealous"), dai conflitti si tolgono le righe uguali sui due lati
+e si uniscono i conflitti separati da tre righe invariate o meno; una modifica
+di un solo lato in mezzo li tiene distinti.
+
+Oltre al testo con i marcatori, il risultato sa produrre le risoluzioni
+classiche (noi, loro, entrambi, base) e check_resolution() valuta un file
+sistemato a mano: marcatori rimasti e scelta fatta per ogni conflitto.
+"""
+
+import bisect
+from collections import Counter
+
+MARKERS = ("<<<<<<<", "=======", ">>>>>>>", "|||||||")
+
+# Conflitti separati da più righe invariate di così restano distinti (come git)
+MERGE_DISTANCE = 3
+
+# Sotto questa lunghezza Myers diretto costa meno della ricerca delle ancore
+ANCHOR_THRESHOLD = 64
+
+CHOICES = ('ours', 'theirs', 'both', 'base')
+
+
+def split_lines(text):
+    """Righe con il loro a capo, così un file senza a capo finale resta distinguibile"""
+    return text.splitlines(keepends=True)
+
+
+def diff_blocks(a, b):
+    """Blocchi uguali (i, j, n) tra due liste di righe: a[i:i+n] == b[j:j+n]
+
+    Differenza minima di Myers, calcolata solo sulla parte centrale dopo aver
+    tolto il prefisso e il suffisso comuni (di solito quasi tutto il file).
+    """
+    n, m = len(a), len(b)
+    start = 0
+    while start < n and start < m and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < n - start and end < m - start and a[n - 1 - end] == b[m - 1 - end]:
+        end += 1
+
+    blocks = []
+    if start:
+        blocks.append((0, 0, start))
+    for i, j, size in _anchored(a[start:n - end], b[start:m - end]):
+        _append(blocks, start + i, start + j, size)
+    if end:
+        _append(blocks, n - end, m - end, end)
+    return blocks
+
+
+def _append(blocks, i, j, size):
+    if blocks:
+        bi, bj, bsize = blocks[-1]
+        if bi + bsize == i and bj + bsize == j:
+            blocks[-1] = (bi, bj, bsize + size)
+            return
+    blocks.append((i, j, size))
+
+
+def _anchored(a, b):
+    """Myers a pezzi: le righe presenti una sola volta in entrambi i lati fanno da ancore
+
+    Con poche modifiche sparse in un file lungo quasi ogni riga è un'ancora, e
+    Myers lavora solo sui piccoli tratti tra un'ancora e l'altra invece che
+    sull'intero file (dove costerebbe lunghezza x modifiche).
+    """
+    if len(a) < ANCHOR_THRESHOLD or len(b) < ANCHOR_THRESHOLD:
+        return _myers(a, b)
+    counts_a, counts_b = Counter(a), Counter(b)
+    position_b = {line: j for j, line in enumerate(b) if counts_b[line] == 1 and counts_a[line] == 1}
+    anchors = [(i, position_b[line]) for i, line in enumerate(a) if line in position_b]
+    if not anchors:
+        return _myers(a, b)
+    if any(p[1] >= q[1] for p, q in zip(anchors, anchors[1:])):
+        # Righe spostate: si tengono le ancore nell'ordine più lungo possibile
+        anchors = _increasing(anchors)
+
+    blocks = []
+    io = jo = 0
+    k = 0
+    while k <= len(anchors):
+        if k < len(anchors):
+            i, j = anchors[k]
+            size = 1
+            while k + size < len(anchors) and anchors[k + size] == (i + size, j + size):
+                size += 1
+        else:
+            i, j, size = len(a), len(b), 0
+        if i > io and j > jo:
+            for bi, bj, gap in diff_blocks(a[io:i], b[jo:j]):
+                _append(blocks, io + bi, jo + bj, gap)
+        if size:
+            _append(blocks, i, j, size)
+        io, jo = i + size, j + size
+        k += size or 1
+    return blocks
+
+
+def _increasing(pairs):
+    """Sottosequenza più lunga con j crescente (patience sorting)"""
+    tails = []
+    tail_values = []
+    links = []
+    for index, (_, j) in enumerate(pairs):
+        pos = bisect.bisect_left(tail_values, j)
+        links.append(tails[pos - 1] if pos else -1)
+        if pos == len(tails):
+            tails.append(index)
+            tail_values.append(j)
+        else:
+            tails[pos] = index
+            tail_values[pos] = j
+    result = []
+    index = tails[-1] if tails else -1
+    while index >= 0:
+        result.append(pairs[index])
+        index = links[index]
+    result.reverse()
+    return result
+
+
+def _myers(a, b):
+    n, m = len(a), len(b)
+    if not n or not m:
+        return []
+    limit = n + m
+    offset = limit + 1
+    v = [0] * (2 * limit + 3)
+    # trace[d] contiene v[k] per k in -d-1..d+1 all'inizio del passo d
+    trace = []
+    for d in range(limit + 1):
+        trace.append(v[offset - d - 1:offset + d + 2])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                return _backtrack(trace, n, m)
+    return []
+
+
+def _backtrack(trace, x, y):
+    matches = []
+    for d in range(len(trace) - 1, -1, -1):
+        saved = trace[d]
+        k = x - y
+        if k == -d or (k != d and saved[k + d] < saved[k + d + 2]):
+            prev_k = k + 1
+        else:
+            prev_k = k - 1
+        prev_x = saved[prev_k + d + 1]
+        prev_y = prev_x - prev_k
+        while x > prev_x and y > prev_y and x > 0 and y > 0:
+            x -= 1
+            y -= 1
+            matches.append((x, y))
+        x, y = prev_x, prev_y
+
+    blocks = []
+    for i, j in reversed(matches):
+        if blocks:
+            bi, bj, size = blocks[-1]
+            if bi + size == i and bj + size == j:
+                blocks[-1] = (bi, bj, size + 1)
+                continue
+        blocks.append((i, j, 1))
+    return blocks
+
+
+def _sync_regions(base, ours, theirs):
+    """Zone della base rimaste uguali su entrambi i lati (più il terminatore)"""
+    regions = []
+    a_blocks, b_blocks = diff_blocks(base, ours), diff_blocks(base, theirs)
+    ia = ib = 0
+    while ia < len(a_blocks) and ib < len(b_blocks):
+        a_base, a_pos, a_len = a_blocks[ia]
+        b_base, b_pos, b_len = b_blocks[ib]
+        low, high = max(a_base, b_base), min(a_base + a_len, b_base + b_len)
+        if low < high:
+            a_sub, b_sub = a_pos + low - a_base, b_pos + low - b_base
+            regions.append((low, high, a_sub, a_sub + high - low, b_sub, b_sub + high - low))
+        if a_base + a_len < b_base + b_len:
+            ia += 1
+        else:
+            ib += 1
+    regions.append((len(base), len(base), len(ours), len(ours), len(theirs), len(theirs)))
+    return regions
+
+
+class Conflict:
+    """Un blocco in conflitto: le righe della base e dei due lati"""
+
+    __slots__ = ('base', 'ours', 'theirs')
+
+    def __init__(self, base, ours, theirs):
+        # base è None se il blocco nasce dalla rifinitura di un conflitto più grande
+        self.base = base
+        self.ours = ours
+        self.theirs = theirs
+
+    def choose(self, choice):
+        if choice == 'ours':
+            return self.ours
+        if choice == 'theirs':
+            return self.theirs
+        if choice == 'both':
+            return self.ours + self.theirs
+        if choice == 'base' and self.base is not None:
+            return self.base
+        raise ValueError(f"scelta non valida: {choice}")
+
+    def classify(self, lines):
+        """Quale scelta corrisponde alle righe date ('custom' se nessuna)"""
+        for choice in CHOICES:
+            if choice == 'base' and self.base is None:
+                continue
+            if lines == self.choose(choice):
+                return choice
+        if lines == self.theirs + self.ours:
+            return 'both'
+        return 'custom'
+
+
+class MergeResult:
+    """Esito della fusione: sequenza di blocchi (liste di righe stabili o Conflict)"""
+
+    __slots__ = ('hunks',)
+
+    def __init__(self, hunks):
+        self.hunks = hunks
+
+    @property
+    def conflicts(self):
+        return [hunk for hunk in self.hunks if isinstance(hunk, Conflict)]
+
+    @property
+    def clean(self):
+        return not any(isinstance(hunk, Conflict) for hunk in self.hunks)
+
+    def render(self, label_ours="HEAD", label_theirs="theirs"):
+        """Testo con i marcatori di conflitto, come lo lascia git merge"""
+        out = []
+        for hunk in self.hunks:
+            if isinstance(hunk, Conflict):
+                out.append(f"<<<<<<< {label_ours}\n")
+                out.extend(_terminated(hunk.ours))
+                out.append("=======\n")
+                out.extend(_terminated(hunk.theirs))
+                out.append(f">>>>>>> {label_theirs}\n")
+            else:
+                out.extend(hunk)
+        return "".join(out)
+
+    def resolve(self, choices):
+        """Testo risolto: una scelta per tutti i conflitti o una per ciascuno"""
+        if isinstance(choices, str):
+            choices = [choices] * len(self.conflicts)
+        choices = iter(choices)
+        out = []
+        for hunk in self.hunks:
+            out.extend(hunk.choose(next(choices)) if isinstance(hunk, Conflict) else hunk)
+        return "".join(out)
+
+
+def _terminated(lines):
+    # Un lato che finisce senza a capo non deve incollarsi al marcatore successivo
+    if lines and not lines[-1].endswith("\n"):
+        return lines[:-1] + [lines[-1] + "\n"]
+    return lines
+
+
+def merge3(base, ours, theirs):
+    """Fusione a tre vie di tre testi (o liste di righe)"""
+    if isinstance(base, str):
+        base, ours, theirs = split_lines(base), split_lines(ours), split_lines(theirs)
+
+    hunks = []
+    iz = ia = ib = 0
+    for z_start, z_end, a_start, a_end, b_start, b_end in _sync_regions(base, ours, theirs):
+        if z_start > iz or a_start > ia or b_start > ib:
+            o, t, b = ours[ia:a_start], theirs[ib:b_start], base[iz:z_start]
+            if o == t:
+                # Stessa modifica sui due lati: per git non è un cambiamento che separa i conflitti
+                _stable(hunks, o)
+            elif t == b:
+                _change(hunks, o)
+            elif o == b:
+                _change(hunks, t)
+            else:
+                _refine(hunks, b, o, t)
+        _stable(hunks, base[z_start:z_end])
+        iz, ia, ib = z_end, a_end, b_end
+    return MergeResult(_coalesce(hunks))
+
+
+def _stable(hunks, lines):
+    if not lines:
+        return
+    if hunks and isinstance(hunks[-1], list):
+        hunks[-1].extend(lines)
+    else:
+        hunks.append(list(lines))
+
+
+def _change(hunks, lines):
+    # None segna la modifica di un solo lato (anche solo cancellazioni): _coalesce non la scavalca
+    hunks.append(None)
+    _stable(hunks, lines)
+
+
+def _refine(hunks, base, ours, theirs):
+    """Divide un conflitto sulle righe uguali nei due lati (git: xdl_refine_conflicts)"""
+    blocks = diff_blocks(ours, theirs)
+    if not blocks:
+        hunks.append(Conflict(base, ours, theirs))
+        return
+    io = it = 0
+    for i, j, size in blocks + [(len(ours), len(theirs), 0)]:
+        if i > io or j > it:
+            hunks.append(Conflict(None, ours[io:i], theirs[it:j]))
+        _stable(hunks, ours[i:i + size])
+        io, it = i + size, j + size
+
+
+def _coalesce(hunks):
+    """Unisce i conflitti separati solo da poche righe invariate (git: xdl_simplify_non_conflicts)"""
+    merged = []
+    changed = False
+    for hunk in hunks:
+        if hunk is None:
+            changed = True
+            continue
+        if not isinstance(hunk, Conflict):
+            if merged and not isinstance(merged[-1], Conflict):
+                merged[-1].extend(hunk)
+            else:
+                merged.append(hunk)
+            continue
+        if (not changed and len(merged) >= 2 and isinstance(merged[-2], Conflict)
+                and len(merged[-1]) <= MERGE_DISTANCE):
+            between = merged.pop()
+            previous = merged.pop()
+            hunk = Conflict(None, previous.ours + between + hunk.ours, previous.theirs + between + hunk.theirs)
+        merged.append(hunk)
+        changed = False
+    return merged
+
+
+class Resolution:
+    """Valutazione di un file sistemato a mano"""
+
+    __slots__ = ('markers', 'choices', 'edited')
+
+    def __init__(self, markers, choices, edited):
+        # Numeri (da 1) delle righe che sembrano ancora marcatori di conflitto
+        self.markers = markers
+        # Per ogni conflitto: 'ours', 'theirs', 'both', 'base', 'custom' o None se non trovato
+        self.choices = choices
+        # True se sono cambiate anche righe fuori dai conflitti
+        self.edited = edited
+
+    @property
+    def ok(self):
+        return not self.markers
+
+
+def check_resolution(text, result):
+    """Confronta il testo risolto con l'esito della fusione"""
+    lines = split_lines(text)
+    markers = [n for n, line in enumerate(lines, 1) if line.startswith(MARKERS)]
+    choices = []
+    edited = False
+    pos = 0
+    pending = None
+    for hunk in result.hunks:
+        if isinstance(hunk, Conflict):
+            pending = (hunk, pos)
+            continue
+        found = _find(lines, hunk, pos)
+        if found is None:
+            edited = True
+            if pending is not None:
+                choices.append(None)
+                pending = None
+            continue
+        if pending is not None:
+            conflict, start = pending
+            choices.append(conflict.classify(lines[start:found]))
+            pending = None
+        elif found != pos:
+            edited = True
+        pos = found + len(hunk)
+    if pending is not None:
+        conflict, start = pending
+        choices.append(conflict.classify(lines[start:]))
+    elif pos != len(lines):
+        edited = True
+    return Resolution(markers, choices, edited)
+
+
+def _find(lines, block, start):
+    """Prima posizione >= start da cui lines contiene block"""
+    size = len(block)
+    first = block[0]
+    for i in range(start, len(lines) - size + 1):
+        if lines[i] == first and lines[i:i + size] == block:
+            return i
+    return None
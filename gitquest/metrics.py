@@ -0,0 +1,193 @@
+"""
+Strumentazione dei comandi eseguiti dal gioco.
+
+Ogni chiamata a run_command può essere registrata come CommandEvent (comando,
+durata, exit code, byte di stdout/stderr, livello o scenario in corso) e passata
+ai "sink" di un oggetto Instrumentation. Le etichette delle metriche non
+contengono mai testo del giocatore: solo sottocomandi git noti, "other" o
+"rejected" per i comandi che la Policy non ha accettato.
+• CommandStats: contatori e istogrammi in memoria, esportabili nel formato
+  testuale di Prometheus (endpoint /metrics in modalità server) o come tabella
+• JsonlTrace: un evento JSON per riga in un file locale
+Senza Instrumentation il gioco non misura nulla: il costo è un solo controllo
+su self.instruments per comando.
+"""
+
+import bisect
+import json
+import time
+
+from gitquest.sandbox import GIT_FLAGS
+
+# Limiti superiori (secondi) dei bucket dell'istogramma delle durate
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# Sottocomandi con un'etichetta propria: quelli ammessi al giocatore più quelli
+# che lancia solo il gioco; tutti gli altri comandi finiscono in OTHER
+LABELLED_SUBCOMMANDS = frozenset(GIT_FLAGS) | {'rev-list', 'rev-parse', 'grep', 'ls-tree', 'ls-files',
+                                               'cat-file', 'config'}
+OTHER = "other"
+# Comandi del giocatore rifiutati dalla Policy (gitquest/sandbox.py)
+REJECTED = "rejected"
+
+
+def command_label(argv):
+    """Etichetta a bassa cardinalità dall'argv: 'git commit', 'git log' o OTHER"""
+    if len(argv) > 1 and argv[0] == "git" and argv[1] in LABELLED_SUBCOMMANDS:
+        return f"git {argv[1]}"
+    return OTHER
+
+
+class CommandEvent:
+    """Un comando eseguito: cosa, quanto è durato, com'è andato e dove"""
+
+    __slots__ = ('timestamp', 'command', 'label', 'state', 'duration', 'success', 'returncode',
+                 'stdout_bytes', 'stderr_bytes', 'exception')
+
+    def __init__(self, command, label, state, duration, success, returncode, stdout_bytes, stderr_bytes,
+                 exception=None):
+        self.timestamp = time.time()
+        self.command = command
+        # command_label dell'argv eseguito, oppure REJECTED
+        self.label = label
+        self.state = state
+        self.duration = duration
+        self.success = success
+        self.returncode = returncode
+        # None se l'output è andato direttamente al terminale senza passare da noi
+        self.stdout_bytes = stdout_bytes
+        self.stderr_bytes = stderr_bytes
+        self.exception = exception
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Instrumentation:
+    """Inoltra ogni evento a tutti i sink registrati"""
+
+    def __init__(self, *sinks):
+        self.sinks = list(sinks)
+
+    def add(self, sink):
+        self.sinks.append(sink)
+        return sink
+
+    def record(self, event):
+        for sink in self.sinks:
+            sink.record(event)
+
+    def close(self):
+        for sink in self.sinks:
+            close = getattr(sink, 'close', None)
+            if close is not None:
+                close()
+
+
+class _Series:
+    __slots__ = ('count', 'failures', 'total', 'maximum', 'buckets', 'stdout_bytes', 'stderr_bytes')
+
+    def __init__(self):
+        self.count = 0
+        self.failures = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.buckets = [0] * (len(DURATION_BUCKETS) + 1)
+        self.stdout_bytes = 0
+        self.stderr_bytes = 0
+
+
+class CommandStats:
+    """Contatori e istogrammi per comando e per livello"""
+
+    def __init__(self):
+        self.by_command = {}
+        self.by_state = {}
+        self.exceptions = 0
+
+    def record(self, event):
+        series = self.by_command.get(event.label)
+        if series is None:
+            series = self.by_command[event.label] = _Series()
+        series.count += 1
+        series.total += event.duration
+        if event.duration > series.maximum:
+            series.maximum = event.duration
+        series.buckets[bisect.bisect_left(DURATION_BUCKETS, event.duration)] += 1
+        if not event.success:
+            series.failures += 1
+        if event.stdout_bytes is not None:
+            series.stdout_bytes += event.stdout_bytes
+            series.stderr_bytes += event.stderr_bytes
+        if event.exception is not None:
+            self.exceptions += 1
+
+        key = (event.state or "", event.label)
+        self.by_state[key] = self.by_state.get(key, 0.0) + event.duration
+
+    def prometheus(self, extra=None):
+        """Metriche nel formato testuale di Prometheus (text exposition 0.0.4)"""
+        lines = ["# HELP gitquest_commands_total Comandi eseguiti, per comando ed esito.",
+                 "# TYPE gitquest_commands_total counter"]
+        for label, s in sorted(self.by_command.items()):
+            name = _escape(label)
+            lines.append(f'gitquest_commands_total{{command="{name}",result="ok"}} {s.count - s.failures}')
+            lines.append(f'gitquest_commands_total{{command="{name}",result="error"}} {s.failures}')
+
+        lines += ["# HELP gitquest_command_duration_seconds Durata dei comandi.",
+                  "# TYPE gitquest_command_duration_seconds histogram"]
+        for label, s in sorted(self.by_command.items()):
+            name = _escape(label)
+            cumulative = 0
+            for bound, count in zip(DURATION_BUCKETS + ("+Inf",), s.buckets):
+                cumulative += count
+                lines.append(f'gitquest_command_duration_seconds_bucket{{command="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'gitquest_command_duration_seconds_sum{{command="{name}"}} {s.total:.6f}')
+            lines.append(f'gitquest_command_duration_seconds_count{{command="{name}"}} {s.count}')
+
+        lines += ["# HELP gitquest_command_output_bytes_total Byte prodotti dai comandi.",
+                  "# TYPE gitquest_command_output_bytes_total counter"]
+        for label, s in sorted(self.by_command.items()):
+            name = _escape(label)
+            lines.append(f'gitquest_command_output_bytes_total{{command="{name}",stream="stdout"}} {s.stdout_bytes}')
+            lines.append(f'gitquest_command_output_bytes_total{{command="{name}",stream="stderr"}} {s.stderr_bytes}')
+
+        lines += ["# HELP gitquest_state_command_seconds_total Tempo passato nei comandi, per livello.",
+                  "# TYPE gitquest_state_command_seconds_total counter"]
+        for (state, label), total in sorted(self.by_state.items()):
+            lines.append(f'gitquest_state_command_seconds_total{{state="{_escape(state)}",'
+                         f'command="{_escape(label)}"}} {total:.6f}')
+
+        lines += ["# HELP gitquest_command_exceptions_total Comandi interrotti da un'eccezione.",
+                  "# TYPE gitquest_command_exceptions_total counter",
+                  f"gitquest_command_exceptions_total {self.exceptions}"]
+        for name, (kind, help_text, value) in (extra or {}).items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+    def format_table(self):
+        """Riepilogo leggibile, dal comando che ha richiesto più tempo"""
+        rows = [f"{'comando':<22}{'volte':>7}{'errori':>8}{'totale ms':>11}{'medio ms':>10}{'max ms':>9}"]
+        for label, s in sorted(self.by_command.items(), key=lambda item: -item[1].total):
+            rows.append(f"{label:<22}{s.count:>7}{s.failures:>8}{s.total * 1000:>11.1f}"
+                        f"{s.total / s.count * 1000:>10.2f}{s.maximum * 1000:>9.2f}")
+        return "\n".join(rows) + "\n"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class JsonlTrace:
+    """Traccia su file: un evento JSON per riga, in append"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "a", encoding="utf-8")
+
+    def record(self, event):
+        self.file.write(json.dumps(event.to_dict(), ensure_ascii=False) + "\n")
+
+    def close(self):
+        self.file.close()
@@ -0,0 +1,424 @@
+"""
+Lettura degli oggetti di git (commit, tree, blob, tag) senza lanciare git.
+
+gitquest/inspector.py sapeva leggere solo gli oggetti sciolti: appena git li
+metteva in un pack (git gc, un clone, i modelli di gitquest/snapshots.py e le
+storie di gitquest/synthetic.py nascono già impacchettati) le verifiche
+restavano indecise e ogni `git log` mostrato al giocatore costava un processo.
+ObjectStore legge entrambi:
+• gli oggetti sciolti in objects/xx/..., decompressi con zlib
+• gli oggetti nei pack: il .idx (versione 2) è mappato in memoria con mmap e
+  l'hash si cerca con una ricerca binaria dentro il suo intervallo della
+  tabella fanout; dal .pack, anch'esso mappato, si decomprime l'oggetto e si
+  applicano i delta (OFS_DELTA verso un offset dello stesso pack, REF_DELTA
+  verso un hash)
+Gli oggetti decompressi finiscono in ObjectCache, un LRU limitato in byte. La
+chiave è l'hash, che identifica il contenuto in qualsiasi repository: per
+questo SHARED_CACHE può essere la stessa per tutte le sessioni del processo,
+e i giocatori che partono dallo stesso modello (pack in hardlink) leggono la
+storia comune una volta sola. Le basi dei delta si ritrovano per (device,
+inode, offset) del pack, che con gli hardlink è lo stesso per tutti.
+
+Gli oggetti che mancano (alternates, repository shallow) danno None: chi legge
+torna a chiedere a git.
+"""
+
+import mmap
+import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+
+# Tipi degli oggetti nei pack
+_TYPES = {1: "commit", 2: "tree", 3: "blob", 4: "tag"}
+_OFS_DELTA = 6
+_REF_DELTA = 7
+
+_IDX_MAGIC = b"\377tOc"
+_FANOUT = struct.Struct(">256I")
+
+# Byte di oggetti decompressi tenuti in memoria da SHARED_CACHE
+SHARED_CACHE_BYTES = 64 << 20
+
+# Hash abbreviati ricordati da ogni ObjectStore
+ABBREV_MEMO = 4096
+
+# Delta annidati oltre i quali il pack è considerato rotto (git ne crea al massimo 50)
+MAX_DELTA_DEPTH = 1000
+
+
+class ObjectCache:
+    """LRU di oggetti decompressi limitato in byte, usabile da più thread"""
+
+    # Costo fisso stimato di una voce, oltre ai byte del contenuto
+    OVERHEAD = 100
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def cost(self, value):
+        """Byte occupati da una voce (tipo, contenuto)"""
+        return len(value[1]) + self.OVERHEAD
+
+    def put(self, key, value):
+        cost = self.cost(value)
+        # Un blob enorme svuoterebbe la cache per un solo oggetto
+        if cost > self.max_bytes // 4:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= self.cost(old)
+            self._items[key] = value
+            self.size += cost
+            while self.size > self.max_bytes:
+                _, dropped = self._items.popitem(last=False)
+                self.size -= self.cost(dropped)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._items)
+
+
+SHARED_CACHE = ObjectCache(SHARED_CACHE_BYTES)
+
+
+def _map(path):
+    """Il file mappato in sola lettura; None se vuoto"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class Pack:
+    """Un pack con il suo indice, entrambi mappati in memoria"""
+
+    def __init__(self, idx_path):
+        self.idx_path = idx_path
+        self.pack_path = idx_path[:-4] + ".pack"
+        self.idx = _map(idx_path)
+        if self.idx is None or self.idx[:4] != _IDX_MAGIC or struct.unpack_from(">I", self.idx, 4)[0] != 2:
+            self.close()
+            raise ValueError(f"{idx_path}: indice di pack non supportato")
+        self.fanout = _FANOUT.unpack_from(self.idx, 8)
+        self.count = self.fanout[255]
+        self._names = 8 + _FANOUT.size
+        self._offsets = self._names + 24 * self.count
+        self._large = self._offsets + 4 * self.count
+        self.pack = _map(self.pack_path)
+        if self.pack is None:
+            self.close()
+            raise ValueError(f"{self.pack_path}: pack vuoto")
+        st = os.stat(self.pack_path)
+        # Uguale per tutte le copie in hardlink dello stesso pack
+        self.key = (st.st_dev, st.st_ino)
+
+    def close(self):
+        for mapped in (getattr(self, 'idx', None), getattr(self, 'pack', None)):
+            if mapped is not None:
+                mapped.close()
+        self.idx = self.pack = None
+
+    def name(self, i):
+        start = self._names + 20 * i
+        return self.idx[start:start + 20]
+
+    def position(self, raw):
+        """(indice, trovato) dell'hash raw (20 byte) nella tabella ordinata del .idx"""
+        lo = self.fanout[raw[0] - 1] if raw[0] else 0
+        hi = self.fanout[raw[0]]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            name = self.name(mid)
+            if name < raw:
+                lo = mid + 1
+            elif name > raw:
+                hi = mid
+            else:
+                return mid, True
+        return lo, False
+
+    def offset(self, i):
+        offset = struct.unpack_from(">I", self.idx, self._offsets + 4 * i)[0]
+        if offset & 0x80000000:
+            # Pack oltre i 2 GiB: l'offset vero è nella tabella a 8 byte
+            offset = struct.unpack_from(">Q", self.idx, self._large + 8 * (offset & 0x7fffffff))[0]
+        return offset
+
+    def find(self, raw):
+        """Offset dell'oggetto nel pack, None se non c'è"""
+        i, found = self.position(raw)
+        return self.offset(i) if found else None
+
+    def read(self, offset, store, depth=0):
+        """(tipo, contenuto) dell'oggetto all'offset, con i delta già applicati
+
+        Le basi dei delta (depth > 0) restano in cache per offset: molti delta
+        dello stesso file ripartono dalla stessa base. Gli altri oggetti li
+        mette in cache per hash ObjectStore.read.
+        """
+        if depth > MAX_DELTA_DEPTH:
+            raise ValueError(f"{self.pack_path}: catena di delta troppo lunga")
+        key = self.key + (offset,)
+        if depth:
+            cached = store.cache.get(key)
+            if cached is not None:
+                return cached
+        data = self.pack
+        byte = data[offset]
+        kind = (byte >> 4) & 7
+        size = byte & 15
+        shift = 4
+        pos = offset + 1
+        while byte & 0x80:
+            byte = data[pos]
+            pos += 1
+            size |= (byte & 0x7f) << shift
+            shift += 7
+        if kind == _OFS_DELTA:
+            byte = data[pos]
+            pos += 1
+            distance = byte & 0x7f
+            while byte & 0x80:
+                byte = data[pos]
+                pos += 1
+                distance = ((distance + 1) << 7) | (byte & 0x7f)
+            base = self.read(offset - distance, store, depth + 1)
+        elif kind == _REF_DELTA:
+            base = store.read(data[pos:pos + 20].hex(), depth + 1)
+            pos += 20
+            if base is None:
+                return None
+        elif kind in _TYPES:
+            base = None
+        else:
+            raise ValueError(f"{self.pack_path}: tipo di oggetto {kind} sconosciuto all'offset {offset}")
+        content = _inflate(data, pos, size)
+        value = (base[0], apply_delta(base[1], content)) if base is not None else (_TYPES[kind], content)
+        if depth:
+            store.cache.put(key, value)
+        return value
+
+
+def _inflate(data, pos, size):
+    """I size byte decompressi a partire da pos (il flusso zlib non dice quanto è lungo)"""
+    inflater = zlib.decompressobj()
+    parts = []
+    chunk = size + 64
+    while not inflater.eof:
+        if pos >= len(data):
+            raise ValueError("oggetto troncato nel pack")
+        parts.append(inflater.decompress(data[pos:pos + chunk]))
+        pos += chunk
+        chunk = max(chunk, 1 << 16)
+    content = b"".join(parts)
+    if len(content) != size:
+        raise ValueError("dimensione dell'oggetto diversa da quella dichiarata nel pack")
+    return content
+
+
+def _delta_size(delta, pos):
+    size = shift = 0
+    while True:
+        byte = delta[pos]
+        pos += 1
+        size |= (byte & 0x7f) << shift
+        shift += 7
+        if not byte & 0x80:
+            return size, pos
+
+
+def apply_delta(base, delta):
+    """Ricostruisce un oggetto dalla base e dalle istruzioni del delta (copia o inserisci)"""
+    source, pos = _delta_size(delta, 0)
+    target, pos = _delta_size(delta, pos)
+    if source != len(base):
+        raise ValueError("delta calcolato su una base diversa")
+    out = bytearray()
+    end = len(delta)
+    while pos < end:
+        op = delta[pos]
+        pos += 1
+        if op & 0x80:
+            # Copia dalla base: offset e lunghezza in byte opzionali segnalati dai bit di op
+            start = length = 0
+            for bit in range(4):
+                if op & (1 << bit):
+                    start |= delta[pos] << (8 * bit)
+                    pos += 1
+            for bit in range(3):
+                if op & (0x10 << bit):
+                    length |= delta[pos] << (8 * bit)
+                    pos += 1
+            out += base[start:start + (length or 0x10000)]
+        elif op:
+            out += delta[pos:pos + op]
+            pos += op
+        else:
+            raise ValueError("istruzione di delta non valida")
+    if len(out) != target:
+        raise ValueError("delta applicato con una dimensione diversa da quella attesa")
+    return bytes(out)
+
+
+class ObjectStore:
+    """Gli oggetti di un repository: sciolti e nei pack"""
+
+    def __init__(self, git_dir, cache=SHARED_CACHE):
+        self.objects = os.path.join(git_dir, "objects")
+        self.cache = cache
+        self._packs = []
+        # mtime di objects/pack all'ultima scansione: un pack nuovo (git gc) la cambia
+        self._scanned = None
+        # oid -> ((scansione dei pack, mtime della cartella degli sciolti), caratteri necessari)
+        self._abbrevs = {}
+
+    def close(self):
+        for pack in self._packs:
+            pack.close()
+        self._packs = []
+        self._scanned = None
+
+    def packs(self, rescan=False):
+        """I pack del repository, riletti se la cartella è cambiata dall'ultima volta"""
+        directory = os.path.join(self.objects, "pack")
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime != self._scanned or rescan:
+            known = {pack.idx_path: pack for pack in self._packs}
+            packs = []
+            names = sorted(os.listdir(directory)) if mtime is not None else []
+            for name in names:
+                if not name.endswith(".idx") or name[:-4] + ".pack" not in names:
+                    continue
+                path = os.path.join(directory, name)
+                pack = known.pop(path, None)
+                if pack is None:
+                    try:
+                        pack = Pack(path)
+                    except (OSError, ValueError):
+                        continue
+                packs.append(pack)
+            # Pack spariti (git gc li ha fusi in uno nuovo)
+            for pack in known.values():
+                pack.close()
+            self._packs = packs
+            self._scanned = mtime
+        return self._packs
+
+    def read(self, oid, depth=0):
+        """(tipo, contenuto) dell'oggetto; None se il repository non lo contiene"""
+        cached = self.cache.get(oid)
+        if cached is not None:
+            return cached
+        value = self._read_loose(oid)
+        if value is None:
+            value = self._read_packed(oid, depth)
+        if value is not None:
+            self.cache.put(oid, value)
+        return value
+
+    def _read_loose(self, oid):
+        path = os.path.join(self.objects, oid[:2], oid[2:])
+        try:
+            with open(path, "rb") as f:
+                raw = zlib.decompress(f.read())
+        except (FileNotFoundError, NotADirectoryError, zlib.error):
+            return None
+        header, _, data = raw.partition(b"\0")
+        return header.split(b" ", 1)[0].decode(), data
+
+    def _read_packed(self, oid, depth):
+        try:
+            raw = bytes.fromhex(oid)
+        except ValueError:
+            return None
+        if len(raw) != 20:
+            return None
+        for rescan in (False, True):
+            for pack in self.packs(rescan):
+                offset = pack.find(raw)
+                if offset is not None:
+                    try:
+                        return pack.read(offset, self, depth)
+                    except (ValueError, IndexError, zlib.error):
+                        # Pack rovinato o troncato: come se l'oggetto non ci fosse
+                        return None
+            if self._scanned is None:
+                break
+        return None
+
+    def count(self):
+        """Oggetti nei pack: la stima che git usa per decidere la lunghezza degli hash abbreviati"""
+        return sum(pack.count for pack in self.packs())
+
+    def abbrev_length(self):
+        """Lunghezza minima degli hash abbreviati, calcolata come fa git con core.abbrev=auto"""
+        count = self.count()
+        if not count:
+            return 7
+        return max(7, (count.bit_length() + 1) // 2)
+
+    def abbrev(self, oid, length=None):
+        """L'hash abbreviato come lo mostra git: abbastanza lungo da non essere ambiguo"""
+        if length is None:
+            length = self.abbrev_length()
+        directory = os.path.join(self.objects, oid[:2])
+        try:
+            loose = os.stat(directory).st_mtime_ns
+        except OSError:
+            loose = None
+        packs = self.packs()
+        # Finché non arrivano oggetti nuovi con lo stesso inizio la risposta non cambia
+        key = (self._scanned, loose)
+        hit = self._abbrevs.get(oid)
+        if hit is not None and hit[0] == key:
+            return oid[:max(length, hit[1])]
+        longest = 0
+        names = os.listdir(directory) if loose is not None else ()
+        for name in names:
+            if len(name) == 38 and name != oid[2:]:
+                longest = max(longest, 2 + _common(name, oid[2:]))
+        raw = bytes.fromhex(oid)
+        for pack in packs:
+            i, found = pack.position(raw)
+            for j in (i - 1, i + 1 if found else i):
+                if 0 <= j < pack.count:
+                    longest = max(longest, _common(pack.name(j).hex(), oid))
+        if len(self._abbrevs) >= ABBREV_MEMO:
+            self._abbrevs.clear()
+        self._abbrevs[oid] = (key, longest + 1)
+        return oid[:max(length, longest + 1)]
+
+
+def _common(a, b):
+    """Caratteri iniziali uguali di due hash esadecimali"""
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
@@ -0,0 +1,80 @@
+"""
+Rendering del testo a schermo.
+
+Invece di un print() per ogni messaggio, il gioco accoda le righe già colorate
+e le scrive tutte insieme quando serve davvero: prima di chiedere qualcosa al
+giocatore, prima che un comando scriva direttamente sul terminale e a fine
+partita. Ogni schermata diventa così una sola write (un solo pacchetto in
+modalità server).
+
+I testi statici dei livelli arrivano già colorati da gitquest/levels.py. Se
+l'output non è un terminale (file, pipe, copioni) o NO_COLOR è impostata, i
+codici ANSI vengono omessi.
+"""
+
+import os
+
+COLORS = {
+    'GREEN': '\033[92m',
+    'RED': '\033[91m',
+    'YELLOW': '\033[93m',
+    'BLUE': '\033[94m',
+    'PURPLE': '\033[95m',
+    'CYAN': '\033[96m',
+    'WHITE': '\033[97m',
+    'BOLD': '\033[1m',
+    'END': '\033[0m'
+}
+PLAIN = dict.fromkeys(COLORS, "")
+
+
+def paint(text, color='END', codes=COLORS):
+    """Riga completa (con a capo) nei colori indicati"""
+    return f"{codes[color]}{text}{codes['END']}\n"
+
+
+def prerender(text, color='END'):
+    """Le due versioni di un testo statico: (a colori, senza colori)"""
+    return paint(text, color), text + "\n"
+
+
+def supports_color(out):
+    """True se l'output è un terminale che capisce i codici ANSI"""
+    if os.environ.get("NO_COLOR"):
+        return False
+    isatty = getattr(out, 'isatty', None)
+    try:
+        return bool(isatty and isatty())
+    except ValueError:
+        return False
+
+
+class Renderer:
+    """Accoda il testo di una schermata e lo scrive con una sola write"""
+
+    __slots__ = ('out', 'color', 'codes', 'pending')
+
+    def __init__(self, out, color=None):
+        self.out = out
+        self.color = supports_color(out) if color is None else color
+        self.codes = COLORS if self.color else PLAIN
+        self.pending = []
+
+    def line(self, text, color='END'):
+        self.pending.append(paint(text, color, self.codes))
+
+    def static(self, rendered):
+        """Testo preparato da prerender()"""
+        self.pending.append(rendered[0] if self.color else rendered[1])
+
+    def write(self, text):
+        self.pending.append(text)
+
+    def flush(self):
+        if self.pending:
+            text = "".join(self.pending)
+            self.pending.clear()
+            self.out.write(text)
+        flush = getattr(self.out, 'flush', None)
+        if flush is not None:
+            flush()
@@ -0,0 +1,318 @@
+"""
+Comandi scritti dal giocatore.
+
+Nei passi {"run": "$input"} e {"run": "git cherry-pick $input"} il testo del
+giocatore finiva in GitWorker.run, che per qualsiasi sintassi di shell
+(; | $(...) > ...) passava da /bin/sh: sul server condiviso chiunque poteva
+eseguire comandi arbitrari. Ora quei passi passano da una Policy:
+• il comando viene diviso in argv come farebbe la shell, ma gli operatori di
+  shell fuori dagli apici vengono rifiutati invece che interpretati
+• sono ammessi solo "git <sottocomando>" tra quelli permessi dal livello
+  ("allow" in gitquest/data/quest.json), senza opzioni globali (-c, -C, --git-dir...)
+• le opzioni devono essere nella tabella GIT_FLAGS, che contiene solo opzioni
+  che non eseguono programmi, non leggono e non scrivono file fuori dal repository
+• i percorsi assoluti o che risalgono con .. vengono rifiutati
+• per i comandi con azioni (git bisect good, git sparse-checkout set...) la
+  prima parola deve essere in GIT_ACTIONS: `git bisect run` eseguirebbe un
+  programma qualsiasi
+git viene poi eseguito direttamente (mai la shell) da run_limited, con limiti
+di CPU, dimensione dei file e memoria impostati nel figlio prima di exec, un
+limite di tempo reale e l'output limitato di gitquest/capture.py; editor e richieste di credenziali
+sono disattivati, perché nessuno potrebbe rispondere.
+
+Un "allow" elenca per ogni sottocomando le opzioni ammesse, oppure true per
+tutte quelle della tabella:
+    "allow": {"add": true, "commit": ["-m", "--message", "-a"]}
+"""
+
+import os
+import shlex
+import signal
+import subprocess
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from gitquest.capture import MAX_BYTES, MAX_LINES, Capture, is_read_only, pump
+
+# Opzioni ammesse per sottocomando: True se l'opzione prende un valore
+GIT_FLAGS = {
+    'init': {'-q': False, '--quiet': False, '-b': True, '--initial-branch': True},
+    'add': {'-A': False, '--all': False, '-u': False, '--update': False, '-v': False, '--verbose': False,
+            '-n': False, '--dry-run': False, '-f': False, '--force': False},
+    'commit': {'-m': True, '--message': True, '-a': False, '--all': False, '--amend': False,
+               '--no-edit': False, '--allow-empty': False, '-q': False, '--quiet': False,
+               '-v': False, '--verbose': False, '-s': False, '--signoff': False, '--no-verify': False},
+    'status': {'-s': False, '--short': False, '-b': False, '--branch': False, '--porcelain': False,
+               '--long': False},
+    'log': {'--oneline': False, '--graph': False, '--all': False, '--decorate': False, '-n': True,
+            '--max-count': True, '--stat': False, '-p': False, '--patch': False, '--author': True,
+            '--grep': True, '--since': True, '--until': True, '--reverse': False, '--format': True,
+            '--pretty': True, '--name-only': False, '--merges': False, '--no-merges': False,
+            '-S': True, '-G': True, '--first-parent': False, '--follow': False, '--name-status': False,
+            '--date': True},
+    'checkout': {'-b': True, '-B': True, '-f': False, '--force': False, '-q': False, '--quiet': False},
+    'switch': {'-c': True, '--create': True, '-C': True, '--force-create': True, '--detach': False,
+               '-f': False, '--force': False, '-q': False},
+    'branch': {'-d': False, '--delete': False, '-D': False, '-a': False, '--all': False, '-v': False,
+               '-m': False, '-M': False, '--list': False, '-r': False},
+    'merge': {'--abort': False, '--continue': False, '--no-ff': False, '--ff-only': False, '-m': True,
+              '--no-edit': False, '--squash': False},
+    'cherry-pick': {'--abort': False, '--continue': False, '--skip': False, '-n': False,
+                    '--no-commit': False, '-x': False},
+    'restore': {'--staged': False, '-S': False, '--worktree': False, '-W': False, '--source': True,
+                '-s': True},
+    'reset': {'--soft': False, '--hard': False, '--mixed': False, '-q': False},
+    'revert': {'--no-edit': False, '-n': False, '--no-commit': False, '--abort': False,
+               '--continue': False},
+    'rm': {'--cached': False, '-r': False, '-f': False, '-q': False},
+    'diff': {'--cached': False, '--staged': False, '--stat': False, '--name-only': False},
+    'show': {'--stat': False, '--oneline': False, '--name-only': False},
+    'reflog': {'--oneline': False, '-n': True},
+    'stash': {'-m': True, '--message': True, '-u': False, '--include-untracked': False},
+    'tag': {'-a': False, '-m': True, '-d': False, '-l': False, '--list': False},
+    'bisect': {'--no-checkout': False, '--first-parent': False, '--term-old': True, '--term-new': True,
+               '--term-good': True, '--term-bad': True},
+    'blame': {'-L': True, '-w': False, '-s': False, '-e': False, '-l': False, '-M': False, '-C': False,
+              '--date': True, '--since': True, '--porcelain': False, '--line-porcelain': False},
+    'sparse-checkout': {'--cone': False, '--no-cone': False, '--sparse-index': False,
+                        '--no-sparse-index': False},
+}
+
+# Azioni ammesse (prima parola dopo il sottocomando) per i comandi che ne hanno
+GIT_ACTIONS = {
+    'bisect': {'start', 'bad', 'good', 'new', 'old', 'skip', 'reset', 'log', 'terms'},
+    'sparse-checkout': {'set', 'add', 'list', 'init', 'reapply', 'disable'},
+}
+
+# Operatori che, fuori dagli apici, solo una shell saprebbe interpretare
+_SHELL_OPERATORS = set("|&;<>()$`\n")
+
+
+class CommandRejected(Exception):
+    """Il comando non è ammesso in questo punto del gioco"""
+
+
+class Limits:
+    """Limiti di un comando del giocatore
+
+    Secondi di CPU e reali, byte di output per flusso, dimensione massima di un
+    file scritto e memoria virtuale del processo (None = nessun limite).
+    """
+
+    __slots__ = ('cpu', 'wall', 'output', 'file_size', 'memory')
+
+    def __init__(self, cpu=5, wall=15, output=MAX_BYTES, file_size=64 << 20, memory=2 << 30):
+        self.cpu = cpu
+        self.wall = wall
+        self.output = output
+        self.file_size = file_size
+        self.memory = memory
+
+
+DEFAULT_LIMITS = Limits()
+
+
+class Policy:
+    """Sottocomandi git e opzioni che il giocatore può usare in un livello"""
+
+    __slots__ = ('commands',)
+
+    def __init__(self, commands):
+        # sottocomando -> {opzione: prende un valore}
+        self.commands = commands
+
+    def __reduce__(self):
+        return (Policy, (self.commands,))
+
+    def check(self, command):
+        """argv del comando se è ammesso, altrimenti CommandRejected"""
+        argv = split(command)
+        if argv[0] != "git":
+            raise CommandRejected("qui sono ammessi solo comandi git")
+        if len(argv) < 2:
+            raise CommandRejected("manca il comando git da eseguire")
+        sub = argv[1]
+        if sub.startswith("-"):
+            raise CommandRejected(f"opzione {sub} non ammessa prima del comando git")
+        flags = self.commands.get(sub)
+        if flags is None:
+            raise CommandRejected(f"git {sub} non è previsto in questo punto del gioco")
+        args = argv[2:]
+        actions = GIT_ACTIONS.get(sub)
+        if actions is not None:
+            action = next((arg for arg in args if not arg.startswith("-")), None)
+            if action is not None and action not in actions:
+                raise CommandRejected(f"git {sub} {action} non è ammesso")
+        i = 0
+        paths = False
+        while i < len(args):
+            arg = args[i]
+            if paths or arg == "-" or not arg.startswith("-"):
+                _check_path(arg)
+            elif arg == "--":
+                paths = True
+            elif arg.startswith("--"):
+                name, eq, _ = arg.partition("=")
+                takes = _flag(flags, sub, name)
+                if takes and not eq:
+                    i += 1
+                    _value(args, i, name)
+                elif eq and not takes:
+                    raise CommandRejected(f"l'opzione {name} non prende un valore")
+            elif arg[1:].isdigit() and '-n' in flags:
+                # git log -3 = git log -n 3
+                pass
+            else:
+                # Opzioni brevi raggruppate: -am "msg", -mmsg
+                for j, ch in enumerate(arg[1:], 2):
+                    if _flag(flags, sub, "-" + ch):
+                        if j == len(arg):
+                            i += 1
+                            _value(args, i, "-" + ch)
+                        break
+            i += 1
+        return argv
+
+
+def split(command):
+    """Divide il comando come la shell, rifiutando gli operatori fuori dagli apici"""
+    quote = None
+    for ch in command:
+        if quote == "'":
+            if ch == "'":
+                quote = None
+        elif quote == '"':
+            if ch == '"':
+                quote = None
+        elif ch in "'\"":
+            quote = ch
+        elif ch in _SHELL_OPERATORS:
+            raise CommandRejected(f"gli operatori di shell non sono ammessi ({ch.strip() or 'a capo'})")
+    try:
+        argv = shlex.split(command)
+    except ValueError as e:
+        raise CommandRejected(f"comando non valido: {e}") from None
+    if not argv:
+        raise CommandRejected("comando vuoto")
+    return argv
+
+
+def _flag(flags, sub, name):
+    takes = flags.get(name)
+    if takes is None:
+        raise CommandRejected(f"l'opzione {name} di git {sub} non è ammessa")
+    return takes
+
+
+def _value(args, i, name):
+    if i >= len(args):
+        raise CommandRejected(f"manca il valore dell'opzione {name}")
+
+
+def _check_path(arg):
+    if arg.startswith("/") or ".." in arg.replace("\\", "/").split("/"):
+        raise CommandRejected(f"{arg}: sono ammessi solo percorsi dentro il repository")
+
+
+def compile_policy(spec):
+    """Policy da un "allow" dei contenuti; ValueError se nomina comandi o opzioni sconosciuti"""
+    commands = {}
+    for sub, allowed in spec.items():
+        known = GIT_FLAGS.get(sub)
+        if known is None:
+            raise ValueError(f"git {sub} non è tra i comandi ammissibili")
+        if allowed is True:
+            commands[sub] = dict(known)
+            continue
+        unknown = [flag for flag in allowed if flag not in known]
+        if unknown:
+            raise ValueError(f"opzioni non ammissibili per git {sub}: {', '.join(unknown)}")
+        commands[sub] = {flag: known[flag] for flag in allowed}
+    return Policy(commands)
+
+
+# Per i livelli che eseguono comandi del giocatore senza dichiarare un "allow"
+DEFAULT_POLICY = compile_policy(dict.fromkeys(GIT_FLAGS, True))
+
+
+def _environment(env):
+    env = dict(os.environ if env is None else env)
+    # Nessuno può rispondere a un editor o a una richiesta di password
+    env.update(GIT_EDITOR=":", GIT_SEQUENCE_EDITOR=":", GIT_PAGER="cat", GIT_TERMINAL_PROMPT="0",
+               GIT_ASKPASS="", SSH_ASKPASS="")
+    return env
+
+
+def _rlimits(limits):
+    """preexec_fn che imposta i limiti nel figlio, così valgono già per git; None se non si può"""
+    if resource is None:
+        return None
+    wanted = [(resource.RLIMIT_CPU, limits.cpu, None if limits.cpu is None else limits.cpu + 1),
+              (resource.RLIMIT_FSIZE, limits.file_size, limits.file_size),
+              (resource.RLIMIT_AS, limits.memory, limits.memory)]
+    settings = []
+    for which, soft, hard in wanted:
+        if soft is None:
+            continue
+        # Il limite massimo non si può alzare: si resta sotto quello del server
+        _, current = resource.getrlimit(which)
+        if current != resource.RLIM_INFINITY:
+            soft, hard = min(soft, current), min(hard, current)
+        settings.append((which, (soft, hard)))
+
+    def apply():
+        # Nel figlio tra fork ed exec: niente import né allocazioni superflue
+        for which, values in settings:
+            resource.setrlimit(which, values)
+
+    return apply
+
+
+def run_limited(argv, cwd, env=None, limits=DEFAULT_LIMITS, sink=None):
+    """Esegue argv senza shell entro i limiti; restituisce (exit code, stdout, stderr)
+
+    L'output oltre limits.output è troncato come in gitquest/capture.py (con sink
+    va al renderer man mano). Se finisce il tempo o la CPU il processo, con i
+    suoi figli, viene terminato e all'errore si aggiunge il motivo.
+    """
+    # Senza il modulo resource (Windows) restano il tempo reale e l'output
+    proc = subprocess.Popen(argv, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            cwd=cwd, env=_environment(env), start_new_session=True,
+                            preexec_fn=_rlimits(limits))
+    out = Capture(limits.output, MAX_LINES, sink)
+    err = Capture(limits.output, MAX_LINES, sink)
+    stopped = pump(proc, out, err, time.monotonic() + limits.wall, stop_when_full=is_read_only(argv))
+    if stopped is not None:
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except (AttributeError, OSError):
+            proc.kill()
+    proc.stdout.close()
+    proc.stderr.close()
+    returncode = proc.wait()
+    reason = None
+    if stopped == "timeout":
+        reason = f"superato il limite di tempo ({limits.wall} s)"
+    elif stopped == "full":
+        returncode = 0
+    elif returncode == -getattr(signal, 'SIGXCPU', 0):
+        reason = f"superato il limite di CPU ({limits.cpu} s)"
+    elif returncode == -getattr(signal, 'SIGXFSZ', 0):
+        reason = f"superata la dimensione massima di un file ({limits.file_size >> 20} MiB)"
+    out.finish()
+    err.finish()
+    error = err.text()
+    if reason is not None:
+        # L'avviso arriva anche se lo stderr era già pieno
+        reason = f"⛔ Comando interrotto: {reason}\n"
+        if sink is not None:
+            sink(reason)
+        else:
+            error += reason
+        if returncode == 0:
+            returncode = -9
+    return returncode, out.text(), error
@@ -0,0 +1,246 @@
+"""
+Modalità server: molte partite contemporanee sullo stesso host.
+
+Ogni connessione (TCP/telnet o socket Unix locale) riceve la sua sessione
+GitMasterQuest con una directory di lavoro isolata (gitquest/workspace.py). Le sessioni sono coroutine
+dello stesso event loop: un giocatore fermo su un prompt non occupa né thread
+né processi, mentre i comandi git bloccanti girano in un executor limitato
+condiviso da tutti.
+
+Con una directory di salvataggi (gitquest/checkpoint.py) chi si identifica con
+un nome ritrova la partita dove l'aveva lasciata se la connessione cade.
+
+Un giocatore che non risponde per idle_timeout secondi viene disconnesso come
+se fosse caduta la connessione (partita salvata, directory liberata). Quando il
+server si ferma, ogni partita viene messa in pausa (QuestEngine.pause: si ferma
+al prossimo cambio di stato e restituisce il checkpoint) e le letture in corso
+vengono annullate allo stesso modo: le sessioni finiscono in ordine invece di
+essere interrotte a metà, e chi ha un nome riprende da lì quando si ricollega.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from gitquest.inputs import StreamInput
+from gitquest.metrics import CommandStats
+from gitquest.workspace import WorkspaceManager
+
+# Secondi senza risposta dopo cui una sessione viene chiusa
+IDLE_TIMEOUT = 30 * 60
+
+# Secondi concessi alle sessioni per chiudersi quando il server si ferma
+SHUTDOWN_GRACE = 10
+
+
+class SessionOutput:
+    """Adatta lo StreamWriter della connessione all'interfaccia di un file di testo"""
+
+    def __init__(self, writer):
+        self.writer = writer
+
+    def write(self, text):
+        if not self.writer.is_closing():
+            # I client telnet si aspettano CRLF a fine riga
+            self.writer.write(text.replace("\n", "\r\n").encode("utf-8"))
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        # Dall'altra parte c'è un client telnet: i colori vanno mandati
+        return True
+
+    async def drain(self):
+        if not self.writer.is_closing():
+            await self.writer.drain()
+
+
+class QuestServer:
+    """Accetta connessioni e avvia una sessione di gioco per ciascuna"""
+
+    def __init__(self, game_class, root=None, max_sessions=300, git_workers=None, snapshots=None,
+                 practice=False, instruments=None, workspaces=None, saves=None, analytics=None,
+                 idle_timeout=IDLE_TIMEOUT, deterministic=False):
+        self.game_class = game_class
+        # Directory delle sessioni: per default in RAM, con quota e pulizia a fine partita
+        self.workspaces = workspaces or WorkspaceManager(root)
+        self.snapshots = snapshots
+        # CheckpointStore delle partite interrotte, oppure None (nessun salvataggio)
+        self.saves = saves
+        # In modalità pratica le sessioni non hanno directory né processi git
+        self.practice = practice
+        # Identità e date fisse nei repository dei giocatori: stessi hash per partite uguali
+        self.deterministic = deterministic
+        self.max_sessions = max_sessions
+        # None = i giocatori fermi restano collegati per sempre
+        self.idle_timeout = idle_timeout
+        # Partite in corso, per chiuderle quando il server si ferma: task -> gioco
+        self.active = {}
+        # Pochi thread bastano: lavorano solo mentre git è in esecuzione
+        self.executor = ThreadPoolExecutor(max_workers=git_workers or (os.cpu_count() or 1) * 2,
+                                           thread_name_prefix="git")
+        self.sessions = 0
+        self.sessions_total = 0
+        # Strumentazione condivisa da tutte le sessioni; le statistiche servono a /metrics
+        self.instruments = instruments
+        # AnswerLog condiviso: le risposte di tutte le sessioni finiscono nello stesso registro
+        self.analytics = analytics
+        self.stats = None
+        if instruments is not None:
+            self.stats = next((s for s in instruments.sinks if isinstance(s, CommandStats)), None)
+
+    async def handle(self, reader, writer):
+        """Gestisce una singola connessione dall'inizio alla fine"""
+        out = SessionOutput(writer)
+        if self.sessions >= self.max_sessions:
+            out.write("Server pieno, riprova tra poco!\n")
+            await out.drain()
+            writer.close()
+            return
+
+        self.sessions += 1
+        self.sessions_total += 1
+        source = StreamInput(reader, timeout=self.idle_timeout)
+        if self.practice:
+            workspace = None
+            game = self.game_class(repo_dir="/pratica", reader=source, out=out, snapshots=self.snapshots,
+                                   practice=True, instruments=self.instruments, analytics=self.analytics)
+        else:
+            workspace = self.workspaces.create()
+            game = self.game_class(workspace=workspace, reader=source, out=out, executor=self.executor,
+                                   snapshots=self.snapshots, instruments=self.instruments,
+                                   analytics=self.analytics, deterministic=self.deterministic)
+        task = asyncio.current_task()
+        self.active[task] = game
+        player = None
+        try:
+            checkpoint = None
+            if self.saves is not None:
+                player, checkpoint = await self.identify(game)
+            paused = await game.play(checkpoint)
+            await out.drain()
+            if player and paused is not None:
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(self.executor, self.save, player, game)
+            elif player:
+                self.saves.discard(player)
+        except (EOFError, ConnectionError):
+            if player and game.engine.checkpoint is not None:
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(self.executor, self.save, player, game)
+        finally:
+            del self.active[task]
+            self.sessions -= 1
+            writer.close()
+            if workspace is not None:
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(self.executor, game.git.close)
+                await loop.run_in_executor(self.executor, workspace.release)
+
+    def save(self, player, game):
+        """Salva la partita interrotta, con il repository di quando è cominciato lo stato"""
+        self.saves.save(player, game.save_point())
+
+    async def identify(self, game):
+        """Chiede il nome del giocatore; restituisce (nome, checkpoint salvato o None)"""
+        player = (await game.ask("👤 Nome utente per salvare i progressi (INVIO = partita anonima): ")).strip()
+        if not player:
+            return None, None
+        game.enable_checkpoints()
+        loop = asyncio.get_running_loop()
+        checkpoint = await loop.run_in_executor(self.executor, self.saves.load, player)
+        if checkpoint is not None:
+            game.print_colored(f"💾 Bentornato {player}! Riprendi dal livello {game.engine.resume_level(checkpoint)} "
+                               f"con {checkpoint['score']} punti.", 'GREEN')
+        return player, checkpoint
+
+    async def shutdown(self, grace=SHUTDOWN_GRACE):
+        """Chiude le partite in corso come disconnessioni: chi ha un nome ritrova la sua"""
+        tasks = list(self.active)
+        for game in self.active.values():
+            game.print_colored("\n🔌 Il server si sta fermando, la partita finisce qui.", 'YELLOW')
+            # Chi sta eseguendo un comando si ferma all'inizio dello stato successivo
+            game.engine.pause()
+            game.input.cancel()
+        if tasks:
+            await asyncio.wait(tasks, timeout=grace)
+
+    def metrics_text(self):
+        """Metriche Prometheus: comandi git più lo stato delle sessioni"""
+        extra = {
+            'gitquest_sessions_active': ('gauge', "Sessioni in corso.", self.sessions),
+            'gitquest_sessions_started_total': ('counter', "Sessioni avviate.", self.sessions_total),
+        }
+        # Riserva di repository pronti (gitquest/warmpool.py), se il server ne ha una
+        warm = getattr(self.snapshots, 'stats', None)
+        if warm is not None:
+            warm = warm()
+            extra['gitquest_warm_ready'] = ('gauge', "Repository di scenario pronti nella riserva.",
+                                            sum(warm['ready'].values()))
+            extra['gitquest_warm_hits_total'] = ('counter', "Scenari consegnati dalla riserva.", warm['hits'])
+            extra['gitquest_warm_misses_total'] = ('counter', "Scenari istanziati al momento (riserva vuota).",
+                                                   warm['misses'])
+        if self.analytics is not None:
+            extra['gitquest_answers_dropped_total'] = ('counter', "Risposte perse: scrittura del registro fallita.",
+                                                       self.analytics.dropped)
+        stats = self.stats or CommandStats()
+        return stats.prometheus(extra)
+
+    async def handle_metrics(self, reader, writer):
+        """Endpoint HTTP minimale: GET /metrics"""
+        try:
+            request = await reader.readline()
+            while (await reader.readline()).strip():
+                pass
+            parts = request.split()
+            if len(parts) >= 2 and parts[0] == b"GET" and parts[1].split(b"?")[0] == b"/metrics":
+                status, body = "200 OK", self.metrics_text().encode("utf-8")
+            else:
+                status, body = "404 Not Found", b"usa /metrics\n"
+            writer.write(f"HTTP/1.0 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                         f"Content-Length: {len(body)}\r\n\r\n".encode("ascii") + body)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host="0.0.0.0", port=2323, unix_path=None, metrics_port=None):
+        """Resta in ascolto finché il processo non viene fermato"""
+        # Sessioni rimaste da un server precedente terminato male
+        self.workspaces.sweep()
+        if self.snapshots is not None:
+            # I modelli si costruiscono una volta sola, prima del primo giocatore
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self.executor, self.snapshots.build_all)
+        if metrics_port:
+            await asyncio.start_server(self.handle_metrics, host, metrics_port)
+        if unix_path:
+            server = await asyncio.start_unix_server(self.handle, path=unix_path)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            try:
+                await server.serve_forever()
+            finally:
+                await self.shutdown()
+
+
+def run_server(game_class, host="0.0.0.0", port=2323, unix_path=None, root=None,
+               max_sessions=300, git_workers=None, snapshots=None, practice=False, instruments=None,
+               metrics_port=None, workspaces=None, saves=None, analytics=None, idle_timeout=IDLE_TIMEOUT,
+               deterministic=False):
+    """Avvia il server di gioco (bloccante)"""
+    server = QuestServer(game_class, root=root, max_sessions=max_sessions, git_workers=git_workers,
+                         snapshots=snapshots, practice=practice, instruments=instruments,
+                         workspaces=workspaces, saves=saves, analytics=analytics, idle_timeout=idle_timeout,
+                         deterministic=deterministic)
+    try:
+        asyncio.run(server.serve(host, port, unix_path, metrics_port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.executor.shutdown(wait=False)
+        server.workspaces.close()
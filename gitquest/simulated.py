@@ -0,0 +1,1517 @@
+"""
+Git simulato in memoria per la modalità pratica.
+
+Molti passi del gioco servono solo a mostrare un output plausibile (git status,
+git branch, git log --oneline...), eppure ognuno toccava il disco e lanciava git.
+SimulatedGit modella commit, ref, index e working tree come semplici strutture
+Python ed espone la stessa interfaccia di GitWorker:
+    run(comando, capture_output) -> (successo, stdout, stderr)
+più i metodi per i file del working tree usati dai livelli.
+
+Gli hash sono quelli veri di git (blob/tree/commit calcolati con SHA-1) e l'orologio
+è deterministico, quindi due partite uguali producono lo stesso output: utile
+per i test e per ospitare moltissime sessioni senza I/O né sottoprocessi.
+
+Comandi emulati: init, status, add, rm, commit, branch, checkout, switch, restore,
+log, reflog, reset, revert, merge, cherry-pick, stash, diff, rev-parse, config.
+"""
+
+import difflib
+import hashlib
+import shlex
+import sys
+import time
+
+from gitquest.builder import commands
+from gitquest.merge import merge3
+from gitquest.snapshots import TEMPLATE_ENV, SnapshotError, answer_key
+
+# 2024-01-01T12:00:00+0100, la stessa data dei modelli su disco
+EPOCH = 1704106800
+TZ_OFFSET = 3600
+TZ_NAME = "+0100"
+
+_DAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+_MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+_DETACHED_ADVICE = (
+    "You are in 'detached HEAD' state. You can look around, make experimental\n"
+    "changes and commit them, and you can discard any commits you make in this\n"
+    "state without impacting any branches by switching back to a branch.\n\n"
+    "If you want to create a new branch to retain commits you create, you may\n"
+    "do so (now or later) by using -c with the switch command. Example:\n\n"
+    "  git switch -c <new-branch-name>\n\n"
+    "Or undo this operation with:\n\n"
+    "  git switch -\n\n"
+    "Turn off this advice by setting config variable advice.detachedHead to false\n\n"
+)
+
+
+class GitError(Exception):
+    """Comando fallito: messaggio su stderr, eventuale output su stdout"""
+
+    def __init__(self, message, out="", code=128):
+        super().__init__(message)
+        self.message = message
+        self.out = out
+        self.code = code
+
+
+class Commit:
+    __slots__ = ('oid', 'tree', 'parents', 'message', 'author', 'time')
+
+    def __init__(self, oid, tree, parents, message, author, time):
+        self.oid = oid
+        self.tree = tree
+        self.parents = parents
+        self.message = message
+        self.author = author
+        self.time = time
+
+    @property
+    def subject(self):
+        return self.message.split("\n", 1)[0]
+
+
+class DeterministicClock:
+    """Un minuto in più per ogni commit, a partire da EPOCH"""
+
+    def __init__(self, start=EPOCH, step=60):
+        self.now = start - step
+        self.step = step
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+
+def _blob_id(content):
+    data = content.encode("utf-8")
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).digest()
+
+
+def _tree_id(files):
+    """Hash del tree come lo calcolerebbe git, con le sottodirectory annidate"""
+    entries = {}
+    subdirs = {}
+    for path, content in files.items():
+        head, sep, rest = path.partition("/")
+        if sep:
+            subdirs.setdefault(head, {})[rest] = content
+        else:
+            entries[head] = b"100644 " + head.encode("utf-8") + b"\0" + _blob_id(content)
+    for name, sub in subdirs.items():
+        entries[name + "/"] = b"40000 " + name.encode("utf-8") + b"\0" + _tree_id(sub)
+    data = b"".join(entries[name] for name in sorted(entries))
+    return hashlib.sha1(b"tree %d\0" % len(data) + data).digest()
+
+
+def format_date(timestamp):
+    """Data nel formato di git log: Mon Jan 1 12:00:00 2024 +0100"""
+    t = time.gmtime(timestamp + TZ_OFFSET)
+    return (f"{_DAYS[t.tm_wday]} {_MONTHS[t.tm_mon - 1]} {t.tm_mday} "
+            f"{t.tm_hour:02d}:{t.tm_min:02d}:{t.tm_sec:02d} {t.tm_year} {TZ_NAME}")
+
+
+def _lines(content):
+    return content.splitlines(keepends=True) if content else []
+
+
+def _line_changes(old, new):
+    """Righe aggiunte e tolte tra due versioni di un file"""
+    added = removed = 0
+    matcher = difflib.SequenceMatcher(None, _lines(old), _lines(new), autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != 'equal':
+            removed += i2 - i1
+            added += j2 - j1
+    return added, removed
+
+
+def merge_trees(base, ours, theirs, label_ours, label_theirs):
+    """Fusione a tre vie di due tree: (tree risultante, conflitti, messaggi)
+
+    I conflitti sono {percorso: (base, nostro, loro)}; nel tree risultante i file
+    in conflitto contengono i marcatori (o la versione sopravvissuta).
+    """
+    merged = {}
+    conflicts = {}
+    messages = []
+    for path in sorted(set(base) | set(ours) | set(theirs)):
+        b, o, t = base.get(path), ours.get(path), theirs.get(path)
+        if o == t or b == t:
+            result = o
+        elif b == o:
+            result = t
+        elif o is not None and t is not None:
+            messages.append(f"Auto-merging {path}")
+            outcome = merge3(b or "", o, t)
+            result = outcome.render(label_ours, label_theirs)
+            if not outcome.clean:
+                kind = "content" if b is not None else "add/add"
+                messages.append(f"CONFLICT ({kind}): Merge conflict in {path}")
+                conflicts[path] = (b, o, t)
+        else:
+            result = o if o is not None else t
+            deleted = label_theirs if o is not None else label_ours
+            messages.append(f"CONFLICT (modify/delete): {path} deleted in {deleted} and modified in "
+                            f"{label_ours if o is not None else label_theirs}.")
+            conflicts[path] = (b, o, t)
+        if result is not None:
+            merged[path] = result
+    return merged, conflicts, messages
+
+
+class SimulatedGit:
+    """Repository git interamente in memoria, con la stessa interfaccia di GitWorker"""
+
+    def __init__(self, cwd="/pratica", out=None, clock=None, default_branch="main"):
+        self.cwd = cwd
+        self.out = out
+        self.clock = clock or DeterministicClock()
+        self.default_branch = default_branch
+        self.stats = {'simulated': 0, 'unsupported': 0}
+        self.returncode = None
+        self.config = {'user.name': TEMPLATE_ENV['GIT_AUTHOR_NAME'],
+                       'user.email': TEMPLATE_ENV['GIT_AUTHOR_EMAIL']}
+        self.worktree = {}
+        self._reset_repository()
+        self.initialized = False
+
+    def _reset_repository(self):
+        self.initialized = True
+        self.commits = {}
+        self.branches = {}
+        self.head = self.default_branch
+        self.detached = None
+        self.index = {}
+        self.unmerged = {}
+        self.reflog = []
+        self.merge_head = None
+        self.merge_msg = None
+        self.pending = None
+        self.stashes = []
+
+    # --- Interfaccia comune con GitWorker -------------------------------
+
+    def run(self, command, capture_output=True):
+        """Esegue un comando e restituisce (successo, stdout, stderr)"""
+        self.stats['simulated'] += 1
+        out = []
+        err = []
+        success = True
+        self.returncode = 0
+        try:
+            sequence = self._parse(command)
+        except GitError as e:
+            sequence = []
+            success = False
+            self.returncode = e.code
+            err.append(e.message)
+        for operator, argv in sequence:
+            if operator == "&&" and not success:
+                break
+            try:
+                stdout, stderr = self._dispatch(argv)
+                success = True
+                self.returncode = 0
+            except GitError as e:
+                stdout, stderr = e.out, e.message
+                success = False
+                self.returncode = e.code
+            out.append(stdout)
+            err.append(stderr)
+        output, error = "".join(out), "".join(err)
+        if capture_output:
+            return success, output, error
+        stream = self.out or sys.stdout
+        stream.write(output + error)
+        return success, "", ""
+
+    def close(self):
+        """Niente da chiudere: nessun processo esterno"""
+
+    def write_file(self, name, content):
+        self.worktree[self._path(name)] = content
+
+    def read_file(self, name):
+        path = self._path(name)
+        if path not in self.worktree:
+            raise FileNotFoundError(f"{self.cwd}/{path}")
+        return self.worktree[path]
+
+    def remove_file(self, name):
+        path = self._path(name)
+        if path not in self.worktree:
+            raise FileNotFoundError(f"{self.cwd}/{path}")
+        del self.worktree[path]
+
+    def file_exists(self, name):
+        path = self._path(name)
+        return path in self.worktree or any(p.startswith(path + "/") for p in self.worktree)
+
+    def state(self):
+        """Copia dello stato completo, per i modelli degli scenari"""
+        return (self.initialized, dict(self.commits), dict(self.branches), self.head, self.detached,
+                dict(self.index), dict(self.unmerged), list(self.reflog), self.merge_head,
+                self.merge_msg, self.pending, list(self.stashes), dict(self.worktree),
+                dict(self.config), getattr(self.clock, 'now', None))
+
+    def load_state(self, state):
+        (self.initialized, commits, branches, self.head, self.detached, index, unmerged, reflog,
+         self.merge_head, self.merge_msg, self.pending, stashes, worktree, config, now) = state
+        self.commits, self.branches, self.index = dict(commits), dict(branches), dict(index)
+        self.unmerged, self.reflog, self.stashes = dict(unmerged), list(reflog), list(stashes)
+        self.worktree, self.config = dict(worktree), dict(config)
+        if isinstance(self.clock, DeterministicClock) and now is not None:
+            self.clock.now = max(self.clock.now, now)
+
+    # --- Verifiche dei livelli (le stesse domande di gitquest/inspector.py) --
+
+    def current_branch(self):
+        return None if self.detached else self.head
+
+    def tracked(self, name):
+        return self._path(name) in self.index
+
+    def conflicted(self):
+        return set(self.unmerged)
+
+    def staged(self, name):
+        path = self._path(name)
+        return self.index.get(path) != self._head_tree().get(path)
+
+    def history_contains(self, ref, subject, limit=200):
+        return self.find_commit(ref, subject, limit) is not None
+
+    def find_commit(self, ref, subject, limit=200):
+        start = self._try_resolve(ref)
+        if start is None:
+            return None
+        return next((oid for oid in self._walk([start])[:limit] if self.commits[oid].subject == subject), None)
+
+    # --- Parsing e dispatch -------------------------------------------------
+
+    def _parse(self, command):
+        """Divide la riga in comandi separati da && o ;"""
+        lexer = shlex.shlex(command, posix=True, punctuation_chars=True)
+        lexer.whitespace_split = True
+        try:
+            tokens = list(lexer)
+        except ValueError:
+            raise GitError("sh: apici non chiusi nel comando\n", code=2)
+        sequence = []
+        operator = ";"
+        argv = []
+        for token in tokens:
+            if token in ("&&", ";"):
+                if argv:
+                    sequence.append((operator, argv))
+                operator, argv = token, []
+            elif token and token[0] in "();<>|&":
+                raise GitError(f"sh: '{token}' non è disponibile in modalità pratica\n", code=2)
+            else:
+                argv.append(token)
+        if argv:
+            sequence.append((operator, argv))
+        return sequence
+
+    def _dispatch(self, argv):
+        if argv[0] != "git":
+            self.stats['unsupported'] += 1
+            raise GitError(f"{argv[0]}: comando non disponibile in modalità pratica\n", code=127)
+        if len(argv) == 1 or argv[1] in ("--version", "version"):
+            return "git version 2.39.0 (simulato)\n", ""
+        sub = argv[1]
+        handler = getattr(self, "_git_" + sub.replace("-", "_"), None)
+        if handler is None:
+            self.stats['unsupported'] += 1
+            raise GitError(f"git: '{sub}' non è disponibile in modalità pratica\n", code=1)
+        if sub not in ("init", "config") and not self.initialized:
+            raise GitError("fatal: not a git repository (or any of the parent directories): .git\n")
+        return handler(argv[2:])
+
+    # --- Utilità ----------------------------------------------------------
+
+    def _path(self, name):
+        name = name.replace("\\", "/")
+        while name.startswith("./"):
+            name = name[2:]
+        return name.rstrip("/")
+
+    def _head_oid(self):
+        return self.detached if self.detached else self.branches.get(self.head)
+
+    def _head_tree(self):
+        oid = self._head_oid()
+        return self.commits[oid].tree if oid else {}
+
+    def _short(self, oid):
+        return oid[:7]
+
+    def _ident(self):
+        return f"{self.config.get('user.name', '')} <{self.config.get('user.email', '')}>"
+
+    def _log_ref(self, oid, message):
+        self.reflog.append((oid, message))
+
+    def _set_head(self, oid, message):
+        """Sposta HEAD (o il branch corrente) e registra il movimento nel reflog"""
+        if self.detached:
+            self.detached = oid
+        else:
+            self.branches[self.head] = oid
+        self._log_ref(oid, message)
+
+    def _new_commit(self, tree, parents, message):
+        timestamp = self.clock()
+        author = self._ident()
+        data = f"tree {_tree_id(tree).hex()}\n"
+        for parent in parents:
+            data += f"parent {parent}\n"
+        data += f"author {author} {timestamp} {TZ_NAME}\ncommitter {author} {timestamp} {TZ_NAME}\n\n{message}\n"
+        raw = data.encode("utf-8")
+        oid = hashlib.sha1(b"commit %d\0" % len(raw) + raw).hexdigest()
+        self.commits[oid] = Commit(oid, dict(tree), tuple(parents), message, author, timestamp)
+        return oid
+
+    def _resolve(self, rev):
+        """Risolve HEAD, branch, hash abbreviati, HEAD@{n}, X~n e X^"""
+        oid = self._try_resolve(rev)
+        if oid is None:
+            raise GitError(f"fatal: ambiguous argument '{rev}': unknown revision or path not in the working tree.\n")
+        return oid
+
+    def _try_resolve(self, rev):
+        if not rev:
+            return None
+        # Qui ogni oggetto con un hash è un commit
+        if rev.endswith("^{commit}"):
+            rev = rev[:-len("^{commit}")]
+        end = len(rev)
+        while end > 0 and (rev[end - 1].isdigit() or rev[end - 1] in "~^"):
+            end -= 1
+        base, suffix = rev[:end], rev[end:]
+        if suffix and suffix[0].isdigit():
+            # Il numero fa parte del nome (es. feature1), non di un suffisso
+            skip = len(suffix) - len(suffix.lstrip("0123456789"))
+            base, suffix = rev[:end + skip], suffix[skip:]
+
+        if base in ("HEAD", "@"):
+            oid = self._head_oid()
+        elif base.startswith(("HEAD@{", "@{")) and base.endswith("}"):
+            position = base[base.index("{") + 1:-1]
+            if not position.isdigit() or int(position) >= len(self.reflog):
+                return None
+            oid = self.reflog[-1 - int(position)][0]
+        elif base in self.branches:
+            oid = self.branches[base]
+        elif len(base) >= 4 and all(c in "0123456789abcdef" for c in base):
+            found = [o for o in self.commits if o.startswith(base)]
+            oid = found[0] if len(found) == 1 else None
+        else:
+            oid = None
+
+        i = 0
+        while oid is not None and i < len(suffix):
+            op = suffix[i]
+            i += 1
+            digits = ""
+            while i < len(suffix) and suffix[i].isdigit():
+                digits += suffix[i]
+                i += 1
+            count = int(digits) if digits else 1
+            if op == "~":
+                for _ in range(count):
+                    parents = self.commits[oid].parents
+                    oid = parents[0] if parents else None
+                    if oid is None:
+                        break
+            elif count == 0:
+                continue
+            else:
+                parents = self.commits[oid].parents
+                oid = parents[count - 1] if len(parents) >= count else None
+        return oid
+
+    def _ancestors(self, oid):
+        seen = set()
+        stack = [oid]
+        while stack:
+            current = stack.pop()
+            if current not in seen:
+                seen.add(current)
+                stack.extend(self.commits[current].parents)
+        return seen
+
+    def _walk(self, starts):
+        """Commit raggiungibili, dal più recente, come git log"""
+        reachable = set()
+        for oid in starts:
+            reachable |= self._ancestors(oid)
+        order = {oid: i for i, oid in enumerate(self.commits)}
+        return sorted(reachable, key=lambda o: (self.commits[o].time, order[o]), reverse=True)
+
+    def _merge_base(self, a, b):
+        ancestors = self._ancestors(a)
+        for oid in self._walk([b]):
+            if oid in ancestors:
+                return oid
+        return None
+
+    def _local_changes(self):
+        """Percorsi con modifiche in staging o nel working tree rispetto a HEAD"""
+        head = self._head_tree()
+        changed = {p for p in set(head) | set(self.index) if head.get(p) != self.index.get(p)}
+        changed |= {p for p in self.index if self.worktree.get(p) != self.index[p]}
+        return changed
+
+    def _untracked(self):
+        return sorted(p for p in self.worktree if p not in self.index and p not in self.unmerged)
+
+    def _diffstat(self, old, new):
+        rows = []
+        for path in sorted(set(old) | set(new)):
+            if old.get(path) != new.get(path):
+                rows.append((path,) + _line_changes(old.get(path), new.get(path)))
+        return rows
+
+    def _summary(self, old, new, with_files=False):
+        """Riepilogo "N files changed" di commit, merge e cherry-pick"""
+        rows = self._diffstat(old, new)
+        lines = []
+        if with_files and rows:
+            width = max(len(r[0]) for r in rows)
+            digits = max(len(str(r[1] + r[2])) for r in rows)
+            for path, added, removed in rows:
+                bar = "+" * min(added, 50) + "-" * min(removed, 50)
+                lines.append(f" {path:<{width}} | {added + removed:>{digits}} {bar}".rstrip())
+        added = sum(r[1] for r in rows)
+        removed = sum(r[2] for r in rows)
+        summary = f" {len(rows)} file{'s' if len(rows) != 1 else ''} changed"
+        if added or not removed:
+            summary += f", {added} insertion{'s' if added != 1 else ''}(+)"
+        if removed:
+            summary += f", {removed} deletion{'s' if removed != 1 else ''}(-)"
+        lines.append(summary)
+        for path in sorted(set(new) - set(old)):
+            lines.append(f" create mode 100644 {path}")
+        for path in sorted(set(old) - set(new)):
+            lines.append(f" delete mode 100644 {path}")
+        return "\n".join(lines) + "\n"
+
+    def _branch_label(self):
+        return "detached HEAD" if self.detached else self.head
+
+    def _check_branch_name(self, name):
+        if (not name or name.startswith(("-", ".")) or name.endswith((".", "/", ".lock")) or ".." in name
+                or any(c in name for c in " ~^:?*[\\") or "@{" in name):
+            raise GitError(f"fatal: '{name}' is not a valid branch name\n")
+
+    def _update_tree(self, target, force=False):
+        """Porta index e working tree su target, conservando le modifiche locali"""
+        head = self._head_tree()
+        changed = set() if force else self._local_changes()
+        blocked = sorted(p for p in changed if head.get(p) != target.get(p))
+        if blocked:
+            return blocked, []
+        blocked = sorted(p for p in self._untracked() if p in target and target[p] != self.worktree[p])
+        if blocked and not force:
+            raise GitError("error: The following untracked working tree files would be overwritten by checkout:\n"
+                           + "".join(f"\t{p}\n" for p in blocked)
+                           + "Please move or remove them before you switch branches.\nAborting\n", code=1)
+        for path in set(head) | set(target):
+            if path in changed:
+                continue
+            if path in target:
+                self.index[path] = self.worktree[path] = target[path]
+            else:
+                self.index.pop(path, None)
+                self.worktree.pop(path, None)
+        return [], sorted(changed)
+
+    def _status_letter(self, old, new):
+        if old is None:
+            return "A"
+        if new is None:
+            return "D"
+        return "M"
+
+    # --- Comandi ----------------------------------------------------------
+
+    def _git_init(self, args):
+        branch = self.default_branch
+        i = 0
+        while i < len(args):
+            if args[i] in ("-b", "--initial-branch") and i + 1 < len(args):
+                branch = args[i + 1]
+                i += 1
+            elif args[i].startswith("--initial-branch="):
+                branch = args[i].split("=", 1)[1]
+            elif args[i] not in ("-q", "--quiet", "."):
+                raise GitError("fatal: init di directory diverse non è disponibile in modalità pratica\n")
+            i += 1
+        quiet = "-q" in args or "--quiet" in args
+        if self.initialized:
+            return ("" if quiet else f"Reinitialized existing Git repository in {self.cwd}/.git/\n"), ""
+        self._reset_repository()
+        self.head = branch
+        return ("" if quiet else f"Initialized empty Git repository in {self.cwd}/.git/\n"), ""
+
+    def _git_config(self, args):
+        args = [a for a in args if a not in ("--global", "--local")]
+        if len(args) == 1:
+            if args[0] not in self.config:
+                raise GitError("", code=1)
+            return self.config[args[0]] + "\n", ""
+        if len(args) == 2:
+            self.config[args[0]] = args[1]
+            return "", ""
+        raise GitError("error: wrong number of arguments, should be from 1 to 2\n", code=129)
+
+    def _git_status(self, args):
+        if any(a in ("-s", "--short", "--porcelain") for a in args):
+            return self._status_short(), ""
+        return self._status_long(), ""
+
+    def _status_short(self):
+        head = self._head_tree()
+        lines = []
+        for path in sorted(set(head) | set(self.index) | set(self.unmerged)):
+            if path in self.unmerged:
+                lines.append(f"UU {path}")
+                continue
+            old, staged, work = head.get(path), self.index.get(path), self.worktree.get(path)
+            x = " " if old == staged else self._status_letter(old, staged)
+            y = " " if staged is None or work == staged else ("D" if work is None else "M")
+            if x != " " or y != " ":
+                lines.append(f"{x}{y} {path}")
+        lines.extend(f"?? {path}" for path in self._untracked())
+        return "".join(line + "\n" for line in lines)
+
+    def _status_long(self, committing=False):
+        head_oid = self._head_oid()
+        head = self._head_tree()
+        if self.detached:
+            lines = [f"HEAD detached at {self._short(self.detached)}"]
+        else:
+            lines = [f"On branch {self.head}"]
+        if head_oid is None:
+            lines += ["", "Initial commit" if committing else "No commits yet", ""]
+        if self.merge_head:
+            if self.unmerged:
+                lines += ["You have unmerged paths.", '  (fix conflicts and run "git commit")',
+                          '  (use "git merge --abort" to abort the merge)', ""]
+            else:
+                lines += ["All conflicts fixed but you are still merging.",
+                          '  (use "git commit" to conclude merge)', ""]
+        elif self.pending:
+            command, oid, _ = self.pending
+            action = "cherry-picking" if command == "cherry-pick" else "reverting"
+            lines += [f"You are currently {action} commit {self._short(oid)}."]
+            if self.unmerged:
+                lines.append(f'  (fix conflicts and run "git {command} --continue")')
+            else:
+                lines.append(f'  (all conflicts fixed: run "git {command} --continue")')
+            lines += [f'  (use "git {command} --skip" to skip this patch)',
+                      f'  (use "git {command} --abort" to cancel the {command} operation)', ""]
+
+        staged = [(p, self._status_letter(head.get(p), self.index.get(p)))
+                  for p in sorted(set(head) | set(self.index))
+                  if p not in self.unmerged and head.get(p) != self.index.get(p)]
+        unstaged = [(p, "D" if p not in self.worktree else "M")
+                    for p in sorted(self.index) if self.worktree.get(p) != self.index[p]]
+        untracked = self._untracked()
+        names = {'A': "new file:   ", 'M': "modified:   ", 'D': "deleted:    "}
+
+        if staged:
+            hint = "git rm --cached <file>..." if head_oid is None else "git restore --staged <file>..."
+            lines.append("Changes to be committed:")
+            if not self.merge_head:
+                lines.append(f'  (use "{hint}" to unstage)')
+            lines += [f"\t{names[kind]}{path}" for path, kind in staged] + [""]
+        if self.unmerged:
+            lines += ["Unmerged paths:", '  (use "git add <file>..." to mark resolution)']
+            for path, (b, o, t) in sorted(self.unmerged.items()):
+                kind = ("both added:      " if b is None else "both modified:   " if o is not None and t is not None
+                        else "deleted by us:   " if o is None else "deleted by them: ")
+                lines.append(f"\t{kind}{path}")
+            lines.append("")
+        if unstaged:
+            verb = "add/rm" if any(kind == "D" for _, kind in unstaged) else "add"
+            lines += ["Changes not staged for commit:", f'  (use "git {verb} <file>..." to update what will be committed)',
+                      '  (use "git restore <file>..." to discard changes in working directory)']
+            lines += [f"\t{names[kind]}{path}" for path, kind in unstaged] + [""]
+        if untracked:
+            lines += ["Untracked files:", '  (use "git add <file>..." to include in what will be committed)']
+            lines += [f"\t{path}" for path in untracked] + [""]
+
+        if staged:
+            pass
+        elif unstaged or self.unmerged:
+            lines.append('no changes added to commit (use "git add" and/or "git commit -a")')
+        elif untracked:
+            lines.append('nothing added to commit but untracked files present (use "git add" to track)')
+        elif head_oid is None:
+            lines.append('nothing to commit (create/copy files and use "git add" to track)')
+        else:
+            lines.append("nothing to commit, working tree clean")
+        return "\n".join(lines) + "\n"
+
+    def _git_add(self, args):
+        everything = False
+        tracked_only = False
+        paths = []
+        for arg in args:
+            if arg in ("-A", "--all", "."):
+                everything = True
+            elif arg in ("-u", "--update"):
+                tracked_only = True
+            elif arg in ("--", "-v", "--verbose"):
+                continue
+            elif arg.startswith("-"):
+                raise GitError(f"error: unknown option `{arg.lstrip('-')}'\n", code=129)
+            else:
+                paths.append(self._path(arg))
+        if not (everything or tracked_only or paths):
+            return "", 'Nothing specified, nothing added.\nhint: Maybe you wanted to say \'git add .\'?\n'
+
+        if everything or tracked_only:
+            candidates = set(self.index) | set(self.unmerged)
+            if everything:
+                candidates |= set(self.worktree)
+        else:
+            candidates = set()
+            for path in paths:
+                found = {p for p in set(self.worktree) | set(self.index) | set(self.unmerged)
+                         if p == path or p.startswith(path + "/")}
+                if not found:
+                    raise GitError(f"fatal: pathspec '{path}' did not match any files\n")
+                candidates |= found
+        for path in candidates:
+            self.unmerged.pop(path, None)
+            if path in self.worktree:
+                self.index[path] = self.worktree[path]
+            else:
+                self.index.pop(path, None)
+        return "", ""
+
+    def _git_rm(self, args):
+        cached = "--cached" in args
+        paths = [self._path(a) for a in args if not a.startswith("-")]
+        out = []
+        for path in paths:
+            if path not in self.index and path not in self.unmerged:
+                raise GitError(f"fatal: pathspec '{path}' did not match any files\n")
+        for path in paths:
+            self.index.pop(path, None)
+            self.unmerged.pop(path, None)
+            if not cached:
+                self.worktree.pop(path, None)
+            out.append(f"rm '{path}'\n")
+        return "".join(out), ""
+
+    def _git_commit(self, args):
+        messages = []
+        amend = commit_all = allow_empty = quiet = False
+        i = 0
+        while i < len(args):
+            arg = args[i]
+            if arg in ("-m", "--message"):
+                if i + 1 >= len(args):
+                    raise GitError("error: switch `m' requires a value\n", code=129)
+                messages.append(args[i + 1])
+                i += 1
+            elif arg.startswith("--message="):
+                messages.append(arg.split("=", 1)[1])
+            elif arg.startswith("-m") and len(arg) > 2:
+                messages.append(arg[2:])
+            elif arg in ("-a", "--all"):
+                commit_all = True
+            elif arg in ("-am",):
+                commit_all = True
+                if i + 1 < len(args):
+                    messages.append(args[i + 1])
+                    i += 1
+            elif arg == "--amend":
+                amend = True
+            elif arg == "--allow-empty":
+                allow_empty = True
+            elif arg in ("-q", "--quiet", "--no-edit"):
+                quiet = quiet or arg != "--no-edit"
+            else:
+                raise GitError(f"error: unknown option `{arg.lstrip('-')}'\n", code=129)
+            i += 1
+
+        if self.unmerged:
+            raise GitError("error: Committing is not possible because you have unmerged files.\n"
+                           "hint: Fix them up in the work tree, and then use 'git add/rm <file>'\n"
+                           "hint: as appropriate to mark resolution and make a commit.\n"
+                           "fatal: Exiting because of an unresolved conflict.\n",
+                           out="".join(f"U\t{p}\n" for p in sorted(self.unmerged)))
+        if commit_all:
+            for path in list(self.index):
+                if path in self.worktree:
+                    self.index[path] = self.worktree[path]
+                else:
+                    del self.index[path]
+
+        head_oid = self._head_oid()
+        head = self._head_tree()
+        if amend and head_oid is None:
+            raise GitError("fatal: You have nothing to amend.\n")
+        if messages:
+            message = "\n\n".join(messages)
+        elif amend and head_oid:
+            message = self.commits[head_oid].message
+        elif self.merge_msg:
+            message = self.merge_msg
+        elif self.pending:
+            message = self.pending[2]
+        else:
+            raise GitError('error: editor non disponibile in modalità pratica, usa git commit -m "messaggio"\n'
+                           "Please supply the message using either -m or -F option.\n", code=1)
+
+        if self.index == head and not (amend or allow_empty or self.merge_head):
+            raise GitError("", out=self._status_long(committing=True), code=1)
+
+        if amend:
+            parents = self.commits[head_oid].parents
+            base = self.commits[parents[0]].tree if parents else {}
+            action = "commit (amend)"
+        elif self.merge_head:
+            parents = (head_oid, self.merge_head)
+            base = head
+            action = "commit (merge)"
+        else:
+            parents = (head_oid,) if head_oid else ()
+            base = head
+            action = "commit" if head_oid else "commit (initial)"
+        oid = self._new_commit(self.index, parents, message)
+        subject = self.commits[oid].subject
+        self._set_head(oid, f"{action}: {subject}")
+        self.merge_head = self.merge_msg = self.pending = None
+
+        if quiet:
+            return "", ""
+        root = " (root-commit)" if not parents else ""
+        out = f"[{self._branch_label()}{root} {self._short(oid)}] {subject}\n"
+        if len(parents) > 1:
+            return out, ""
+        if amend:
+            out += f" Date: {format_date(self.commits[oid].time)}\n"
+        return out + self._summary(base, self.index), ""
+
+    def _git_branch(self, args):
+        if not args or args[0] in ("--list", "-l", "-a", "--all", "-v", "-vv"):
+            lines = []
+            if self.detached:
+                lines.append(f"* (HEAD detached at {self._short(self.detached)})")
+            for name in sorted(self.branches):
+                marker = "*" if name == self.head and not self.detached else " "
+                if args and args[0] in ("-v", "-vv"):
+                    oid = self.branches[name]
+                    lines.append(f"{marker} {name} {self._short(oid)} {self.commits[oid].subject}")
+                else:
+                    lines.append(f"{marker} {name}")
+            return "".join(line + "\n" for line in lines), ""
+
+        if args[0] in ("-d", "-D", "--delete"):
+            out = []
+            for name in args[1:]:
+                if name not in self.branches:
+                    raise GitError(f"error: branch '{name}' not found.\n", code=1)
+                if name == self.head and not self.detached:
+                    raise GitError(f"error: Cannot delete branch '{name}' checked out at '{self.cwd}'\n", code=1)
+                oid = self.branches[name]
+                head_oid = self._head_oid()
+                if args[0] != "-D" and (head_oid is None or oid not in self._ancestors(head_oid)):
+                    raise GitError(f"error: The branch '{name}' is not fully merged.\n"
+                                   f"If you are sure you want to delete it, run 'git branch -D {name}'.\n", code=1)
+                del self.branches[name]
+                out.append(f"Deleted branch {name} (was {self._short(oid)}).\n")
+            return "".join(out), ""
+
+        if args[0] in ("-m", "-M", "--move"):
+            names = args[1:]
+            if len(names) == 1:
+                old, new = self.head, names[0]
+            elif len(names) == 2:
+                old, new = names
+            else:
+                raise GitError("fatal: too many arguments for a rename operation\n")
+            self._check_branch_name(new)
+            if new in self.branches and args[0] != "-M" and new != old:
+                raise GitError(f"fatal: a branch named '{new}' already exists\n")
+            if old in self.branches:
+                self.branches[new] = self.branches.pop(old)
+            elif old != self.head:
+                raise GitError(f"error: refname refs/heads/{old} not found\n")
+            if self.head == old:
+                self.head = new
+                if new in self.branches:
+                    self._log_ref(self.branches[new], f"Branch: renamed refs/heads/{old} to refs/heads/{new}")
+            return "", ""
+
+        if args[0].startswith("-"):
+            raise GitError(f"error: unknown option `{args[0].lstrip('-')}'\n", code=129)
+        name = args[0]
+        self._check_branch_name(name)
+        if name in self.branches:
+            raise GitError(f"fatal: a branch named '{name}' already exists\n")
+        start = args[1] if len(args) > 1 else "HEAD"
+        oid = self._try_resolve(start)
+        if oid is None:
+            raise GitError(f"fatal: not a valid object name: '{self.head if start == 'HEAD' else start}'\n")
+        self.branches[name] = oid
+        return "", ""
+
+    def _git_checkout(self, args):
+        if args and args[0] in ("-b", "-B"):
+            if len(args) < 2:
+                raise GitError(f"error: switch `{args[0][1]}' requires a value\n", code=129)
+            return self._create_and_switch(args[1], args[2] if len(args) > 2 else None, force=args[0] == "-B")
+        force = False
+        if args and args[0] in ("-f", "--force"):
+            force = True
+            args = args[1:]
+        if "--" in args:
+            split = args.index("--")
+            source, paths = args[:split], args[split + 1:]
+            return self._checkout_paths(source[0] if source else None, paths, report=False)
+        if not args:
+            return "", ""
+        target = args[0]
+        if target == "-":
+            target = self._previous_branch()
+        if target in self.branches or (len(args) == 1 and self._try_resolve(target)):
+            if len(args) > 1:
+                return self._checkout_paths(target, args[1:])
+            return self._switch_to(target, force)
+        if target == "--detach":
+            return self._switch_to(args[1] if len(args) > 1 else "HEAD", force, detach=True)
+        return self._checkout_paths(None, args)
+
+    def _git_switch(self, args):
+        if args and args[0] in ("-c", "--create", "-C", "--force-create"):
+            if len(args) < 2:
+                raise GitError("error: switch `c' requires a value\n", code=129)
+            return self._create_and_switch(args[1], args[2] if len(args) > 2 else None,
+                                           force=args[0] in ("-C", "--force-create"))
+        if args and args[0] == "--detach":
+            return self._switch_to(args[1] if len(args) > 1 else "HEAD", False, detach=True)
+        if len(args) != 1:
+            raise GitError("fatal: missing branch or commit argument\n")
+        target = self._previous_branch() if args[0] == "-" else args[0]
+        if target not in self.branches:
+            if self._try_resolve(target):
+                raise GitError("fatal: a branch is expected, got commit '{}'\n"
+                               "hint: If you want to detach HEAD at the commit, try again with the --detach option.\n"
+                               .format(target))
+            raise GitError(f"fatal: invalid reference: {target}\n")
+        return self._switch_to(target, False)
+
+    def _git_restore(self, args):
+        staged = False
+        source = None
+        paths = []
+        for arg in args:
+            if arg in ("--staged", "-S"):
+                staged = True
+            elif arg in ("--worktree", "-W", "--"):
+                continue
+            elif arg.startswith("--source="):
+                source = arg.split("=", 1)[1]
+            elif arg.startswith("-"):
+                raise GitError(f"error: unknown option `{arg.lstrip('-')}'\n", code=129)
+            else:
+                paths.append(self._path(arg))
+        if not paths:
+            raise GitError("fatal: you must specify path(s) to restore\n")
+        if staged:
+            tree = self.commits[self._resolve(source or "HEAD")].tree if self._head_oid() else {}
+            for path in paths:
+                if path not in tree and path not in self.index:
+                    raise GitError(f"error: pathspec '{path}' did not match any file(s) known to git\n", code=1)
+                if path in tree:
+                    self.index[path] = tree[path]
+                else:
+                    self.index.pop(path, None)
+            return "", ""
+        tree = self.commits[self._resolve(source)].tree if source else self.index
+        for path in paths:
+            if path not in tree:
+                raise GitError(f"error: pathspec '{path}' did not match any file(s) known to git\n", code=1)
+        for path in paths:
+            self.worktree[path] = tree[path]
+        return "", ""
+
+    def _previous_branch(self):
+        for _, message in reversed(self.reflog):
+            if message.startswith("checkout: moving from "):
+                return message[len("checkout: moving from "):].split(" to ", 1)[0]
+        raise GitError("error: pathspec '-' did not match any file(s) known to git\n", code=1)
+
+    def _create_and_switch(self, name, start, force=False):
+        self._check_branch_name(name)
+        if name in self.branches and not force:
+            raise GitError(f"fatal: a branch named '{name}' already exists\n")
+        old_label = self.head if not self.detached else self._short(self.detached)
+        if self._head_oid() is None and start is None:
+            # Branch non ancora nato: cambia solo il nome di HEAD
+            self.head = name
+            return "", f"Switched to a new branch '{name}'\n"
+        oid = self._resolve(start or "HEAD")
+        if start is not None:
+            blocked, _ = self._update_tree(self.commits[oid].tree)
+            if blocked:
+                raise self._overwrite_error(blocked)
+        self.branches[name] = oid
+        self.head = name
+        self.detached = None
+        self._log_ref(oid, f"checkout: moving from {old_label} to {name}")
+        return "", f"Switched to a new branch '{name}'\n"
+
+    def _switch_to(self, target, force, detach=False):
+        if self.unmerged and not force:
+            raise GitError("error: you need to resolve your current index first\n", code=1,
+                           out="".join(f"{p}: needs merge\n" for p in sorted(self.unmerged)))
+        if target == self.head and not self.detached and not detach:
+            if self._head_oid():
+                self._log_ref(self._head_oid(), f"checkout: moving from {target} to {target}")
+            return "", f"Already on '{target}'\n"
+        oid = self._resolve(target)
+        blocked, kept = self._update_tree(self.commits[oid].tree, force)
+        if blocked:
+            raise self._overwrite_error(blocked)
+        if force:
+            self.unmerged.clear()
+            self.merge_head = self.merge_msg = self.pending = None
+        old_label = self._short(self.detached) if self.detached else self.head
+        previous = ""
+        if self.detached and self.detached != oid:
+            previous = f"Previous HEAD position was {self._short(self.detached)} {self.commits[self.detached].subject}\n"
+        out = "".join(f"{'D' if p not in self.worktree else 'M'}\t{p}\n" for p in kept)
+        if target in self.branches and not detach:
+            self.head = target
+            self.detached = None
+            self._log_ref(oid, f"checkout: moving from {old_label} to {target}")
+            return out, previous + f"Switched to branch '{target}'\n"
+        self.detached = oid
+        self._log_ref(oid, f"checkout: moving from {old_label} to {target}")
+        return out, (previous + f"Note: switching to '{target}'.\n\n" + _DETACHED_ADVICE
+                     + f"HEAD is now at {self._short(oid)} {self.commits[oid].subject}\n")
+
+    def _overwrite_error(self, paths):
+        return GitError("error: Your local changes to the following files would be overwritten by checkout:\n"
+                        + "".join(f"\t{p}\n" for p in paths)
+                        + "Please commit your changes or stash them before you switch branches.\nAborting\n",
+                        code=1)
+
+    def _checkout_paths(self, source, paths, report=True):
+        paths = [self._path(p) for p in paths]
+        if source is not None:
+            oid = self._resolve(source)
+            tree = self.commits[oid].tree
+            origin = self._short(oid)
+        else:
+            tree = self.index
+            origin = "the index"
+        restored = 0
+        for path in paths:
+            matching = [p for p in tree if p == path or p.startswith(path + "/")]
+            if not matching:
+                if path in self.unmerged:
+                    raise GitError(f"error: path '{path}' is unmerged\n", code=1)
+                raise GitError(f"error: pathspec '{path}' did not match any file(s) known to git\n", code=1)
+            for p in matching:
+                self.worktree[p] = tree[p]
+                if source is not None:
+                    self.index[p] = tree[p]
+                restored += 1
+        if not report:
+            return "", ""
+        return "", f"Updated {restored} path{'s' if restored != 1 else ''} from {origin}\n"
+
+    def _git_log(self, args):
+        oneline = False
+        limit = None
+        revs = []
+        everything = False
+        i = 0
+        while i < len(args):
+            arg = args[i]
+            if arg == "--oneline":
+                oneline = True
+            elif arg in ("-n", "--max-count") and i + 1 < len(args):
+                limit = int(args[i + 1])
+                i += 1
+            elif arg.startswith("--max-count="):
+                limit = int(arg.split("=", 1)[1])
+            elif arg.startswith("-") and arg[1:].isdigit():
+                limit = int(arg[1:])
+            elif arg == "--all":
+                everything = True
+            elif arg in ("--decorate", "--no-decorate", "--graph"):
+                pass
+            elif arg.startswith("-"):
+                raise GitError(f"fatal: unrecognized argument: {arg}\n")
+            else:
+                revs.append(arg)
+            i += 1
+
+        if everything:
+            starts = list(self.branches.values()) + ([self.detached] if self.detached else [])
+        elif revs:
+            starts = [self._resolve(rev) for rev in revs]
+        elif self._head_oid() is None:
+            raise GitError(f"fatal: your current branch '{self.head}' does not have any commits yet\n")
+        else:
+            starts = [self._head_oid()]
+
+        lines = []
+        for count, oid in enumerate(self._walk(starts)):
+            if limit is not None and count >= limit:
+                break
+            commit = self.commits[oid]
+            if oneline:
+                lines.append(f"{self._short(oid)} {commit.subject}\n")
+                continue
+            entry = f"commit {oid}\n"
+            if len(commit.parents) > 1:
+                entry += "Merge: " + " ".join(self._short(p) for p in commit.parents) + "\n"
+            entry += f"Author: {commit.author}\nDate:   {format_date(commit.time)}\n\n"
+            entry += "".join(f"    {line}\n" if line else "\n" for line in commit.message.split("\n"))
+            lines.append(entry)
+        return ("" if oneline else "\n").join(lines), ""
+
+    def _git_reflog(self, args):
+        limit = None
+        for arg in args:
+            if arg.startswith("-") and arg[1:].isdigit():
+                limit = int(arg[1:])
+            elif arg in ("show", "--oneline", "HEAD"):
+                continue
+            else:
+                raise GitError(f"error: il reflog di '{arg}' non è disponibile in modalità pratica\n")
+        if not self.reflog and self._head_oid() is None:
+            raise GitError(f"fatal: your current branch '{self.head}' does not have any commits yet\n")
+        lines = []
+        for position, (oid, message) in enumerate(reversed(self.reflog)):
+            if limit is not None and position >= limit:
+                break
+            lines.append(f"{self._short(oid)} HEAD@{{{position}}}: {message}\n")
+        return "".join(lines), ""
+
+    def _git_reset(self, args):
+        mode = "--mixed"
+        rest = []
+        for arg in args:
+            if arg in ("--soft", "--mixed", "--hard"):
+                mode = arg
+            elif arg in ("-q", "--quiet"):
+                continue
+            else:
+                rest.append(arg)
+        paths = []
+        if "--" in rest:
+            split = rest.index("--")
+            rest, paths = rest[:split], rest[split + 1:]
+        if len(rest) > 1 or (rest and self._try_resolve(rest[0]) is None):
+            # git reset [rev] file: toglie i file dalla staging area
+            if rest and self._try_resolve(rest[0]) is not None:
+                paths = rest[1:] + paths
+                rest = rest[:1]
+            else:
+                paths = rest + paths
+                rest = []
+        if paths:
+            tree = self.commits[self._resolve(rest[0] if rest else "HEAD")].tree if self._head_oid() else {}
+            for path in (self._path(p) for p in paths):
+                if path in tree:
+                    self.index[path] = tree[path]
+                else:
+                    self.index.pop(path, None)
+            return self._unstaged_after_reset(), ""
+
+        if mode == "--soft" and self.merge_head:
+            raise GitError("fatal: Cannot do a soft reset in the middle of a merge.\n")
+        target = rest[0] if rest else "HEAD"
+        oid = self._resolve(target)
+        tree = self.commits[oid].tree
+        if mode == "--hard":
+            for path in set(self._head_tree()) | set(self.index) | set(self.unmerged):
+                self.worktree.pop(path, None)
+            self.worktree.update(tree)
+        if mode != "--soft":
+            self.index = dict(tree)
+            self.unmerged.clear()
+            self.merge_head = self.merge_msg = self.pending = None
+        self._set_head(oid, f"reset: moving to {target}")
+        if mode == "--hard":
+            return f"HEAD is now at {self._short(oid)} {self.commits[oid].subject}\n", ""
+        if mode == "--mixed":
+            return self._unstaged_after_reset(), ""
+        return "", ""
+
+    def _unstaged_after_reset(self):
+        changed = [(p, "D" if p not in self.worktree else "M")
+                   for p in sorted(self.index) if self.worktree.get(p) != self.index[p]]
+        if not changed:
+            return ""
+        return "Unstaged changes after reset:\n" + "".join(f"{kind}\t{path}\n" for path, kind in changed)
+
+    def _sequencer_state(self, command, args):
+        """Gestisce --continue/--abort di cherry-pick e revert"""
+        if args == ["--abort"]:
+            if not self.pending or self.pending[0] != command:
+                raise GitError(f"error: no {command} in progress\nfatal: {command} failed\n")
+            self._git_reset(["--hard", self._head_oid()])
+            return "", ""
+        if args == ["--continue"]:
+            if not self.pending or self.pending[0] != command:
+                raise GitError(f"error: no {command} in progress\nfatal: {command} failed\n")
+            return self._git_commit([])
+        return None
+
+    def _apply_change(self, command, oid, base, theirs, label_theirs, message):
+        """Applica a HEAD la differenza base -> theirs (cherry-pick e revert)"""
+        head = self._head_tree()
+        if self.index != head or self.unmerged:
+            raise GitError(f"error: your local changes would be overwritten by {command}.\n"
+                           "hint: commit your changes or stash them to proceed.\n"
+                           f"fatal: {command} failed\n")
+        merged, conflicts, messages = merge_trees(base, head, theirs, "HEAD", label_theirs)
+        dirty = sorted(p for p in merged.keys() | head.keys()
+                       if merged.get(p) != head.get(p) and p in self.worktree and self.worktree[p] != head.get(p))
+        if dirty:
+            raise GitError(f"error: Your local changes to the following files would be overwritten by merge:\n"
+                           + "".join(f"\t{p}\n" for p in dirty)
+                           + f"Please commit your changes or stash them before you merge.\nAborting\nfatal: {command} failed\n")
+        if conflicts:
+            self._enter_conflict(merged, conflicts)
+            self.pending = (command, oid, message)
+            commit = self.commits[oid]
+            verb = "apply" if command == "cherry-pick" else "revert"
+            raise GitError(f"error: could not {verb} {self._short(oid)}... {commit.subject}\n"
+                           "hint: After resolving the conflicts, mark them with\n"
+                           'hint: "git add/rm <pathspec>", then run\n'
+                           f'hint: "git {command} --continue".\n'
+                           f'hint: You can instead skip this commit with "git {command} --skip".\n'
+                           f'hint: To abort and get back to the state before "git {command}",\n'
+                           f'hint: run "git {command} --abort".\n',
+                           out="".join(m + "\n" for m in messages), code=1)
+        if merged == head:
+            raise GitError("", out=self._status_long(), code=1)
+        self._apply_tree(merged)
+        new = self._new_commit(merged, (self._head_oid(),), message)
+        self._set_head(new, f"{command}: {self.commits[new].subject}")
+        return f"[{self._branch_label()} {self._short(new)}] {self.commits[new].subject}\n", head
+
+    def _apply_tree(self, tree):
+        for path in set(self.index) - set(tree):
+            self.worktree.pop(path, None)
+        self.index = dict(tree)
+        self.worktree.update(tree)
+
+    def _enter_conflict(self, merged, conflicts):
+        clean = {p: c for p, c in merged.items() if p not in conflicts}
+        for path in set(self.index) - set(merged):
+            self.worktree.pop(path, None)
+        self.index = clean
+        self.worktree.update(merged)
+        self.unmerged = dict(conflicts)
+
+    def _git_cherry_pick(self, args):
+        state = self._sequencer_state("cherry-pick", args)
+        if state is not None:
+            return state
+        revs = [a for a in args if not a.startswith("-")]
+        if not revs:
+            raise GitError("usage: git cherry-pick [<options>] <commit-ish>...\n", code=129)
+        out = ""
+        for rev in revs:
+            oid = self._try_resolve(rev)
+            if oid is None:
+                raise GitError(f"fatal: bad revision '{rev}'\n")
+            commit = self.commits[oid]
+            if len(commit.parents) > 1:
+                raise GitError(f"error: commit {oid} is a merge but no -m option was given.\n"
+                               "fatal: cherry-pick failed\n")
+            base = self.commits[commit.parents[0]].tree if commit.parents else {}
+            header, before = self._apply_change("cherry-pick", oid, base, commit.tree,
+                                                f"{self._short(oid)} ({commit.subject})", commit.message)
+            out += header + f" Date: {format_date(commit.time)}\n" + self._summary(before, self.index)
+        return out, ""
+
+    def _git_revert(self, args):
+        state = self._sequencer_state("revert", args)
+        if state is not None:
+            return state
+        revs = [a for a in args if not a.startswith("-")]
+        if not revs:
+            raise GitError("usage: git revert [<options>] <commit-ish>...\n", code=129)
+        out = ""
+        for rev in revs:
+            oid = self._try_resolve(rev)
+            if oid is None:
+                raise GitError(f"fatal: bad revision '{rev}'\n")
+            commit = self.commits[oid]
+            parent = self.commits[commit.parents[0]].tree if commit.parents else {}
+            message = f'Revert "{commit.subject}"\n\nThis reverts commit {oid}.'
+            header, before = self._apply_change("revert", oid, commit.tree, parent,
+                                                f"parent of {self._short(oid)} ({commit.subject})", message)
+            out += header + f" Date: {format_date(self.commits[self._head_oid()].time)}\n"
+            out += self._summary(before, self.index)
+        return out, ""
+
+    def _git_merge(self, args):
+        if args == ["--abort"]:
+            if not self.merge_head:
+                raise GitError("fatal: There is no merge to abort (MERGE_HEAD missing).\n")
+            self._git_reset(["--hard", "HEAD"])
+            return "", ""
+        if self.merge_head:
+            raise GitError("error: Merging is not possible because you have unmerged files.\n"
+                           if self.unmerged else
+                           "fatal: You have not concluded your merge (MERGE_HEAD exists).\n"
+                           "Please, commit your changes before you merge.\n")
+        no_ff = False
+        message = None
+        revs = []
+        i = 0
+        while i < len(args):
+            if args[i] == "--no-ff":
+                no_ff = True
+            elif args[i] in ("--ff", "--no-edit"):
+                pass
+            elif args[i] in ("-m", "--message") and i + 1 < len(args):
+                message = args[i + 1]
+                i += 1
+            elif args[i].startswith("-"):
+                raise GitError(f"error: unknown option `{args[i].lstrip('-')}'\n", code=129)
+            else:
+                revs.append(args[i])
+            i += 1
+        if len(revs) != 1:
+            raise GitError("fatal: No remote for the current branch.\n")
+        rev = revs[0]
+        other = self._try_resolve(rev)
+        if other is None:
+            raise GitError(f"merge: {rev} - not something we can merge\n", code=1)
+        head_oid = self._head_oid()
+        if head_oid is None:
+            raise GitError("fatal: la fusione in un branch senza commit non è disponibile in modalità pratica\n")
+
+        if other in self._ancestors(head_oid):
+            return "Already up to date.\n", ""
+        head = self._head_tree()
+        target = self.commits[other].tree
+        if head_oid in self._ancestors(other) and not no_ff:
+            blocked, _ = self._update_tree(target)
+            if blocked:
+                raise GitError("error: Your local changes to the following files would be overwritten by merge:\n"
+                               + "".join(f"\t{p}\n" for p in blocked)
+                               + "Please commit your changes or stash them before you merge.\nAborting\n", code=1)
+            self._set_head(other, f"merge {rev}: Fast-forward")
+            return (f"Updating {self._short(head_oid)}..{self._short(other)}\nFast-forward\n"
+                    + self._summary(head, target, with_files=True)), ""
+
+        if self._local_changes():
+            raise GitError("error: Your local changes to the following files would be overwritten by merge:\n"
+                           + "".join(f"\t{p}\n" for p in sorted(self._local_changes()))
+                           + "Please commit your changes or stash them before you merge.\nAborting\n", code=1)
+        base_oid = self._merge_base(head_oid, other)
+        base = self.commits[base_oid].tree if base_oid else {}
+        merged, conflicts, messages = merge_trees(base, head, target, "HEAD", rev)
+        if message is None:
+            message = f"Merge branch '{rev}'"
+            if self.detached or self.head not in ("main", "master"):
+                message += f" into {self._branch_label()}"
+        report = "".join(m + "\n" for m in messages)
+        if conflicts:
+            self._enter_conflict(merged, conflicts)
+            self.merge_head = other
+            self.merge_msg = message
+            raise GitError("", out=report + "Automatic merge failed; fix conflicts and then commit the result.\n",
+                           code=1)
+        self._apply_tree(merged)
+        oid = self._new_commit(merged, (head_oid, other), message)
+        self._set_head(oid, f"merge {rev}: Merge made by the 'ort' strategy.")
+        return report + "Merge made by the 'ort' strategy.\n" + self._summary(head, merged, with_files=True), ""
+
+    def _git_stash(self, args):
+        action = args[0] if args else "push"
+        if action in ("push", "save") or action.startswith("-"):
+            options = args[1:] if action in ("push", "save") else args
+            message = None
+            if "-m" in options and options.index("-m") + 1 < len(options):
+                message = options[options.index("-m") + 1]
+            if self.unmerged:
+                raise GitError("".join(f"{p}: needs merge\n" for p in sorted(self.unmerged))
+                               + "error: could not write index\n", code=1)
+            head_oid = self._head_oid()
+            if head_oid is None:
+                raise GitError("You do not have the initial commit yet\n", code=1)
+            if not self._local_changes():
+                return "No local changes to save\n", ""
+            head = self._head_tree()
+            work = {p: self.worktree[p] for p in self.index if p in self.worktree}
+            subject = self.commits[head_oid].subject
+            if message:
+                label = f"On {self._branch_label()}: {message}"
+            else:
+                label = f"WIP on {self._branch_label()}: {self._short(head_oid)} {subject}"
+            oid = self._new_commit(work, (head_oid,), label)
+            self.stashes.append((oid, head_oid, dict(self.index), label))
+            for path in set(self.index) | set(head):
+                self.worktree.pop(path, None)
+            self.worktree.update(head)
+            self.index = dict(head)
+            return f"Saved working directory and index state {label}\n", ""
+        if action == "list":
+            return "".join(f"stash@{{{i}}}: {entry[3]}\n" for i, entry in enumerate(reversed(self.stashes))), ""
+        if action in ("pop", "apply", "drop"):
+            if not self.stashes:
+                raise GitError("No stash entries found.\n", code=1)
+            oid, base_oid, index, _ = self.stashes[-1]
+            out = ""
+            if action != "drop":
+                head = self._head_tree()
+                merged, conflicts, messages = merge_trees(self.commits[base_oid].tree, head,
+                                                          self.commits[oid].tree, "Updated upstream", "Stashed changes")
+                if conflicts:
+                    self._enter_conflict(merged, conflicts)
+                    raise GitError("", out="".join(m + "\n" for m in messages)
+                                   + "The stash entry is kept in case you need it again.\n", code=1)
+                for path in set(head) - set(merged):
+                    self.worktree.pop(path, None)
+                    self.index.pop(path, None)
+                self.worktree.update(merged)
+                for path, content in index.items():
+                    if path not in head:
+                        self.index[path] = content
+                out = self._status_long()
+            if action != "apply":
+                self.stashes.pop()
+                out += f"Dropped refs/stash@{{0}} ({oid})\n"
+            return out, ""
+        raise GitError(f"error: 'git stash {action}' non è disponibile in modalità pratica\n", code=1)
+
+    def _git_diff(self, args):
+        cached = any(a in ("--cached", "--staged") for a in args)
+        revs = [a for a in args if not a.startswith("-")]
+        if revs:
+            old = self.commits[self._resolve(revs[0])].tree
+            new = self.index if cached else self.worktree
+        elif cached:
+            old, new = self._head_tree(), self.index
+        else:
+            old = self.index
+            new = {p: self.worktree[p] for p in self.index if p in self.worktree}
+        if not cached and not revs:
+            paths = sorted(self.index)
+        else:
+            paths = sorted(set(old) | set(new))
+            if not cached:
+                paths = [p for p in paths if p in old or p in self.index]
+        chunks = []
+        for path in paths:
+            a, b = old.get(path), new.get(path)
+            if a == b:
+                continue
+            header = f"diff --git a/{path} b/{path}\n"
+            if a is None:
+                header += "new file mode 100644\n"
+            elif b is None:
+                header += "deleted file mode 100644\n"
+            header += f"index {_blob_id(a or '').hex()[:7] if a is not None else '0000000'}.." \
+                      f"{_blob_id(b or '').hex()[:7] if b is not None else '0000000'}" \
+                      f"{' 100644' if a is not None and b is not None else ''}\n"
+            body = difflib.unified_diff(_lines(a), _lines(b),
+                                        "a/" + path if a is not None else "/dev/null",
+                                        "b/" + path if b is not None else "/dev/null", n=3)
+            text = "".join(line if line.endswith("\n") else line + "\n\\ No newline at end of file\n"
+                           for line in body)
+            chunks.append(header + text)
+        return "".join(chunks), ""
+
+    def _git_rev_parse(self, args):
+        short = "--short" in args
+        abbrev = "--abbrev-ref" in args
+        out = []
+        for rev in (a for a in args if not a.startswith("-")):
+            if abbrev and rev == "HEAD":
+                out.append("HEAD" if self.detached else self.head)
+                continue
+            oid = self._try_resolve(rev)
+            if oid is None:
+                raise GitError(f"fatal: ambiguous argument '{rev}': unknown revision or path not in the working tree.\n")
+            out.append(self._short(oid) if short else oid)
+        return "".join(line + "\n" for line in out), ""
+
+
+def _run_step(git, step):
+    """Passo ('run' | 'run_may_fail', comando) di una ricetta"""
+    success, _, error = git.run(step[1])
+    if not success and step[0] == 'run':
+        raise SnapshotError(f"{step[1]}: {error.strip()}")
+
+
+class SimulatedSnapshots:
+    """Modelli degli scenari per la modalità pratica: la ricetta si esegue una volta sola in memoria"""
+
+    def __init__(self, recipes):
+        self.recipes = recipes
+        self._states = {}
+        self._answers = {}
+
+    def build_all(self):
+        for name in self.recipes:
+            if self.simulable(name):
+                self.build(name)
+
+    def simulable(self, name):
+        """False per le storie generate (passo 'generate'): migliaia di commit non stanno nel simulato"""
+        recipe = self.recipes[name]
+        if any(step[0] == 'generate' for step in recipe['steps']):
+            return False
+        return not recipe.get('base') or self.simulable(recipe['base'])
+
+    def build(self, name):
+        state = self._states.get(name)
+        if state is None:
+            recipe = self.recipes[name]
+            git = SimulatedGit()
+            if recipe.get('base'):
+                git.load_state(self.build(recipe['base']))
+            else:
+                git.run("git init -q -b main")
+            for step in recipe['steps']:
+                if step[0] == 'write':
+                    git.write_file(step[1], step[2])
+                elif step[0] == 'generate':
+                    raise SnapshotError(f"{name}: le storie generate richiedono git vero")
+                elif step[0] == 'commits':
+                    for command in commands(step[1]):
+                        if command[0] == 'write':
+                            git.write_file(command[1], command[2])
+                        else:
+                            _run_step(git, command)
+                else:
+                    _run_step(git, step)
+            state = self._states[name] = git.state()
+        return state
+
+    def instantiate(self, name, git):
+        """Sostituisce lo stato del repository simulato con quello del modello"""
+        git.load_state(self.build(name))
+
+    def answers(self, name):
+        """Tabella nome -> hash delle risposte del modello, calcolata una volta sola"""
+        key = self._answers.get(name)
+        if key is None:
+            git = SimulatedGit()
+            git.load_state(self.build(name))
+            key = self._answers[name] = answer_key(git, self.recipes[name].get('answers', {}))
+        return key
@@ -0,0 +1,282 @@
+"""
+Modelli (snapshot) dei repository di partenza degli scenari.
+
+Invece di rifare checkout/add/commit ogni volta che un giocatore entra in uno
+scenario, il repository iniziale viene costruito una sola volta da una "ricetta",
+compattato (oggetti in un unico pack, ref in packed-refs, index pronto) e poi
+istanziato per ogni giocatore:
+• i pack vengono collegati con hardlink, quindi non occupano spazio in più
+• se l'hardlink non è possibile (filesystem diversi) si usa objects/info/alternates,
+  come fa `git clone --shared`
+• si copiano solo i file piccoli: HEAD, config, index, reflog e working tree
+
+Una ricetta è un dizionario:
+    {'base': 'nome_modello_di_partenza' (opzionale),
+     'steps': [('write', 'file', 'contenuto'), ('run', 'git ...'), ('run_may_fail', 'git ...'),
+               ('commits', {'commits': (...), 'checkout': 'main'}), ('generate', {'commits': 10000, ...})]}
+Il passo 'commits' crea più commit in una volta con gitquest/builder.py, il
+passo 'generate' scrive una storia sintetica lunga con gitquest/synthetic.py
+(i parametri sono quelli di synthetic.generate).
+
+Con l'identità e la data di TEMPLATE_ENV gli hash di un modello sono sempre
+gli stessi, quindi le risposte si possono calcolare una volta sola: la chiave
+'answers' della ricetta ({'nome': ['ref', 'messaggio del commit']}) diventa in
+costruzione una tabella nome -> hash salvata accanto al modello (ANSWERS_FILE),
+e answers() la restituisce senza guardare il repository del giocatore.
+
+Senza un SnapshotStore (partita locale con git vero) populate() esegue la
+ricetta direttamente nel repository del giocatore.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+
+# Identità e data fisse: lo stesso modello produce sempre gli stessi hash. Senza la
+# configurazione dell'utente il branch di git init si fissa qui (i livelli usano main)
+TEMPLATE_ENV = {
+    'GIT_AUTHOR_NAME': "Git Master Quest",
+    'GIT_AUTHOR_EMAIL': "quest@example.com",
+    'GIT_AUTHOR_DATE': "2024-01-01T12:00:00+0100",
+    'GIT_COMMITTER_NAME': "Git Master Quest",
+    'GIT_COMMITTER_EMAIL': "quest@example.com",
+    'GIT_COMMITTER_DATE': "2024-01-01T12:00:00+0100",
+    'GIT_CONFIG_NOSYSTEM': "1",
+    'GIT_CONFIG_GLOBAL': os.devnull,
+    'GIT_CONFIG_COUNT': "1",
+    'GIT_CONFIG_KEY_0': "init.defaultBranch",
+    'GIT_CONFIG_VALUE_0': "main",
+}
+
+# Tabella delle risposte di un modello, scritta in costruzione
+ANSWERS_FILE = os.path.join(".git", "quest-answers.json")
+
+# File di .git che non servono a un repository istanziato
+_SKIP = {os.path.join(".git", "hooks"), os.path.join(".git", "description"),
+         os.path.join(".git", "info", "exclude"), ANSWERS_FILE}
+
+
+class SnapshotError(Exception):
+    """Errore nella costruzione di un modello"""
+
+
+class SnapshotStore:
+    """Costruisce i modelli una volta sola e li istanzia per ogni giocatore"""
+
+    def __init__(self, root, recipes):
+        self.root = root
+        self.recipes = recipes
+        self._manifests = {}
+        self._answers = {}
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def template_path(self, name):
+        """Directory del modello; il nome include l'impronta della ricetta"""
+        return os.path.join(self.root, f"{name}-{self._digest(name)}")
+
+    def build_all(self):
+        """Prepara tutti i modelli in anticipo (es. all'avvio del server)"""
+        for name in self.recipes:
+            self.build(name)
+
+    def build(self, name):
+        """Costruisce il modello se non esiste già e ne restituisce il percorso"""
+        with self._lock:
+            return self._build(name)
+
+    def instantiate(self, name, dest):
+        """Crea in dest il repository di partenza dello scenario, sostituendo il contenuto"""
+        template = self.build(name)
+        manifest = self._manifest(name, template)
+
+        clear_directory(dest)
+        alternates = False
+        for directory in manifest['dirs']:
+            os.makedirs(os.path.join(dest, directory), exist_ok=True)
+        for rel in manifest['packs']:
+            if alternates:
+                continue
+            try:
+                os.link(os.path.join(template, rel), os.path.join(dest, rel))
+            except OSError:
+                alternates = True
+        if alternates:
+            for rel in manifest['packs']:
+                path = os.path.join(dest, rel)
+                if os.path.exists(path):
+                    os.remove(path)
+            os.makedirs(os.path.join(dest, ".git", "objects", "info"), exist_ok=True)
+            with open(os.path.join(dest, ".git", "objects", "info", "alternates"), "w") as f:
+                f.write(os.path.join(template, ".git", "objects") + "\n")
+        for rel in manifest['files']:
+            shutil.copy2(os.path.join(template, rel), os.path.join(dest, rel))
+
+    def answers(self, name):
+        """Tabella nome -> hash delle risposte del modello, calcolata in costruzione"""
+        if not self.recipes[name].get('answers'):
+            return {}
+        key = self._answers.get(name)
+        if key is None:
+            with open(os.path.join(self.build(name), ANSWERS_FILE)) as f:
+                key = self._answers[name] = json.load(f)
+        return key
+
+    # --- Costruzione -----------------------------------------------------
+
+    def _digest(self, name):
+        recipe = self.recipes[name]
+        data = json.dumps([recipe, TEMPLATE_ENV['GIT_COMMITTER_DATE']], sort_keys=True)
+        if any(step[0] == 'generate' for step in recipe['steps']):
+            from gitquest.synthetic import VERSION
+            data += f"synthetic-{VERSION}"
+        if recipe.get('base'):
+            data += self._digest(recipe['base'])
+        return hashlib.sha1(data.encode()).hexdigest()[:12]
+
+    def _build(self, name):
+        path = self.template_path(name)
+        if os.path.isdir(path):
+            return path
+
+        recipe = self.recipes[name]
+        work = tempfile.mkdtemp(prefix=f".{name}-", dir=self.root)
+        try:
+            if recipe.get('base'):
+                self._build(recipe['base'])
+                self._copy_template(recipe['base'], work)
+            else:
+                _git(work, "git init -q -b main")
+            for step in recipe['steps']:
+                _apply(work, step)
+            # Un solo pack e packed-refs: pochi file da collegare per ogni istanza
+            _git(work, "git repack -a -d -q")
+            _git(work, "git pack-refs --all")
+            _write_answers(work, recipe.get('answers', {}))
+            shutil.rmtree(os.path.join(work, ".git", "hooks"), ignore_errors=True)
+            try:
+                os.rename(work, path)
+            except OSError:
+                # Un altro processo ha costruito lo stesso modello nel frattempo
+                shutil.rmtree(work, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(work, ignore_errors=True)
+            raise
+        return path
+
+    def _copy_template(self, name, dest):
+        """Copia completa (senza hardlink) usata per derivare un modello da un altro"""
+        template = self.template_path(name)
+        shutil.copytree(template, dest, dirs_exist_ok=True)
+
+    def _manifest(self, name, template):
+        """Elenco dei file del modello, calcolato una volta per processo"""
+        manifest = self._manifests.get(name)
+        if manifest is None:
+            manifest = {'dirs': [], 'packs': [], 'files': []}
+            pack_dir = os.path.join(".git", "objects", "pack")
+            for current, dirs, files in os.walk(template):
+                rel_dir = os.path.relpath(current, template)
+                if rel_dir in _SKIP:
+                    dirs[:] = []
+                    continue
+                manifest['dirs'].append(rel_dir)
+                for filename in files:
+                    rel = os.path.normpath(os.path.join(rel_dir, filename))
+                    if rel in _SKIP:
+                        continue
+                    if rel_dir == pack_dir:
+                        manifest['packs'].append(rel)
+                    else:
+                        manifest['files'].append(rel)
+            self._manifests[name] = manifest
+        return manifest
+
+
+def populate(path, recipes, name):
+    """Esegue in path (svuotato) la ricetta name e quelle da cui deriva, senza modelli"""
+    recipe = recipes[name]
+    if recipe.get('base'):
+        populate(path, recipes, recipe['base'])
+    else:
+        clear_directory(path)
+        _git(path, "git init -q -b main")
+    for step in recipe['steps']:
+        _apply(path, step)
+
+
+def answer_key(state, answers):
+    """Tabella nome -> hash delle risposte lette da state (un Inspector o SimulatedGit)"""
+    key = {}
+    for name, (ref, subject) in answers.items():
+        oid = state.find_commit(ref, subject)
+        if oid:
+            key[name] = oid
+    return key
+
+
+def _write_answers(work, answers):
+    from gitquest.inspector import Inspector
+    inspector = Inspector(work)
+    try:
+        key = answer_key(inspector, answers)
+    finally:
+        inspector.objects.close()
+    if len(key) < len(answers):
+        raise SnapshotError(f"risposte non trovate: {sorted(set(answers) - set(key))}")
+    with open(os.path.join(work, ANSWERS_FILE), "w") as f:
+        json.dump(key, f)
+
+
+def _apply(work, step):
+    action = step[0]
+    if action == 'write':
+        path = os.path.join(work, step[1])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(step[2])
+    elif action == 'run':
+        _git(work, step[1])
+    elif action == 'run_may_fail':
+        _git(work, step[1], check=False)
+    elif action == 'commits':
+        from gitquest.builder import commands
+        from gitquest.executor import GitWorker
+        worker = GitWorker(work, env=dict(os.environ, **TEMPLATE_ENV), outputs=None)
+        try:
+            done = worker.commit_batch(step[1])
+        finally:
+            worker.close()
+        if not done:
+            for command in commands(step[1]):
+                _apply(work, command)
+    elif action == 'generate':
+        from gitquest.synthetic import generate
+        try:
+            generate(work, env=dict(os.environ, **TEMPLATE_ENV), **step[1])
+        except subprocess.CalledProcessError as e:
+            raise SnapshotError(f"storia sintetica: {e}") from None
+    else:
+        raise SnapshotError(f"passo sconosciuto: {action}")
+
+
+def _git(cwd, command, check=True):
+    env = dict(os.environ, **TEMPLATE_ENV)
+    result = subprocess.run(command, shell=True, capture_output=True, text=True, cwd=cwd, env=env)
+    if check and result.returncode != 0:
+        raise SnapshotError(f"{command}: {result.stderr.strip()}")
+
+
+def clear_directory(path):
+    """Svuota una directory di lavoro senza rimuovere la directory stessa"""
+    os.makedirs(path, exist_ok=True)
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path)
+            else:
+                os.remove(entry.path)
@@ -0,0 +1,215 @@
+"""
+Storie sintetiche lunghe per le sfide sui repository grandi.
+
+Gli scenari costruiscono i loro repository con git add e git commit, un processo
+per comando: va bene per tre commit, non per ventimila. generate() scrive invece
+l'intera storia in un solo flusso di `git fast-import`, che crea direttamente
+commit, alberi e blob in un pack senza passare da index e working tree: decine
+di migliaia di commit in pochi secondi, e la memoria resta costante perché il
+flusso viene inviato a blocchi mentre si genera.
+
+La storia è deterministica (seme e date calcolati, niente orologio): gli stessi
+parametri danno sempre gli stessi hash, quindi può diventare un modello di
+gitquest/snapshots.py con il passo ('generate', {parametri}) e per ogni
+giocatore costa solo un hardlink del pack.
+
+Oltre ai commit casuali (un file cambiato per commit, autori e messaggi presi
+da piccoli elenchi) ci sono alcuni punti fissi che i livelli cercano:
+• il tag v1.0 a un decimo della storia, quando tutto funzionava
+• BUG_MESSAGE: il commit di BUG_AUTHOR che in BUG_FILE porta il timeout da 30 a 5
+  secondi (da trovare con git bisect, git log -S, git blame)
+• LOGOUT_MESSAGE: l'unico commit che parla di logout (per git log --author/--grep)
+• branch feature/* che partono da punti diversi di main
+• big_files file binari grandi in assets/ (per sparse checkout)
+"""
+
+import random
+import subprocess
+
+# Da incrementare quando cambia la storia generata, per ricostruire i modelli
+VERSION = 1
+
+AUTHORS = (
+    ("Giulia Bianchi", "giulia.bianchi@example.com"),
+    ("Marco Rossi", "marco.rossi@example.com"),
+    ("Elena Ferri", "elena.ferri@example.com"),
+    ("Luca Esposito", "luca.esposito@example.com"),
+    ("Sara Romano", "sara.romano@example.com"),
+    ("Paolo Greco", "paolo.greco@example.com"),
+    ("Chiara Conti", "chiara.conti@example.com"),
+    ("Dario Verdi", "dario.verdi@example.com"),
+)
+
+MODULES = ("rete", "archivio", "interfaccia", "calcolo", "utenti", "report", "pagamenti", "notifiche")
+
+_VERBS = ("Corregge", "Semplifica", "Aggiorna", "Ottimizza", "Rinomina", "Documenta", "Estende", "Ripulisce")
+_TOPICS = ("la validazione", "la cache", "i messaggi di errore", "il formato delle date", "i controlli",
+           "la configurazione", "il parser", "le query", "i test", "la paginazione", "i permessi")
+
+BUG_FILE = "src/rete/client.py"
+BUG_AUTHOR = "Dario Verdi"
+BUG_MESSAGE = "Riduce il timeout della connessione per velocizzare i test"
+GOOD_LINE = "TIMEOUT_SECONDI = 30"
+BAD_LINE = "TIMEOUT_SECONDI = 5"
+
+LOGOUT_AUTHOR = "Elena Ferri"
+LOGOUT_MESSAGE = "Svuota la cache delle sessioni al logout"
+LOGOUT_FILE = "src/utenti/sessioni.py"
+
+# Prima data della storia (2020-01-01) e durata complessiva: quattro anni
+START = 1577836800
+SPAN = 4 * 365 * 86400
+
+# Righe per file di testo e byte accumulati prima di ogni invio a fast-import
+LINES = 12
+CHUNK = 1 << 20
+
+
+def _client(timeout_line, revision):
+    """Il file in cui si nasconde il bug; revision cambia le righe attorno al timeout"""
+    return (f'"""Client di rete del progetto"""\n\n'
+            f"{timeout_line}\n"
+            f"TENTATIVI = {3 + revision % 4}\n"
+            f"ATTESA_TRA_TENTATIVI = {revision % 7 + 1}\n\n\n"
+            "def connetti(host, porta):\n"
+            "    return apri_socket(host, porta, timeout=TIMEOUT_SECONDI)\n\n\n"
+            "def richiesta(host, porta, dati):\n"
+            f"    # revisione {revision}\n"
+            "    for _ in range(TENTATIVI):\n"
+            "        risposta = connetti(host, porta).invia(dati)\n"
+            "        if risposta:\n"
+            "            return risposta\n"
+            "    return None\n")
+
+
+class _Stream:
+    """Il flusso di fast-import, inviato a blocchi al processo"""
+
+    def __init__(self, proc):
+        self.proc = proc
+        self.parts = []
+        self.size = 0
+
+    def add(self, data):
+        self.parts.append(data)
+        self.size += len(data)
+        if self.size >= CHUNK:
+            self.flush()
+
+    def blob(self, path, data):
+        self.add(b"M 100644 inline %s\ndata %d\n%s\n" % (path.encode(), len(data), data))
+
+    def commit(self, ref, mark, author, when, message, parent=None):
+        name, email = author
+        message = message.encode()
+        ident = b"%s <%s> %d +0100\n" % (name.encode(), email.encode(), when)
+        self.add(b"commit %s\nmark :%d\nauthor %s" % (ref.encode(), mark, ident)
+                 + b"committer %s" % ident + b"data %d\n%s\n" % (len(message), message))
+        if parent is not None:
+            self.add(b"from :%d\n" % parent)
+
+    def flush(self):
+        self.proc.stdin.write(b"".join(self.parts))
+        self.parts.clear()
+        self.size = 0
+
+
+def generate(path, commits=20000, branches=10, files=200, big_files=0, big_size=1 << 20, seed=1,
+             checkout=True, env=None):
+    """Scrive in path (un repository appena creato, su main) una storia di commits commit
+
+    Con checkout=False il working tree e l'index restano vuoti, come dopo
+    `git clone --no-checkout`. Restituisce il numero di commit creati, branch
+    compresi; subprocess.CalledProcessError se git non riesce a importarli.
+    """
+    args = ["git", "fast-import", "--quiet"]
+    proc = subprocess.Popen(args, stdin=subprocess.PIPE, cwd=path, env=env)
+    try:
+        total = _write_history(_Stream(proc), max(commits, 20), branches, files, big_files, big_size,
+                               random.Random(seed))
+        proc.stdin.close()
+    except BrokenPipeError:
+        # fast-import è già uscito: l'errore lo dice il suo codice di uscita
+        try:
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+    except BaseException:
+        proc.kill()
+        proc.wait()
+        raise
+    if proc.wait() != 0:
+        raise subprocess.CalledProcessError(proc.returncode, args)
+    if checkout:
+        subprocess.run(["git", "reset", "-q", "--hard", "main"], cwd=path, env=env, check=True,
+                       stdout=subprocess.DEVNULL)
+    return total
+
+
+def _write_history(out, commits, branches, files, big_files, big_size, rng):
+    step = max(1, SPAN // commits)
+    tag_at, logout_at, bug_at = commits // 10, commits * 55 // 100, commits * 73 // 100
+    # Revisioni del file col bug sparse lungo tutta la storia, per dare lavoro a git blame
+    client_edits = set(range(commits // 40, commits, max(1, commits // 40))) - {bug_at, logout_at}
+    big_edit = commits // 2
+
+    paths = [f"src/{MODULES[i % len(MODULES)]}/modulo_{i // len(MODULES)}.py" for i in range(files)]
+    paths += [f"docs/{module}.md" for module in MODULES]
+    contents = {p: [f"valore_{n} = 0" for n in range(LINES)] for p in paths}
+    big = [f"assets/immagine_{i}.bin" for i in range(big_files)]
+
+    out.commit("refs/heads/main", 1, AUTHORS[0], START, "Primo commit del progetto")
+    out.blob("README.md", b"# Progetto di esempio\n\nUna storia lunga per le sfide di Git Master Quest.\n")
+    out.blob(BUG_FILE, _client(GOOD_LINE, 0).encode())
+    out.blob(LOGOUT_FILE, b"SESSIONI = {}\n")
+    for p in paths:
+        out.blob(p, ("\n".join(contents[p]) + "\n").encode())
+    for p in big:
+        out.blob(p, rng.randbytes(big_size))
+    timeout_line = GOOD_LINE
+    # Senza "from" fast-import continua il branch dal suo ultimo commit, senza ricaricarne l'albero
+    for i in range(1, commits):
+        when = START + i * step
+        if i == bug_at:
+            timeout_line = BAD_LINE
+            out.commit("refs/heads/main", i + 1, _author(BUG_AUTHOR), when, BUG_MESSAGE)
+            out.blob(BUG_FILE, _client(timeout_line, i).encode())
+        elif i == logout_at:
+            out.commit("refs/heads/main", i + 1, _author(LOGOUT_AUTHOR), when, LOGOUT_MESSAGE)
+            out.blob(LOGOUT_FILE, b"SESSIONI = {}\n\n\ndef logout(utente):\n    SESSIONI.pop(utente, None)\n")
+        elif i in client_edits:
+            out.commit("refs/heads/main", i + 1, rng.choice(AUTHORS), when,
+                       f"Regola i tentativi del client di rete ({i})")
+            out.blob(BUG_FILE, _client(timeout_line, i).encode())
+        elif i == big_edit and big:
+            out.commit("refs/heads/main", i + 1, rng.choice(AUTHORS), when, "Aggiorna le immagini")
+            for p in big:
+                out.blob(p, rng.randbytes(big_size))
+        else:
+            p = rng.choice(paths)
+            lines = contents[p]
+            n = rng.randrange(LINES)
+            lines[n] = f"valore_{n} = {i}"
+            module = p.split("/")[1].removesuffix(".md")
+            out.commit("refs/heads/main", i + 1, rng.choice(AUTHORS), when,
+                       f"{rng.choice(_VERBS)} {rng.choice(_TOPICS)} in {module}")
+            out.blob(p, ("\n".join(lines) + "\n").encode())
+    out.add(b"reset refs/tags/v1.0\nfrom :%d\n\n" % (tag_at + 1))
+    # Ogni branch riparte dal suo commit di main: fast-import ricarica l'albero di quel commit
+    mark = commits
+    for b in range(branches):
+        fork = rng.randrange(1, commits)
+        parent = fork + 1
+        name = f"refs/heads/feature/{MODULES[b % len(MODULES)]}-{b}"
+        for k in range(rng.randint(1, 5)):
+            mark += 1
+            out.commit(name, mark, rng.choice(AUTHORS), START + fork * step + (k + 1) * 60,
+                       f"Prova: {rng.choice(_TOPICS)} ({b}.{k})", parent)
+            out.blob(rng.choice(paths), f"# branch {b}, commit {k}\n".encode())
+            parent = mark
+    out.flush()
+    return mark
+
+
+def _author(name):
+    return next(author for author in AUTHORS if author[0] == name)
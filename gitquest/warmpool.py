@@ -0,0 +1,217 @@
+"""
+Repository degli scenari preparati in anticipo per l'inizio della lezione.
+
+Quando una classe intera si collega insieme, tutti arrivano agli stessi scenari
+(continue_to_conflict_simulation, cherry_pick_scenario) a pochi secondi di
+distanza e SnapshotStore.instantiate gira per ognuno nello stesso momento.
+WarmSnapshots tiene invece per ogni modello una riserva di repository già
+istanziati, preparati da un pool di processi:
+• la consegna a una sessione è uno scambio di directory (due rename), senza
+  copiare nulla mentre il giocatore aspetta
+• dopo ogni consegna la riserva si riempie di nuovo in background
+• la dimensione della riserva segue la domanda attesa (quanti giocatori possono
+  arrivare insieme), il numero di processi i core disponibili
+
+Con la riserva vuota si ricade su SnapshotStore.instantiate, come senza pool.
+Le directory pronte si chiamano gitquest-<pid>-pronto-...: se il server muore
+le ripulisce WorkspaceManager.sweep() come quelle delle sessioni.
+
+Il livello 1 non ha una riserva: git init, add e commit li scrive il giocatore
+ed eseguirli in anticipo cambierebbe quello che vede (es. "Reinitialized...").
+"""
+
+import itertools
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from gitquest.snapshots import SnapshotStore
+from gitquest.workspace import PREFIX
+
+# Modelli preparati per default: i due scenari che tutta la classe incontra
+DEFAULT_NAMES = ('conflict_branches', 'cherry_pick')
+
+# SnapshotStore per processo del pool (i manifest dei modelli restano in memoria)
+_stores = {}
+
+
+def _store(root, recipes):
+    store = _stores.get(root)
+    if store is None:
+        store = _stores[root] = SnapshotStore(root, recipes)
+    return store
+
+
+def _build(root, recipes, name):
+    """Nel pool: costruisce un modello (e quelli da cui deriva)"""
+    return _store(root, recipes).build(name)
+
+
+def _stage(root, recipes, name, parent, prefix):
+    """Nel pool: istanzia il modello in una nuova directory sotto parent"""
+    path = tempfile.mkdtemp(prefix=prefix, dir=parent)
+    try:
+        _store(root, recipes).instantiate(name, path)
+    except Exception:
+        shutil.rmtree(path, ignore_errors=True)
+        raise
+    return path
+
+
+class WarmSnapshots:
+    """SnapshotStore con una riserva di istanze pronte per ogni modello scelto"""
+
+    def __init__(self, store, parent, demand=None, names=DEFAULT_NAMES, workers=None):
+        self.store = store
+        # Stesso filesystem delle sessioni: lo scambio di directory deve essere un rename
+        self.parent = parent
+        self.workers = workers or os.cpu_count() or 1
+        # Istanze pronte per modello: quanti giocatori possono arrivarci insieme
+        self.demand = demand if demand is not None else self.workers
+        self.names = tuple(name for name in names if name in store.recipes)
+        self.ready = {name: deque() for name in self.names}
+        self.pending = dict.fromkeys(self.names, 0)
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        self._pool = None
+        self._swaps = itertools.count()
+
+    @property
+    def recipes(self):
+        return self.store.recipes
+
+    def template_path(self, name):
+        return self.store.template_path(name)
+
+    def answers(self, name):
+        return self.store.answers(name)
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                # Niente fork: il server ha già thread in esecuzione
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+            return self._pool
+
+    def build_all(self):
+        """Costruisce i modelli in parallelo (prima quelli di base) e riempie le riserve"""
+        pool = self._executor()
+        recipes = self.store.recipes
+        built = set()
+        remaining = set(recipes)
+        while remaining:
+            # Un giro per "generazione": ogni modello dopo quello da cui deriva
+            batch = [name for name in remaining
+                     if not recipes[name].get('base') or recipes[name]['base'] in built]
+            futures = [pool.submit(_build, self.store.root, recipes, name) for name in batch]
+            for future in futures:
+                future.result()
+            built.update(batch)
+            remaining.difference_update(batch)
+        for name in self.names:
+            self._refill(name)
+
+    def instantiate(self, name, dest):
+        """Mette in dest il repository di partenza: da una istanza pronta se c'è"""
+        ready = self.ready.get(name)
+        path = None
+        if ready:
+            try:
+                path = ready.popleft()
+            except IndexError:
+                pass
+        if path is not None and self._swap(path, dest):
+            self.hits += 1
+        else:
+            self.store.instantiate(name, dest)
+            if ready is not None:
+                self.misses += 1
+        if ready is not None:
+            self._refill(name)
+
+    def _swap(self, path, dest):
+        """Sostituisce dest con la directory pronta; il vecchio contenuto si cancella dopo"""
+        old = f"{dest}-vecchio-{next(self._swaps)}"
+        try:
+            os.rename(dest, old)
+        except FileNotFoundError:
+            old = None
+        except OSError:
+            shutil.rmtree(path, ignore_errors=True)
+            return False
+        try:
+            os.rename(path, dest)
+        except OSError:
+            if old is not None:
+                os.rename(old, dest)
+            shutil.rmtree(path, ignore_errors=True)
+            return False
+        if old is not None:
+            pool = self._pool
+            try:
+                pool.submit(shutil.rmtree, old, True)
+            except (AttributeError, RuntimeError):
+                # Pool mai avviato o già chiuso
+                shutil.rmtree(old, ignore_errors=True)
+        return True
+
+    def _refill(self, name):
+        """Rimette in preparazione le istanze che mancano per arrivare alla domanda attesa"""
+        with self._lock:
+            if self._closed:
+                return
+            missing = self.demand - len(self.ready[name]) - self.pending[name]
+            if missing <= 0:
+                return
+            self.pending[name] += missing
+        prefix = f"{PREFIX}{os.getpid()}-pronto-{name}-"
+        pool = self._executor()
+        for _ in range(missing):
+            future = pool.submit(_stage, self.store.root, self.store.recipes, name, self.parent, prefix)
+            future.add_done_callback(lambda f, name=name: self._staged(name, f))
+
+    def _staged(self, name, future):
+        with self._lock:
+            self.pending[name] -= 1
+            closed = self._closed
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            self.failures += 1
+            return
+        if closed:
+            shutil.rmtree(future.result(), ignore_errors=True)
+        else:
+            self.ready[name].append(future.result())
+
+    def stats(self):
+        """Istanze pronte per modello, consegne dalla riserva e ripieghi"""
+        return {'ready': {name: len(queue) for name, queue in self.ready.items()},
+                'hits': self.hits, 'misses': self.misses, 'failures': self.failures}
+
+    def close(self):
+        """Ferma il pool e cancella le istanze rimaste (anche quelle in preparazione)"""
+        with self._lock:
+            self._closed = True
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+        for queue in self.ready.values():
+            queue.clear()
+        own = f"{PREFIX}{os.getpid()}-"
+        try:
+            names = os.listdir(self.parent)
+        except OSError:
+            return
+        for name in names:
+            if name.startswith(own) and ("-pronto-" in name or "-vecchio-" in name):
+                shutil.rmtree(os.path.join(self.parent, name), ignore_errors=True)
@@ -0,0 +1,171 @@
+"""
+Directory di lavoro delle partite.
+
+Il repository del giocatore stava sempre in /mnt/c/ProgettoGit, che sotto WSL è
+il filesystem più lento a disposizione (git ci mette da 10 a 50 volte di più che
+su un disco Linux). WorkspaceManager crea invece una directory per sessione
+sotto una radice configurabile, per default in RAM (tmpfs: /dev/shm oppure
+$XDG_RUNTIME_DIR), la cancella a fine partita e tiene sotto controllo lo spazio
+occupato: su tmpfs ogni byte scritto è memoria.
+
+Le directory si chiamano gitquest-<pid>-<casuale>: quelle rimaste da processi
+non più in vita (per esempio dopo un kill -9) vengono ripulite da sweep().
+"""
+
+import atexit
+import os
+import shutil
+import tempfile
+import time
+
+# Spazio massimo per sessione (file del giocatore più .git)
+DEFAULT_QUOTA = 64 * 2**20
+
+PREFIX = "gitquest-"
+
+# Ogni quanto (secondi) ricontare davvero lo spazio usato; in mezzo basta la stima
+CHECK_INTERVAL = 1.0
+
+_default = None
+
+
+class QuotaExceeded(Exception):
+    """La sessione ha superato lo spazio concesso"""
+
+
+def default_root():
+    """Prima radice utilizzabile: $GITQUEST_ROOT, /dev/shm, $XDG_RUNTIME_DIR, poi la temp di sistema"""
+    for candidate in (os.environ.get("GITQUEST_ROOT"), "/dev/shm", os.environ.get("XDG_RUNTIME_DIR")):
+        if candidate and os.path.isdir(candidate) and os.access(candidate, os.W_OK | os.X_OK):
+            return candidate
+    return tempfile.gettempdir()
+
+
+def disk_usage(path):
+    """Byte occupati dai file sotto path (link simbolici esclusi)"""
+    total = 0
+    stack = [path]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        total += entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    pass
+    return total
+
+
+class Workspace:
+    """La directory di una sessione, con il suo limite di spazio"""
+
+    __slots__ = ('path', 'quota', 'manager', 'used', 'measured_at')
+
+    def __init__(self, path, quota=None, manager=None):
+        self.path = path
+        # None = nessun limite
+        self.quota = quota
+        self.manager = manager
+        # Ultima misura dello spazio usato, più i byte scritti da allora
+        self.used = 0
+        self.measured_at = None
+
+    def usage(self):
+        return disk_usage(self.path)
+
+    def check(self, extra=0):
+        """Solleva QuotaExceeded se lo spazio usato (più extra byte) supera la quota
+
+        Contare i file costa quanto un comando git, quindi si rifà al massimo una
+        volta al secondo; la stima in mezzo per eccesso viene verificata prima di
+        fermare la partita.
+        """
+        if self.quota is None:
+            return
+        now = time.monotonic()
+        if self.measured_at is None or now - self.measured_at >= CHECK_INTERVAL:
+            self._measure(now)
+        self.used += extra
+        if self.used > self.quota:
+            self._measure(now)
+            self.used += extra
+            if self.used > self.quota:
+                raise QuotaExceeded(f"spazio esaurito: {self.used / 1024:.1f} KiB su "
+                                    f"{self.quota / 1024:.0f} KiB concessi")
+
+    def _measure(self, now):
+        self.used = self.usage()
+        self.measured_at = now
+
+    def release(self):
+        if self.manager is not None:
+            self.manager.release(self)
+
+
+class WorkspaceManager:
+    """Crea e cancella le directory delle sessioni sotto una radice comune"""
+
+    def __init__(self, root=None, quota=DEFAULT_QUOTA):
+        self.root = root or default_root()
+        self.quota = quota
+        self.active = set()
+
+    def create(self):
+        """Nuova directory vuota per una sessione"""
+        os.makedirs(self.root, exist_ok=True)
+        path = tempfile.mkdtemp(prefix=f"{PREFIX}{os.getpid()}-", dir=self.root)
+        self.active.add(path)
+        return Workspace(path, self.quota, self)
+
+    def release(self, workspace):
+        """Cancella la directory della sessione"""
+        self.active.discard(workspace.path)
+        shutil.rmtree(workspace.path, ignore_errors=True)
+
+    def close(self):
+        for path in list(self.active):
+            self.active.discard(path)
+            shutil.rmtree(path, ignore_errors=True)
+
+    def sweep(self):
+        """Cancella le directory lasciate da processi che non esistono più; restituisce quante"""
+        removed = 0
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return 0
+        for name in names:
+            if not name.startswith(PREFIX):
+                continue
+            pid = name[len(PREFIX):].split("-", 1)[0]
+            if not pid.isdigit() or _alive(int(pid)):
+                continue
+            shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+            removed += 1
+        return removed
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def default_manager():
+    """Gestore condiviso dal processo; le sue directory spariscono all'uscita"""
+    global _default
+    if _default is None:
+        _default = WorkspaceManager()
+        _default.sweep()
+        atexit.register(_default.close)
+    return _default
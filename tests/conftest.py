@@ -0,0 +1,33 @@
+"""
+Impostazioni comuni dei test: il pacchetto si importa dalla radice del repository
+e git gira con un'identità e una configurazione fisse, senza toccare quelle
+dell'utente.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TRANSCRIPT = os.path.join(ROOT, "benchmarks", "copioni", "completo.txt")
+
+
+@pytest.fixture
+def git_env(tmp_path, monkeypatch):
+    """HOME vuota, niente configurazione di sistema, autore e date fissi"""
+    home = tmp_path / "home"
+    home.mkdir()
+    for name, value in {
+        "HOME": str(home),
+        "GIT_CONFIG_NOSYSTEM": "1",
+        "GIT_AUTHOR_NAME": "Test", "GIT_AUTHOR_EMAIL": "test@example.com",
+        "GIT_COMMITTER_NAME": "Test", "GIT_COMMITTER_EMAIL": "test@example.com",
+        "GIT_AUTHOR_DATE": "2024-01-01T00:00:00", "GIT_COMMITTER_DATE": "2024-01-01T00:00:00",
+    }.items():
+        monkeypatch.setenv(name, value)
+    subprocess.run(["git", "config", "--global", "init.defaultBranch", "main"], check=True)
+    return home
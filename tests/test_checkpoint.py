@@ -0,0 +1,113 @@
+"""Formato dei salvataggi e ripristino dei repository"""
+
+import os
+import stat
+import subprocess
+
+import pytest
+
+from gitquest.checkpoint import (CheckpointError, capture_directory, decode, encode, read_record,
+                                 restore_directory, write_record)
+from gitquest.simulated import SimulatedGit
+
+
+def _disk(files, dirs=(), deleted=(), template=None):
+    return {'state': "level_1_basics", 'level': 1, 'score': 30,
+            'repo': ('disco', template, (list(dirs), files, list(deleted)))}
+
+
+def test_header_round_trip():
+    checkpoint = {'state': "cherry_pick_scenario", 'level': 2, 'score': -5}
+    assert decode(encode(checkpoint)) == checkpoint
+
+
+@pytest.mark.parametrize("record", [b"", b"GQSV", b"XXXX" + bytes(20)])
+def test_garbage_is_rejected(record):
+    with pytest.raises(CheckpointError):
+        decode(record)
+
+
+@pytest.mark.parametrize("path", [
+    "../fuori", "a/../../fuori", "/etc/passwd", "", "a//b", "./a",
+    ".git/config", ".git/hooks/pre-commit", ".git/info/attributes", ".git/objects/info/alternates",
+    "sub/.git/HEAD", ".git/description",
+])
+def test_tampered_paths_are_rejected(path):
+    for checkpoint in (_disk({path: (0o644, b"x")}), _disk({}, dirs=[path]), _disk({}, deleted=[path])):
+        with pytest.raises(CheckpointError):
+            decode(encode(checkpoint))
+
+
+@pytest.mark.parametrize("path", [
+    "README.md", "src/main.py", ".git/HEAD", ".git/index", ".git/refs/heads/main", ".git/logs/HEAD",
+    ".git/objects/ab/cdef", ".git/MERGE_HEAD", ".git/BISECT_LOG",
+])
+def test_game_paths_are_kept(path):
+    image = decode(encode(_disk({path: (0o644, b"x")})))['repo'][2]
+    assert image[1] == {path: (0o644, b"x")}
+
+
+def test_restore_masks_modes(tmp_path):
+    files = {"script.sh": (0o4777, b"#!/bin/sh\n"), "dati.txt": (0o666, b"x\n"), "nascosto": (0o000, b"")}
+    image = decode(encode(_disk(files)))['repo'][2]
+    restore_directory(str(tmp_path), image)
+    modes = {name: stat.S_IMODE(os.stat(tmp_path / name).st_mode) for name in files}
+    assert modes == {"script.sh": 0o755, "dati.txt": 0o644, "nascosto": 0o644}
+
+
+def test_restore_without_template_uses_default_config(tmp_path):
+    image = decode(encode(_disk({".git/HEAD": (0o644, b"ref: refs/heads/main\n")}, dirs=[".git"])))['repo'][2]
+    restore_directory(str(tmp_path), image)
+    config = (tmp_path / ".git" / "config").read_text()
+    assert "[core]" in config and "fsmonitor" not in config
+
+
+def test_disk_repository_round_trip(git_env, tmp_path):
+    source = tmp_path / "sorgente"
+    subprocess.run(["git", "init", "-q", str(source)], check=True)
+    (source / "a.txt").write_text("uno\n")
+    subprocess.run(["git", "add", "a.txt"], cwd=source, check=True)
+    subprocess.run(["git", "commit", "-q", "-m", "primo"], cwd=source, check=True)
+    subprocess.run(["git", "config", "alias.x", "!id"], cwd=source, check=True)
+
+    path = tmp_path / "partita.gqsv"
+    write_record(str(path), _disk_from(source))
+    target = tmp_path / "ripreso"
+    target.mkdir()
+    restore_directory(str(target), read_record(str(path))['repo'][2])
+
+    log = subprocess.run(["git", "log", "--format=%H %s"], cwd=target, capture_output=True, text=True, check=True)
+    expected = subprocess.run(["git", "log", "--format=%H %s"], cwd=source, capture_output=True, text=True)
+    assert log.stdout == expected.stdout
+    # La configurazione del repository salvato non viaggia con il salvataggio
+    assert "alias" not in (target / ".git" / "config").read_text()
+
+
+def _disk_from(source):
+    return dict(_disk({}), repo=('disco', None, capture_directory(str(source))))
+
+
+def test_practice_round_trip():
+    git = SimulatedGit()
+    git.run("git init")
+    git.write_file("a.txt", "uno\n")
+    git.run("git add a.txt")
+    git.run('git commit -m "primo"')
+    git.run("git checkout -b feature")
+    checkpoint = dict(_disk({}), repo=('pratica', git.state()))
+    kind, state = decode(encode(checkpoint))['repo']
+    assert kind == 'pratica'
+
+    resumed = SimulatedGit()
+    resumed.load_state(state)
+    for command in ("git log --oneline", "git reflog", "git status", "git branch"):
+        assert resumed.run(command) == git.run(command), command
+    assert resumed.current_branch() == "feature"
+
+
+def test_practice_state_with_wrong_shape_is_rejected():
+    git = SimulatedGit()
+    state = list(git.state())
+    state[1] = "non un dizionario"
+    with pytest.raises(CheckpointError):
+        decode(encode(dict(_disk({}), repo=('pratica', tuple(state)))))
@@ -0,0 +1,65 @@
+"""git log / git reflog calcolati in processo (gitquest/history.py) a confronto con git"""
+
+import subprocess
+
+import pytest
+
+from gitquest.history import show
+from gitquest.inspector import Inspector
+
+
+def _git(repo, *args, **options):
+    return subprocess.run(["git", *args], cwd=repo, capture_output=True, text=True, check=True, **options).stdout
+
+
+@pytest.fixture
+def repo(git_env, tmp_path):
+    path = tmp_path / "repo"
+    subprocess.run(["git", "init", "-q", str(path)], check=True)
+    for i in range(12):
+        branch = ("main", "feature", "experimental")[i % 3]
+        if i == 1:
+            _git(path, "checkout", "-q", "-b", "feature")
+        elif i == 2:
+            _git(path, "checkout", "-q", "-b", "experimental")
+        elif i > 2:
+            _git(path, "checkout", "-q", branch)
+        (path / f"{branch}-{i}.txt").write_text(f"{i}\n")
+        _git(path, "add", ".")
+        _git(path, "commit", "-q", "-m", f"Commit {i}\n\nCorpo del messaggio")
+        if i % 5 == 4:
+            _git(path, "merge", "-q", "--no-edit", "feature")
+    return str(path)
+
+
+COMMANDS = [
+    "log --oneline", "log --oneline -3", "log --oneline main", "log --oneline feature experimental -n 5",
+    "log --oneline --max-count=2 experimental", "log --oneline HEAD -1",
+    "reflog", "reflog --oneline -10", "reflog show main", "reflog -n3",
+]
+
+
+@pytest.mark.parametrize("command", COMMANDS)
+def test_history_matches_git(repo, command):
+    args = command.split()
+    text = show(Inspector(repo), args)
+    assert text is not None
+    assert text == _git(repo, *args)
+
+
+def test_packed_repository(repo):
+    # Le date fisse dei commit sono vecchie: senza questo gc svuoterebbe i reflog
+    _git(repo, "-c", "gc.reflogExpire=never", "-c", "gc.reflogExpireUnreachable=never", "gc", "-q")
+    for command in COMMANDS:
+        args = command.split()
+        assert show(Inspector(repo), args) == _git(repo, *args), command
+
+
+@pytest.mark.parametrize("command", ["log", "log --oneline HEAD~1", "log --oneline --graph", "reflog --all"])
+def test_unsupported_forms_are_left_to_git(repo, command):
+    assert show(Inspector(repo), command.split()) is None
+
+
+def test_repository_config_disables_shortcut(repo):
+    _git(repo, "config", "log.abbrevCommit", "false")
+    assert show(Inspector(repo), ["log", "--oneline"]) is None
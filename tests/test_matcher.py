@@ -0,0 +1,59 @@
+"""Normalizzazione dei comandi e automa delle risposte accettate"""
+
+import pickle
+
+import pytest
+
+from gitquest.matcher import CommandMatcher, canonical
+
+
+@pytest.mark.parametrize("variants, expected", [
+    (["git init", "git  init", "git init ."], ("git", "init")),
+    (["git checkout -b feature", "git switch -c feature", "git switch --create feature"],
+     ("git", "checkout", "-b", "feature")),
+    (['git commit -m "fix bug"', "git commit --message='fix bug'", 'git commit --message="fix bug"'],
+     ("git", "commit", "-m", "fix bug")),
+    (["git commit -a -m msg", "git commit -am msg", "git commit --all -m msg"],
+     ("git", "commit", "-a", "-m", "msg")),
+    (["git commit -mFix", "git commit -m Fix"], ("git", "commit", "-m", "Fix")),
+    (["git add ./a.txt", "git add a.txt"], ("git", "add", "a.txt")),
+    (["git branch --delete x", "git branch -d x"], ("git", "branch", "-d", "x")),
+    (["git reset --mixed HEAD~1", "git reset HEAD~1"], ("git", "reset", "HEAD~1")),
+    (["git stash push", "git stash"], ("git", "stash")),
+    (["git log --max-count=3", "git log -n 3"], ("git", "log", "-n", "3")),
+])
+def test_equivalent_commands(variants, expected):
+    for variant in variants:
+        assert canonical(variant) == expected, variant
+
+
+def test_clusters_with_unknown_letters_are_left_alone():
+    # -X non è un'opzione di git commit combinabile: il token resta com'è
+    assert canonical("git commit -aX") == ("git", "commit", "-aX")
+    # Il valore di -m può iniziare con un trattino
+    assert canonical("git commit -m -a") == ("git", "commit", "-m", "-a")
+
+
+def test_paths_after_double_dash():
+    assert canonical("git checkout -- ./file.txt") == ("git", "checkout", "--", "file.txt")
+
+
+def test_not_git():
+    assert canonical("ls -la") == ("ls", "-la")
+
+
+def test_matcher_wildcards():
+    matcher = CommandMatcher(["git commit -m *", "git log **", "git switch -c feature"])
+    assert matcher.matches("git commit --message=qualcosa")
+    assert not matcher.matches("git commit -m")
+    assert matcher.matches("git log")
+    assert matcher.matches("git log --oneline -3")
+    assert matcher.matches("git checkout -b feature")
+    assert not matcher.matches("git checkout -b altro")
+    assert not matcher.matches("git status")
+
+
+def test_matcher_survives_pickle():
+    matcher = pickle.loads(pickle.dumps(CommandMatcher(["git add .", "git add -A"])))
+    assert matcher.matches("git add --all")
+    assert not matcher.matches("git add -u")
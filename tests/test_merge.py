@@ -0,0 +1,74 @@
+"""gitquest/merge.py a confronto con git merge-file"""
+
+import itertools
+import random
+import shutil
+import subprocess
+
+import pytest
+
+from gitquest.merge import check_resolution, merge3
+
+needs_git = pytest.mark.skipif(shutil.which("git") is None, reason="git non installato")
+
+
+def _git_merge(tmp_path, base, ours, theirs):
+    paths = []
+    for name, text in (("ours", ours), ("base", base), ("theirs", theirs)):
+        path = tmp_path / name
+        path.write_text(text)
+        paths.append(str(path))
+    # Righe tutte con lettere e cifre: il livello zealous-alnum di merge-file coincide con quello di git merge
+    result = subprocess.run(["git", "merge-file", "-p", "-L", "HEAD", "-L", "base", "-L", "theirs", *paths],
+                            capture_output=True, text=True)
+    return result.stdout, result.returncode
+
+
+def _mutate(rng, lines, tag, fresh):
+    lines = list(lines)
+    for _ in range(rng.randint(0, 5)):
+        op = rng.random()
+        i = rng.randrange(len(lines) + 1)
+        if op < 0.4 and lines:
+            lines[min(i, len(lines) - 1)] = f"{tag}{next(fresh)}\n"
+        elif op < 0.7:
+            lines.insert(i, f"{tag}{next(fresh)}\n")
+        elif lines:
+            del lines[min(i, len(lines) - 1)]
+    return "".join(lines)
+
+
+@needs_git
+def test_one_sided_change_keeps_conflicts_apart(tmp_path):
+    base = [f"l{i}\n" for i in range(12)]
+    ours = list(base)
+    ours[2:4] = ["X2\n", "X3\n"]
+    del ours[10], ours[6]
+    theirs = [line for line in base if line not in ("l3\n", "l8\n", "l9\n")]
+    base, ours, theirs = "".join(base), "".join(ours), "".join(theirs)
+    result = merge3(base, ours, theirs)
+    assert len(result.conflicts) == 2
+    assert result.render() == _git_merge(tmp_path, base, ours, theirs)[0]
+
+
+@needs_git
+@pytest.mark.parametrize("seed", range(4))
+def test_random_merges_match_git(seed, tmp_path):
+    rng = random.Random(seed)
+    fresh = itertools.count()
+    for _ in range(300):
+        base = [f"l{i}\n" for i in range(rng.randint(0, 15))]
+        ours, theirs = _mutate(rng, base, "o", fresh), _mutate(rng, base, "t", fresh)
+        base = "".join(base)
+        expected, conflicts = _git_merge(tmp_path, base, ours, theirs)
+        result = merge3(base, ours, theirs)
+        assert result.render() == expected, (base, ours, theirs)
+        assert len(result.conflicts) == conflicts
+
+
+def test_resolution_choices():
+    result = merge3("a\nb\nc\n", "a\nB\nc\n", "a\nβ\nc\n")
+    assert check_resolution(result.resolve("theirs"), result).choices == ["theirs"]
+    assert check_resolution(result.resolve("both"), result).choices == ["both"]
+    leftover = check_resolution(result.render(), result)
+    assert not leftover.ok and leftover.markers == [2, 4, 6]
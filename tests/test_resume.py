@@ -0,0 +1,71 @@
+"""Partite interrotte a metà di uno stato e riprese da un salvataggio"""
+
+import asyncio
+import os
+
+import pytest
+
+from conftest import TRANSCRIPT
+from gitquest.checkpoint import decode, encode
+from gitquest.headless import BufferedOutput, ScriptedInput, load_game_class, load_transcript
+
+GitMasterQuest = load_game_class()
+ANSWERS = load_transcript(TRANSCRIPT)
+
+
+def _new_game(answers, practice, repo_dir):
+    os.makedirs(repo_dir)
+    out = BufferedOutput()
+    reader = ScriptedInput(answers, echo=out)
+    game = GitMasterQuest(repo_dir=repo_dir, reader=reader, out=out, practice=practice)
+    game.enable_checkpoints()
+    return game, reader, out
+
+
+async def _play(game, checkpoint=None):
+    try:
+        await game.play(checkpoint)
+        return True
+    except EOFError:
+        return False
+    finally:
+        game.git.close()
+
+
+def _interrupt_and_resume(cut, practice, tmp_path):
+    """Gioca le prime cut risposte, salva, riprende con quelle rimaste dall'ingresso dello stato"""
+    game, reader, out = _new_game(ANSWERS[:cut], practice, str(tmp_path / "prima"))
+    left = []
+    capture = game.engine.on_checkpoint
+
+    def on_checkpoint(checkpoint):
+        capture(checkpoint)
+        left.append(len(reader.answers))
+
+    game.engine.on_checkpoint = on_checkpoint
+    if asyncio.run(_play(game)):
+        return None
+    saved = decode(encode(game.save_point()))
+    # Lo stato ripreso ricomincia: il giocatore ridà le risposte dall'ingresso in poi
+    start = cut - left[-1]
+    game, reader, out = _new_game(ANSWERS[start:], practice, str(tmp_path / "dopo"))
+    assert asyncio.run(_play(game, saved))
+    return game.score, out.getvalue()
+
+
+def _complete(practice, tmp_path):
+    game, reader, out = _new_game(ANSWERS, practice, str(tmp_path / "intera"))
+    assert asyncio.run(_play(game))
+    return game.score, out.getvalue()
+
+
+@pytest.mark.parametrize("practice", [True, False], ids=["pratica", "git"])
+def test_resume_mid_state(practice, git_env, tmp_path):
+    score, output = _complete(practice, tmp_path)
+    ending = output[-400:]
+    for cut in range(1, len(ANSWERS)):
+        result = _interrupt_and_resume(cut, practice, tmp_path / str(cut))
+        if result is None:
+            break
+        assert result[0] == score, cut
+        assert result[1].endswith(ending), cut
@@ -0,0 +1,114 @@
+"""Policy dei comandi del giocatore e limiti di run_limited"""
+
+import shutil
+import sys
+
+import pytest
+
+from gitquest.sandbox import (DEFAULT_POLICY, CommandRejected, Limits, compile_policy, resource,
+                              run_limited, split)
+
+
+@pytest.mark.parametrize("command", [
+    "git status; rm -rf ~",
+    "git log | sh",
+    "git status && curl example.com",
+    "git commit -m $(id)",
+    "git commit -m `id`",
+    "git log > /tmp/out",
+    "git status\nid",
+])
+def test_shell_operators_rejected(command):
+    with pytest.raises(CommandRejected):
+        DEFAULT_POLICY.check(command)
+
+
+@pytest.mark.parametrize("command", [
+    "rm -rf /",
+    "git",
+    "git -c core.pager=id log",
+    "git --git-dir=/etc status",
+    "git -C / status",
+    "git config core.fsmonitor id",
+    "git log --output=stolen",
+    "git diff --ext-diff",
+    "git add /etc/passwd",
+    "git add ../fuori",
+    "git add -- sub/../../fuori",
+    "git bisect run ./script.sh",
+    "git sparse-checkout apply",
+    "git commit -m",
+    "git commit -qm",
+    "git commit 'unterminated",
+])
+def test_commands_rejected(command):
+    with pytest.raises(CommandRejected):
+        DEFAULT_POLICY.check(command)
+
+
+@pytest.mark.parametrize("command, argv", [
+    ("git status", ["git", "status"]),
+    ('git commit -am "due parole"', ["git", "commit", "-am", "due parole"]),
+    ("git commit -mFix", ["git", "commit", "-mFix"]),
+    ("git log --oneline -3", ["git", "log", "--oneline", "-3"]),
+    ("git commit -m 'a; b | c'", ["git", "commit", "-m", "a; b | c"]),
+    ("git bisect good", ["git", "bisect", "good"]),
+    ("git checkout -- file.txt", ["git", "checkout", "--", "file.txt"]),
+])
+def test_commands_accepted(command, argv):
+    assert DEFAULT_POLICY.check(command) == argv
+
+
+def test_level_policy_limits_subcommands_and_flags():
+    policy = compile_policy({"add": True, "commit": ["-m", "--message"]})
+    assert policy.check("git commit --message=ok") == ["git", "commit", "--message=ok"]
+    with pytest.raises(CommandRejected):
+        policy.check("git commit -a -m ok")
+    with pytest.raises(CommandRejected):
+        policy.check("git reset --hard")
+
+
+def test_compile_policy_rejects_unknown_entries():
+    with pytest.raises(ValueError):
+        compile_policy({"config": True})
+    with pytest.raises(ValueError):
+        compile_policy({"log": ["--output"]})
+
+
+def test_split_keeps_quoted_operators():
+    assert split("git commit -m \"x > y\"") == ["git", "commit", "-m", "x > y"]
+
+
+needs_rlimits = pytest.mark.skipif(resource is None, reason="senza il modulo resource")
+
+
+@needs_rlimits
+def test_cpu_limit(tmp_path):
+    code, _, error = run_limited([sys.executable, "-c", "while True: pass"], str(tmp_path), limits=Limits(cpu=1))
+    assert code != 0
+    assert "limite di CPU" in error
+
+
+@needs_rlimits
+@pytest.mark.skipif(shutil.which("dd") is None, reason="dd non installato")
+def test_file_size_limit(tmp_path):
+    argv = ["dd", "if=/dev/zero", "of=grande", "bs=1024", "count=2048"]
+    code, _, error = run_limited(argv, str(tmp_path), limits=Limits(file_size=1 << 20))
+    assert code != 0
+    assert "dimensione massima" in error
+    assert (tmp_path / "grande").stat().st_size <= 1 << 20
+
+
+@needs_rlimits
+def test_memory_limit(tmp_path):
+    argv = [sys.executable, "-c", "b = bytearray(512 << 20)"]
+    code, _, error = run_limited(argv, str(tmp_path), limits=Limits(memory=256 << 20))
+    assert code != 0
+    assert "MemoryError" in error
+
+
+def test_output_limit(tmp_path):
+    code, output, _ = run_limited([sys.executable, "-c", "print('x' * 100000)"], str(tmp_path),
+                                  limits=Limits(output=1000))
+    assert code == 0
+    assert len(output) < 2000
@@ -0,0 +1,59 @@
+"""SimulatedGit a confronto con git vero: stesso esito e stesso output"""
+
+import os
+import re
+import subprocess
+
+from gitquest.simulated import EPOCH, SimulatedGit
+from gitquest.snapshots import TEMPLATE_ENV
+
+# Sequenza di comandi dei livelli, con file scritti in mezzo (tuple)
+STEPS = [
+    "git status", "git log", "git init -q", "git status", "git log", "git commit -m x", "git branch x",
+    ("README.md", "# T\n\nQuesto Git!"), "git add README.md", "git status", "git commit -m base",
+    "git commit -m vuoto",
+    "git checkout -b feature", ("README.md", "# T\n\nQuesto Git!\n\n## F\nfeature!\n"), "git commit -am f",
+    "git checkout main", ("README.md", "# T\n\nQuesto Git!\n\n## M\nmain!\n"), "git commit -am m",
+    "git merge feature", "git status", "git commit -m y", "git checkout feature", "git merge --abort",
+    "git merge feature", "git add README.md", "git status", "git commit -m risolto", "git log --oneline",
+    "git stash", "git branch -m trunk", "git branch", "git reset --soft HEAD~1", "git status", "git reset",
+    "git status", "git cherry-pick nope", "git checkout nope", "git branch feature", "git merge nope",
+    "git add nope",
+    "git checkout -b z trunk~1", ("README.md", "# T\n\nQuesto Git!\n\n## Z\nz!\n"), "git commit -am z",
+    "git cherry-pick feature", "git status", "git cherry-pick --abort", "git status",
+    "git reflog -5", "git rev-parse --abbrev-ref HEAD", "git log -2 --oneline trunk",
+]
+
+
+def _mask(text):
+    return re.sub(r"\b[0-9a-f]{7,40}\b", "H", re.sub(r"Date: .*", "Date: D", text))
+
+
+def test_simulated_matches_git(git_env, tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    env = dict(os.environ, **{name: value for name, value in TEMPLATE_ENV.items() if "DATE" not in name})
+    env.pop("GIT_CONFIG_GLOBAL")
+    simulated = SimulatedGit(str(repo))
+    step = 0
+    for item in STEPS:
+        if isinstance(item, tuple):
+            name, content = item
+            (repo / name).write_text(content)
+            simulated.write_file(name, content)
+            continue
+        step += 1
+        date = f"{EPOCH + 60 * step} +0100"
+        real = subprocess.run(item.split(), cwd=repo, capture_output=True, text=True,
+                              env=dict(env, GIT_AUTHOR_DATE=date, GIT_COMMITTER_DATE=date))
+        success, output, error = simulated.run(item)
+        assert (success, _mask(output), _mask(error)) == \
+            (real.returncode == 0, _mask(real.stdout), _mask(real.stderr)), item
+        if (repo / "README.md").exists():
+            assert _mask(simulated.read_file("README.md")) == _mask((repo / "README.md").read_text()), item
+
+
+def test_unsupported_commands_fail_cleanly():
+    simulated = SimulatedGit()
+    success, output, error = simulated.run("cat README.md")
+    assert not success and output == "" and "pratica" in error